@@ -1,5 +1,4 @@
 import os, time
-import json
 import requests
 import logging
 import lark_oapi as lark
@@ -9,6 +8,7 @@ import lark_oapi.api.drive.v1.resource as drive_rsc
 
 from ..utils import get_semester, get_semester_and_week
 from ..config import Config
+from . import json_codec
 
 # 父类
 class SMCLabClient(object):
@@ -57,8 +57,7 @@ class SMCLabClient(object):
         从json中获取应用的app_id, app_secret
         """
 
-        with open(app_tokens_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = json_codec.load(app_tokens_path)
         app_info = data["SMCLab_Manager"]
         return app_info
 
@@ -77,8 +76,7 @@ class SMCLabClient(object):
         """
         # 检查本地是否有上次的应用身份权限tenant_access_token记录，且是否还有效
         if os.path.exists(last_tenant_path):
-            with open(last_tenant_path, "r", encoding="utf-8") as f:
-                last_tenant_access_info = json.load(f)
+            last_tenant_access_info = json_codec.load(last_tenant_path)
             last_token_time = last_tenant_access_info.get("time_stamp", 0)
             expire = last_tenant_access_info.get("expire", 0)
             tenant_access_token = last_tenant_access_info.get("tenant_access_token")
@@ -95,13 +93,12 @@ class SMCLabClient(object):
         expire = response["expire"]
         tenant_access_token = response["tenant_access_token"]
 
-        with open(last_tenant_path, 'w', encoding='utf-8') as f:
-            time_now = time.time()
-            json.dump({"time_stamp": time_now, 
-                       "time_stamp_readable": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time_now)),
-                       "expire": expire,
-                       "tenant_access_token": tenant_access_token}, 
-                      f, ensure_ascii=False, indent=4)
+        time_now = time.time()
+        json_codec.dump({"time_stamp": time_now, 
+                         "time_stamp_readable": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time_now)),
+                         "expire": expire,
+                         "tenant_access_token": tenant_access_token}, 
+                        last_tenant_path)
 
         return response["tenant_access_token"]  # 返回访问令牌
     
@@ -11,6 +11,8 @@ class SMCLabBaseParser:
         self.logger = logging.getLogger(config.logger_name)
         self._incre_data_path = config.incre_data_path
         self._sem_data_path = config.sem_data_path
+        # 解码原始页面时的进程数(0 表示使用全部CPU)
+        self._parse_workers = config.parse_workers
         self._year_semester, self._this_week = get_semester_and_week()    
         
     def reset_time(self):
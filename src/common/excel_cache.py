@@ -0,0 +1,100 @@
+import os
+import pickle
+import hashlib
+import logging
+import pandas as pd
+
+CACHE_VERSION = 1
+
+
+def _sidecar_path(excel_path: str) -> str:
+    """缓存文件与Excel放在同一目录下, 如 data_incre/.SMCLab学生扩展信息.xlsx.cache.pkl"""
+    dirname, basename = os.path.split(excel_path)
+    return os.path.join(dirname, f".{basename}.cache.pkl")
+
+
+def _file_sha1(path: str) -> str:
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _load_sidecar(sidecar_path: str):
+    if not os.path.exists(sidecar_path):
+        return None
+    try:
+        with open(sidecar_path, "rb") as f:
+            payload = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION:
+        return None
+    return payload
+
+
+def _save_sidecar(sidecar_path: str, payload: dict, logger: logging.Logger):
+    try:
+        tmp_path = sidecar_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, sidecar_path)
+    except OSError as e:
+        # 缓存写入失败不影响读取结果
+        logger.debug("Excel缓存写入失败 %s: %s", sidecar_path, e)
+
+
+def read_excel_cached(excel_path: str,
+                      logger: logging.Logger = None,
+                      **read_kwargs) -> pd.DataFrame:
+    """
+    带二进制缓存的 pd.read_excel
+
+    第一次读取后, 在Excel旁边保存一份pickle格式的DataFrame。
+    之后的读取先比较mtime和文件大小, 不一致时再比较内容哈希,
+    都不一致才重新解析Excel。人工编辑Excel后缓存会自动失效。
+
+    Args:
+        excel_path: Excel文件路径
+        logger: 日志对象, 默认使用根logger
+        **read_kwargs: 透传给 pd.read_excel 的参数(参与缓存校验)
+
+    Returns:
+        pd.DataFrame: 读取结果(副本, 可以随意修改)
+    """
+    if logger is None:
+        logger = logging.getLogger()
+    if not os.path.exists(excel_path):
+        raise FileNotFoundError(f"Excel文件不存在: {excel_path}")
+
+    stat = os.stat(excel_path)
+    kwargs_key = repr(sorted(read_kwargs.items()))
+    sidecar_path = _sidecar_path(excel_path)
+    payload = _load_sidecar(sidecar_path)
+
+    if payload is not None and payload.get("kwargs") == kwargs_key:
+        # 快速路径: mtime和大小都没变
+        if payload.get("mtime") == stat.st_mtime and payload.get("size") == stat.st_size:
+            return payload["df"].copy()
+        # mtime变了但内容可能没变(例如被复制/同步过)
+        sha1 = _file_sha1(excel_path)
+        if payload.get("sha1") == sha1:
+            payload["mtime"] = stat.st_mtime
+            payload["size"] = stat.st_size
+            _save_sidecar(sidecar_path, payload, logger)
+            return payload["df"].copy()
+    else:
+        sha1 = _file_sha1(excel_path)
+
+    df = pd.read_excel(excel_path, **read_kwargs)
+    logger.debug("已解析Excel并写入缓存: %s", excel_path)
+    _save_sidecar(sidecar_path, {
+        "version": CACHE_VERSION,
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "sha1": sha1,
+        "kwargs": kwargs_key,
+        "df": df,
+    }, logger)
+    return df.copy()
@@ -0,0 +1,87 @@
+"""
+统一的JSON读写接口
+
+- 优先使用 orjson (原生实现, 直接读写bytes), 未安装时回退到标准库 json
+- 机器产物(原始页面、通讯录、组会信息等)默认紧凑输出; 需要人工编辑的配置用 pretty=True
+- 较大的文件通过 mmap 读取, 避免先复制一份完整的字符串
+"""
+import os
+import mmap
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 超过该大小的文件使用mmap读取
+MMAP_THRESHOLD = 1 << 20
+
+if orjson is not None:
+    JSONDecodeError = orjson.JSONDecodeError
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+else:
+    JSONDecodeError = json.JSONDecodeError
+
+
+def _default(obj):
+    """处理numpy/pandas标量等标准库无法序列化的对象"""
+    if hasattr(obj, "item"):
+        return obj.item()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def loads(data):
+    """解析 str / bytes / memoryview"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps_bytes(obj, pretty: bool = False) -> bytes:
+    """序列化为UTF-8编码的bytes(中文不转义)"""
+    if orjson is not None:
+        option = _OPTIONS | orjson.OPT_INDENT_2 if pretty else _OPTIONS
+        return orjson.dumps(obj, default=_default, option=option)
+    return dumps(obj, pretty).encode("utf-8")
+
+
+def dumps(obj, pretty: bool = False) -> str:
+    """序列化为字符串(中文不转义)"""
+    if orjson is not None:
+        return dumps_bytes(obj, pretty).decode("utf-8")
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=_default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def load(path: str, use_mmap: bool = None):
+    """
+    读取JSON文件
+
+    Args:
+        path: 文件路径
+        use_mmap: 是否使用mmap, 默认根据文件大小(MMAP_THRESHOLD)自动选择
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if use_mmap is None:
+            use_mmap = size >= MMAP_THRESHOLD
+        if not use_mmap or size == 0:
+            return loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return loads(view)
+            finally:
+                view.release()
+
+
+def dump(obj, path: str, pretty: bool = False):
+    """写入JSON文件, 机器产物默认紧凑输出, 人工编辑的配置文件使用 pretty=True"""
+    with open(path, "wb") as f:
+        f.write(dumps_bytes(obj, pretty))
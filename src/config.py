@@ -1,8 +1,8 @@
-import json
 import os
 import logging
 from dataclasses import dataclass
 from typing import Any
+from .common import json_codec
 
 @dataclass
 class BitableConfig:
@@ -33,8 +33,7 @@ class Config:
     def _load_config(self):
         """加载配置文件"""
         if os.path.exists(self.config_path):
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                self._config = json.load(f)
+            self._config = json_codec.load(self.config_path)
 
     def _set_attributes(self):
         """将配置项设置为类属性"""
@@ -77,6 +76,7 @@ class Config:
         self.ab_department_id_path = addressbook_config.get("department_id_path", "data_raw/address_book_raw_data/department_id.json")
         self.ab_update_department_id = addressbook_config.get("update_department_id", True)
         self.ab_output_path = addressbook_config.get("output_path", "data_raw/address_book.json")
+        self.ab_max_workers = addressbook_config.get("max_workers", 8)
 
         # 考勤模块配置
         daily_attendance_config = self._config.get("daily_attendance", {})
@@ -89,6 +89,24 @@ class Config:
         seminar_attendance_config = self._config.get("seminar_attendance", {})
         self.sa_seminar_start_time = seminar_attendance_config.get("seminar_start_time", 1900)
         self.sa_seminar_end_time = seminar_attendance_config.get("seminar_end_time", 2030)
+        self.sa_late_grace_minutes = seminar_attendance_config.get("late_grace_minutes", 10)
+        self.sa_early_leave_minutes = seminar_attendance_config.get("early_leave_minutes", 15)
+
+        # 组会接龙(群聊消息)配置
+        seminar_relay_config = self._config.get("seminar_relay", {})
+        self.sr_chat_name = seminar_relay_config.get("chat_name", "")
+        self.sr_chat_id = seminar_relay_config.get("chat_id", "")
+        self.sr_raw_path = seminar_relay_config.get("raw_path", "data_raw/seminar_relay_raw_data")
+        self.sr_poll_interval = seminar_relay_config.get("poll_interval", 5)
+
+        # 实验室在场统计配置
+        lab_presence_config = self._config.get("lab_presence", {})
+        self.lp_min_stay_minutes = lab_presence_config.get("min_stay_minutes", 30)
+
+        # 原始页面解析配置
+        # workers: null 表示串行解析(默认); 0 表示使用全部CPU; 正数为进程数
+        parser_config = self._config.get("parser", {})
+        self.parse_workers = parser_config.get("workers", None)
 
         # 多维表格配置
         bitable_config = self._config.get("bitable", {})
@@ -100,4 +118,10 @@ class Config:
         # 小组会议安排配置
         group_meeting_config = self._config.get("group_meeting_scheduler", {})
         self.max_groups_per_period = group_meeting_config.get("max_groups_per_period", 4)
-        self.default_periods = group_meeting_config.get("default_periods", [])
\ No newline at end of file
+        self.default_periods = group_meeting_config.get("default_periods", [])
+
+        # 组会报告轮换配置
+        rotation_config = self._config.get("presenter_rotation", {})
+        self.rotation_talks_per_week = rotation_config.get("talks_per_week", 3)
+        self.rotation_last_week = rotation_config.get("last_week", 18)
+        self.rotation_skip_weeks = rotation_config.get("skip_weeks", [])
\ No newline at end of file
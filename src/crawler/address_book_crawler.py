@@ -1,5 +1,8 @@
 import os, glob
 import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import lark_oapi as lark
 # from lark_oapi.api.bitable.v1 import *
 from lark_oapi.api.contact.v3 import *
@@ -7,6 +10,7 @@ from lark_oapi.api.contact.v3.model.user import User
 
 from ..common.baseclient import SMCLabClient
 from ..config import Config
+from ..common import json_codec
 
 class SMCLabAddressBookCrawler(SMCLabClient):
     def __init__(self,
@@ -19,6 +23,8 @@ class SMCLabAddressBookCrawler(SMCLabClient):
         self.department_id_path = config.ab_department_id_path
         self.update_department_id = config.ab_update_department_id
         self.output_path = config.ab_output_path
+        self.max_workers = config.ab_max_workers
+        self.delta_path = os.path.join(os.path.dirname(self.output_path), "address_book_delta.json")
         if not os.path.exists(self.raw_data_path):
             os.makedirs(self.raw_data_path, exist_ok=True)
         self.department_id = {}
@@ -27,12 +33,12 @@ class SMCLabAddressBookCrawler(SMCLabClient):
         # 参考 https://open.feishu.cn/api-explorer/cli_a8cd4e246b70d013?apiName=children&from=op_doc&project=contact&resource=department&version=v3
         department_id_path = self.department_id_path
         if not self.update_department_id and os.path.exists(department_id_path):
-            with open(department_id_path, "r", encoding="utf-8") as f:
-                self.department_id = json.load(f)
+            self.department_id = json_codec.load(department_id_path)
             return
         has_more = True
         page_token = ""
         page_cnt = 0
+        items = []
         self.logger.info("正在下载部门id: ")
         while(has_more):
             self.logger.info("请求下载第%d页...", page_cnt)
@@ -48,15 +54,16 @@ class SMCLabAddressBookCrawler(SMCLabClient):
             resp: ChildrenDepartmentResponse = self._client.contact.v3.department.children(request)
             self._check_resp(resp)
 
+            # 逐页累积部门, 不再要求只有一页
+            if resp.data.items:
+                items.extend(resp.data.items)
             # 更新循环状态
             has_more = resp.data.has_more
             page_token = resp.data.page_token
             page_cnt += 1
-        
-        assert page_cnt == 1, "还未适配多页Json逻辑, 请首先尝试增大Page size"
+        self.logger.info("共下载 %d 页, %d 个部门", page_cnt, len(items))
 
-        data = resp.data
-        for item in data.items:
+        for item in items:
             department = {
                 "department_name": item.name,
                 "department_id": item.department_id,
@@ -66,18 +73,17 @@ class SMCLabAddressBookCrawler(SMCLabClient):
                 "primary_member_count": item.primary_member_count, # 当前部门及其下属部门的主属成员（即成员的主部门为当前部门）的数量。
             }
             self.department_id[item.name]=department
-        with open(department_id_path, 'w', encoding='utf-8') as f:
-            json.dump(self.department_id, f, ensure_ascii=False, indent=4)
+        json_codec.dump(self.department_id, department_id_path)
 
     def _get_one_department_records(self, 
                                    department_id: str = "") -> List[User]:
-        # 获取其中一个部门的用户名单
+        # 获取其中一个部门的用户名单(会在线程池中并发调用, 不要修改共享状态)
         has_more = True
         page_token = ""
         page_cnt = 0
         users=[]
         while(has_more):
-            self.logger.info("请求下载第%d页...", page_cnt)
+            self.logger.debug("部门 %s 请求下载第%d页...", department_id, page_cnt)
             request = FindByDepartmentUserRequest.builder() \
                 .department_id(department_id) \
                 .page_size(self.page_size) \
@@ -112,19 +118,61 @@ class SMCLabAddressBookCrawler(SMCLabClient):
         
         return primary_users
 
+    def _build_member_info(self, user: User) -> dict:
+        # 把User对象整理为通讯录中的一条成员记录
+        if user.custom_attrs and len(user.custom_attrs) > 0 and hasattr(user.custom_attrs[0], 'value') and hasattr(user.custom_attrs[0].value, 'option_value'):
+            cultivation = user.custom_attrs[0].value.option_value
+            # print(f"用户 {user.name} 有培养属性: {user.custom_attrs[0].value.option_value}")
+        else:
+            cultivation = ""
+            self.logger.debug("用户 %s 没有培养属性", user.name)
+
+        if user.custom_attrs and len(user.custom_attrs) > 1 and hasattr(user.custom_attrs[1], 'value') and hasattr(user.custom_attrs[1].value, 'generic_user') and hasattr(user.custom_attrs[1].value.generic_user, 'id'):
+            mentor_id = user.custom_attrs[1].value.generic_user.id
+            # print(f"用户 {user.name} 有导师属性: {user.custom_attrs[1].value.generic_user.id}")
+        else:
+            mentor_id = ""
+            self.logger.debug("用户 %s 没有导师属性", user.name)
+        return {
+            "name": user.name,
+            "union_id": user.union_id,
+            "open_id": user.open_id,
+            "user_id": user.user_id,
+            "email": user.email,
+            "mobile": user.mobile,
+            "cultivation": cultivation,
+            "mentor_id": mentor_id
+        }
+
+    def _fetch_department_users(self, department_names: List[str]) -> List[List[User]]:
+        # 按部门并发下载成员, 返回顺序与 department_names 一致
+        open_department_ids = [
+            self.department_id[name].get("open_department_id", "0")
+            for name in department_names
+        ]
+        max_workers = max(1, min(self.max_workers, len(open_department_ids)))
+        self.logger.info("并发下载 %d 个部门的成员 (并发数: %d)", len(open_department_ids), max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self._get_one_department_records, open_department_ids))
+
     def get_raw_records(self):
         # 递归下载各个部门的通讯录, 并整理
 
         if self.department_id == {}:
             self._get_department_id()
         address_book = {}
-        
-        for department_name in self.department_id:
+
+        department_names = list(self.department_id)
+        if department_names:
+            department_users = self._fetch_department_users(department_names)
+        else:
+            department_users = []
+
+        for department_name, users in zip(department_names, department_users):
             department = self.department_id[department_name]
             open_department_id = department.get("open_department_id", "0")
 
             self.logger.info("正在处理部门: %s (%s)", department_name, open_department_id)
-            users = self._get_one_department_records(open_department_id)
             primary_users = self._filter_primary_dept_users(users, open_department_id)
             address_book[department_name] = {
                 "department_id": open_department_id,
@@ -132,36 +180,56 @@ class SMCLabAddressBookCrawler(SMCLabClient):
                 "member_count": department.get("member_count"),
                 "primary_members_count": department.get("primary_member_count"),
                 "primary_members": [
+                    self._build_member_info(user) for user in primary_users
                 ]
             }
-            for user in primary_users:
-                if user.custom_attrs and len(user.custom_attrs) > 0 and hasattr(user.custom_attrs[0], 'value') and hasattr(user.custom_attrs[0].value, 'option_value'):
-                    cultivation = user.custom_attrs[0].value.option_value
-                    # print(f"用户 {user.name} 有培养属性: {user.custom_attrs[0].value.option_value}")
-                else:
-                    cultivation = ""
-                    self.logger.debug("用户 %s 没有培养属性", user.name)
-
-                if user.custom_attrs and len(user.custom_attrs) > 1 and hasattr(user.custom_attrs[1], 'value') and hasattr(user.custom_attrs[1].value, 'generic_user') and hasattr(user.custom_attrs[1].value.generic_user, 'id'):
-                    mentor_id = user.custom_attrs[1].value.generic_user.id
-                    # print(f"用户 {user.name} 有导师属性: {user.custom_attrs[1].value.generic_user.id}")
-                else:
-                    mentor_id = ""
-                    self.logger.debug("用户 %s 没有导师属性", user.name)
-                member_info = {
-                        "name": user.name,
-                        "union_id": user.union_id,
-                        "open_id": user.open_id,
-                        "user_id": user.user_id,
-                        "email": user.email,
-                        "mobile": user.mobile,
-                        "cultivation": cultivation,
-                        "mentor_id": mentor_id
-                    } 
-                address_book[department_name]["primary_members"].append(member_info)
                 
-        # 保存页面
+        # 与上一次的快照做差分, 只有变化时才重写通讯录
+        delta = self._diff_address_book(address_book)
         address_book_path = self.output_path
-        with open(address_book_path, 'w', encoding='utf-8') as f:
-            json.dump(address_book, f, ensure_ascii=False, indent=4)
-        return
\ No newline at end of file
+        if delta["joined"] or delta["left"] or delta["changed"] or not os.path.exists(address_book_path):
+            json_codec.dump(address_book, address_book_path)
+        else:
+            self.logger.info("通讯录无变化, 跳过写入: %s", address_book_path)
+        json_codec.dump(delta, self.delta_path)
+        return delta
+
+    @staticmethod
+    def _member_hashes(address_book: dict) -> dict:
+        """
+        计算通讯录中每个成员的哈希(以open_id为键), 部门也参与哈希
+        """
+        hashes = {}
+        for department_name, department in address_book.items():
+            for member in department.get("primary_members", []):
+                open_id = member.get("open_id")
+                if not open_id:
+                    continue
+                payload = json.dumps([department_name, member], ensure_ascii=False, sort_keys=True)
+                hashes[open_id] = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+        return hashes
+
+    def _diff_address_book(self, address_book: dict) -> dict:
+        """
+        与上一次保存的 address_book.json 比较, 返回新加入/离开/信息变化的成员 open_id
+        """
+        old_hashes = {}
+        if os.path.exists(self.output_path):
+            try:
+                old_hashes = self._member_hashes(json_codec.load(self.output_path))
+            except (json_codec.JSONDecodeError, OSError) as e:
+                self.logger.warning("读取上一次的通讯录失败: %s, 视为全部新加入", e)
+        new_hashes = self._member_hashes(address_book)
+
+        joined = sorted(new_hashes.keys() - old_hashes.keys())
+        left = sorted(old_hashes.keys() - new_hashes.keys())
+        changed = sorted(k for k in new_hashes.keys() & old_hashes.keys()
+                         if new_hashes[k] != old_hashes[k])
+        self.logger.info("通讯录差分: 新加入 %d 人, 离开 %d 人, 信息变化 %d 人",
+                         len(joined), len(left), len(changed))
+        return {
+            "time_stamp": int(time.time()),
+            "joined": joined,
+            "left": left,
+            "changed": changed,
+        }
@@ -1,5 +1,4 @@
 import os, glob
-import json
 import lark_oapi as lark
 # from lark_oapi.api.bitable.v1 import *
 from lark_oapi.api.attendance.v1 import *
@@ -7,8 +6,9 @@ from lark_oapi.api.attendance.v1 import *
 from ..common.baseclient import SMCLabClient
 from ..utils import TimeParser
 from ..data_manager.excel_manager import SMCLabInfoManager
-from ..data_manager.seminar_manager import SMCLabSeminarManager
+from ..data_manager.seminar_calendar import SMCLabSeminarCalendar
 from ..config import Config
+from ..common import json_codec
 # 下载考勤原始数据(按周/月/学期/每周组会进行下载)
 class SMCLabAttendanceCrawler(SMCLabClient):
     def __init__(self, 
@@ -31,14 +31,13 @@ class SMCLabAttendanceCrawler(SMCLabClient):
         self.seminar_end_time = config.sa_seminar_end_time
 
         self.info_manager = None
-        self.seminar_weekday_map = None
+        self.seminar_calendar = None
     
     def _set_info_manager(self):
         self.info_manager = SMCLabInfoManager()
 
-    def _set_seminar_manager(self):
-        seminar_manager = SMCLabSeminarManager()
-        self.seminar_weekday_map = seminar_manager.get_seminar_weekday_map()
+    def _set_seminar_calendar(self):
+        self.seminar_calendar = SMCLabSeminarCalendar.get(self._year_semester, self._sem_data_path)
 
     def _check_resp(self, resp: SearchGroupResponse):
         assert resp.code == 0
@@ -135,8 +134,7 @@ class SMCLabAttendanceCrawler(SMCLabClient):
         group_info_path = self.group_info_path
         if not update and os.path.exists(group_info_path):
             self.logger.info("找到已有考勤组信息!")
-            with open(group_info_path, "r", encoding="utf-8") as f:
-                group_info = json.load(f)
+            group_info = json_codec.load(group_info_path)
             self.group_name = group_info.get("group_name", "")
             self.group_id = group_info.get("group_id", 0)
             self.group_users_id_list = group_info.get("group_users_id_list", [])
@@ -149,9 +147,7 @@ class SMCLabAttendanceCrawler(SMCLabClient):
             group_info["group_id"] = self.group_id
             group_info["group_users_id_list"] = self.group_users_id_list
             group_info["group_users_name_list"] = self.group_users_name_list
-            with open(group_info_path, 'w', encoding='utf-8') as f:
-                json.dump(group_info,
-                          f, ensure_ascii=False, indent=4)
+            json_codec.dump(group_info, group_info_path)
         
         self.logger.info("获取到考勤组信息:")
         self.logger.info(f"group_name: {self.group_name}")
@@ -181,7 +177,7 @@ class SMCLabAttendanceCrawler(SMCLabClient):
             self._check_resp_3(resp)
 
             # 保存页面
-            resp_json = lark.JSON.marshal(resp.data, indent=4)
+            resp_json = lark.JSON.marshal(resp.data)
             with open(fields_path, 'w', encoding='utf-8') as f:
                 f.write(resp_json)
 
@@ -226,7 +222,7 @@ class SMCLabAttendanceCrawler(SMCLabClient):
         self._check_resp_4(resp) # 响应的合法性检查
 
         # 保存页面
-        resp_json = lark.JSON.marshal(resp.data, indent=4)
+        resp_json = lark.JSON.marshal(resp.data)
         resp_page_path = os.path.join(raw_data_path, f"{self._year_semester}_Week{self._this_week-1}_daily_attendance_raw.json")
         with open(resp_page_path, 'w', encoding='utf-8') as f:
             f.write(resp_json)
@@ -235,9 +231,11 @@ class SMCLabAttendanceCrawler(SMCLabClient):
 
     def get_seminar_records_byweek(self, 
                                    week: int, 
-                                   update_group_info: bool = True):
+                                   update_group_info: bool = True,
+                                   remove_past: bool = True):
         # 参考https://open.feishu.cn/document/server-docs/attendance-v1/user_task/query-2
         # 与日常考勤查询不同，这里下载的是打卡流水数据：UserFlow
+        # remove_past=False 时保留其他周的流水, 用于多周批量统计
         def split_ids_into_chunks(user_ids):
             if len(user_ids)>50:
                 return [user_ids[i:i + 50] for i in range(0, len(user_ids), 50)]
@@ -246,12 +244,13 @@ class SMCLabAttendanceCrawler(SMCLabClient):
         
         if not self.group_id:
             self.get_group_info(update_group_info) # 保证self.group_users_id_list存在
-        self._remove_past_seminar_record()
-        if not self.seminar_weekday_map:
-            self._set_seminar_manager()
+        if remove_past:
+            self._remove_past_seminar_record()
+        if not self.seminar_calendar:
+            self._set_seminar_calendar()
         raw_data_path = self.raw_data_path
         # 返回周几开会
-        seminar_weekday = self.seminar_weekday_map.get(str(week), None)
+        seminar_weekday = self.seminar_calendar.weekday_of(week)
         if not seminar_weekday:
             self.logger.info(f"第{week}周没有组会")
             return
@@ -289,7 +288,7 @@ class SMCLabAttendanceCrawler(SMCLabClient):
             self._check_resp_4(resp) # 响应的合法性检查
 
             # 保存页面
-            resp_json = lark.JSON.marshal(resp.data, indent=4)
+            resp_json = lark.JSON.marshal(resp.data)
             resp_page_path = os.path.join(raw_data_path, f"{self._year_semester}_Week{week}_seminar_attendance_raw_{count}.json")
             with open(resp_page_path, 'w', encoding='utf-8') as f:
                 f.write(resp_json)
@@ -297,10 +296,72 @@ class SMCLabAttendanceCrawler(SMCLabClient):
 
         self.logger.info("下载完成!")
 
+    def get_presence_records_byweek(self,
+                                    week: int,
+                                    update_group_info: bool = True):
+        """
+        下载第week周(周一0点到周日24点)全部的打卡流水, 用于统计在实验室的时间分布
+
+        文件名为 {学期}_Week{week}_presence_flow_raw_{k}.json, 不会被组会/日常考勤的清理删除,
+        在场统计按周增量累计
+        """
+        def split_ids_into_chunks(user_ids):
+            return [user_ids[i:i + 50] for i in range(0, len(user_ids), 50)]
+
+        if not self.group_id:
+            self.get_group_info(update_group_info)
+        if week > self._this_week:
+            raise ValueError(f"week {week} 大于当前周 {self._this_week}")
+        monday = TimeParser.get_week_date(weekday=1, week=week)
+        sunday = TimeParser.get_week_date(weekday=7, week=week)
+        timestamp_from, timestamp_to = TimeParser.get_sec_level_timestamps(monday, sunday,
+                                                                           start_time="0000",
+                                                                           end_time="2359")
+        # 旧的分页可能比这次多, 先删掉这一周的
+        for file_path in glob.glob(os.path.join(self.raw_data_path, f"{self._year_semester}_Week{week}_presence_flow_raw_*.json")):
+            os.remove(file_path)
+
+        self.logger.info(f"下载{week}周的打卡流水:")
+        for count, user_ids in enumerate(split_ids_into_chunks(self.group_users_id_list)):
+            request: QueryUserFlowRequest = QueryUserFlowRequest.builder() \
+                .employee_type("employee_id") \
+                .include_terminated_user(True) \
+                .request_body(QueryUserFlowRequestBody.builder()\
+                            .user_ids(user_ids) \
+                            .check_time_from(timestamp_from)
+                            .check_time_to(timestamp_to)
+                            .build()) \
+                .build()
+            resp: QueryUserFlowResponse = self._client.attendance.v1.user_flow.query(request)
+            self._check_resp_4(resp)
+
+            resp_json = lark.JSON.marshal(resp.data)
+            resp_page_path = os.path.join(self.raw_data_path, f"{self._year_semester}_Week{week}_presence_flow_raw_{count}.json")
+            with open(resp_page_path, 'w', encoding='utf-8') as f:
+                f.write(resp_json)
+
+        self.logger.info("下载完成!")
+
+    def get_seminar_records_for_weeks(self,
+                                      weeks,
+                                      update_group_info: bool = True):
+        """
+        批量下载多周的组会打卡流水(保留其他周已下载的流水), 供多周考勤统计一次性分类
+        """
+        for week in sorted(set(weeks)):
+            if week < 1:
+                continue
+            # 考勤组成员只在第一次调用时获取
+            self.get_seminar_records_byweek(week, update_group_info, remove_past=False)
+
     def get_this_week_seminar_records(self, 
                                       update_group_info: bool = True):
         self.get_seminar_records_byweek(self._this_week, update_group_info)
 
     def get_last_week_seminar_records(self,
                                       update_group_info: bool = True):
-        self.get_seminar_records_byweek(self._this_week-1, update_group_info)
\ No newline at end of file
+        self.get_seminar_records_byweek(self._this_week-1, update_group_info)
+
+    def get_last_week_presence_records(self,
+                                       update_group_info: bool = True):
+        self.get_presence_records_byweek(self._this_week-1, update_group_info)
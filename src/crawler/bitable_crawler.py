@@ -1,11 +1,11 @@
 import os, glob
-import json
 import lark_oapi as lark
 from lark_oapi.api.bitable.v1 import *
 
 from ..common.baseclient import SMCLabClient
 from ..utils import TimeParser, get_semester_and_week
 from ..config import Config
+from ..common import json_codec
 
 
 class SMCLabBitableCrawler(SMCLabClient):
@@ -65,7 +65,7 @@ class SMCLabBitableCrawler(SMCLabClient):
             self._check_resp(resp) # 响应的合法性检查
 
             # 保存页面
-            resp_json = lark.JSON.marshal(resp.data, indent=4)
+            resp_json = lark.JSON.marshal(resp.data)
             resp_page_path = os.path.join(raw_data_path, f"{self._year_semester}_Week{self._this_week}_{self.table_name}_raw_{page_cnt}.json")
             with open(resp_page_path, 'w', encoding='utf-8') as f:
                 f.write(resp_json)
@@ -90,8 +90,7 @@ class SMCLabWeeklyReportCrawler(SMCLabBitableCrawler):
             os.makedirs(self.raw_data_path, exist_ok=True)
 
     def _set_table_tokens(self):
-        with open(self._semester_info_path, "r", encoding="utf-8") as f:
-            all_table_info = json.load(f)[self._year_semester]["bitable"]
+        all_table_info = json_codec.load(self._semester_info_path)[self._year_semester]["bitable"]
         table_info = all_table_info[self.table_name]
         self._app_token = table_info["app_token"]
         self._table_id = table_info["table_id"]
@@ -137,7 +136,7 @@ class SMCLabWeeklyReportCrawler(SMCLabBitableCrawler):
             self._check_resp(resp) # 响应的合法性检查
 
             # 保存页面
-            resp_json = lark.JSON.marshal(resp.data, indent=4)
+            resp_json = lark.JSON.marshal(resp.data)
             resp_page_path = os.path.join(raw_data_path, 
                                           f"{self._year_semester}_Week{week}_{self.table_name}_byweek_raw_{page_cnt}.json")
             
@@ -174,18 +173,21 @@ class SMCLabSeminarLeaveCrawler(SMCLabBitableCrawler):
             os.makedirs(self.raw_data_path, exist_ok=True)
 
     def _set_table_tokens(self):
-        with open(self._semester_info_path, "r", encoding="utf-8") as f:
-            all_table_info = json.load(f)[self._year_semester]["bitable"]
+        all_table_info = json_codec.load(self._semester_info_path)[self._year_semester]["bitable"]
         table_info = all_table_info[self.table_name]
         self._app_token = table_info["app_token"]
         self._table_id = table_info["table_id"]
 
-    def get_raw_records_by_week(self, week: int = None):
+    def get_raw_records_by_week(self, week: int = None, remove_past: bool = True):
         # 按周筛选返回响应
+        # remove_past=False 时保留其他周的请假记录, 用于多周批量统计
         if not week:
             week = self._this_week - 1
 
-        self._remove_past_weekly_records()
+        if remove_past:
+            self._remove_past_weekly_records()
+        else:
+            self._remove_week_records(week)
         raw_data_path = self.raw_data_path
         has_more = True
         page_token = ""
@@ -216,7 +218,7 @@ class SMCLabSeminarLeaveCrawler(SMCLabBitableCrawler):
             self._check_resp(resp) # 响应的合法性检查
 
             # 保存页面
-            resp_json = lark.JSON.marshal(resp.data, indent=4)
+            resp_json = lark.JSON.marshal(resp.data)
             resp_page_path = os.path.join(raw_data_path, 
                                           f"{self._year_semester}_Week{week}_{self.table_name}_byweek_raw_{page_cnt}.json")
             
@@ -232,6 +234,13 @@ class SMCLabSeminarLeaveCrawler(SMCLabBitableCrawler):
     def get_last_week_records(self):
         self.get_raw_records_by_week()
 
+    def get_records_for_weeks(self, weeks):
+        """批量下载多周的组会请假记录(保留其他周已下载的记录)"""
+        for week in sorted(set(weeks)):
+            if week < 1:
+                continue
+            self.get_raw_records_by_week(week, remove_past=False)
+
     def _remove_past_weekly_records(self):
         # 删除所有的上周记录
         search_pattern = os.path.join(self.raw_data_path, f"*{self.table_name}*.json")
@@ -239,6 +248,12 @@ class SMCLabSeminarLeaveCrawler(SMCLabBitableCrawler):
             os.remove(file_path)
         return
 
+    def _remove_week_records(self, week: int):
+        # 只删除该周之前下载的页面(页数可能变少)
+        search_pattern = os.path.join(self.raw_data_path, f"{self._year_semester}_Week{week}_{self.table_name}_byweek_raw_*.json")
+        for file_path in glob.glob(search_pattern):
+            os.remove(file_path)
+
 class SMCLabSeminarCrawler(SMCLabBitableCrawler):
     # 这是一个需要爬取所有记录的表格
     def __init__(self, config: Config = None):
@@ -253,8 +268,7 @@ class SMCLabSeminarCrawler(SMCLabBitableCrawler):
             os.makedirs(self.raw_data_path, exist_ok=True)
 
     def _set_table_tokens(self):
-        with open(self._semester_info_path, "r", encoding="utf-8") as f:
-            all_table_info = json.load(f)[self._year_semester]["bitable"]
+        all_table_info = json_codec.load(self._semester_info_path)[self._year_semester]["bitable"]
         table_info = all_table_info[self.table_name]
         self._app_token = table_info["app_token"]
         self._table_id = table_info["table_id"]
@@ -273,8 +287,7 @@ class SMCLabScheduleCrawler(SMCLabBitableCrawler):
             os.makedirs(self.raw_data_path, exist_ok=True)
 
     def _set_table_tokens(self):
-        with open(self._semester_info_path, "r", encoding="utf-8") as f:
-            all_table_info = json.load(f)[self._year_semester]["bitable"]
+        all_table_info = json_codec.load(self._semester_info_path)[self._year_semester]["bitable"]
         table_info = all_table_info[self.table_name]
         self._app_token = table_info["app_token"]
         self._table_id = table_info["table_id"]
\ No newline at end of file
@@ -0,0 +1,308 @@
+import os
+import re
+import time
+from typing import List, Optional
+
+from lark_oapi.api.im.v1 import *
+
+from ..common.baseclient import SMCLabClient
+from ..utils import TimeParser
+from ..data_manager.seminar_calendar import SMCLabSeminarCalendar
+from ..config import Config
+from ..common import json_codec
+
+# 接龙的一行: "3. 张三 在会议室" / "3、张三"
+_RELAY_LINE_RE = re.compile(r"^\s*(\d+)\s*[.、．]\s*(\S+)")
+# 飞书接龙消息的标记, 没有该标记的编号列表(如议程)不是接龙
+RELAY_MARKER = "接龙"
+
+
+def parse_relay_names(text: str) -> List[str]:
+    """
+    从接龙文本中提取姓名(序号之后第一个空白之前的内容), 保持接龙顺序并去重;
+    不含接龙标记的消息返回空列表
+    """
+    if RELAY_MARKER not in text:
+        return []
+    names = []
+    for line in text.splitlines():
+        match = _RELAY_LINE_RE.match(line)
+        if match and match.group(2) not in names:
+            names.append(match.group(2))
+    return names
+
+
+def message_text(msg_type: str, content: str) -> str:
+    """把 text / post 消息的content转换为纯文本, 其他类型返回空字符串"""
+    try:
+        content = json_codec.loads(content or "{}")
+    except json_codec.JSONDecodeError:
+        return ""
+    if msg_type == "text":
+        return content.get("text", "")
+    if msg_type == "post":
+        # post 可能直接是 {"title", "content"}, 也可能按语言嵌套一层
+        if "content" not in content and content:
+            content = next(iter(content.values()))
+        lines = [content.get("title", "")]
+        for paragraph in content.get("content", []):
+            lines.append("".join(node.get("text", "") for node in paragraph if isinstance(node, dict)))
+        return "\n".join(lines)
+    return ""
+
+
+# 从实验室群聊增量下载消息, 自动生成组会接龙名单
+class SMCLabRelayCrawler(SMCLabClient):
+    def __init__(self,
+                 config: Config = None):
+        if config is None:
+            config = Config()
+        super().__init__(config)
+        self.raw_data_path = config.sr_raw_path
+        if not os.path.exists(self.raw_data_path):
+            os.makedirs(self.raw_data_path, exist_ok=True)
+        # 接龙txt和考勤流水放在一起, 供 SMCLabSeminarAttendanceParser 读取
+        self.relay_txt_path = config.da_raw_path
+        self.chat_name = config.sr_chat_name
+        self.chat_id = config.sr_chat_id
+        self.poll_interval = config.sr_poll_interval
+        self.seminar_start_time = config.sa_seminar_start_time
+        self.seminar_end_time = config.sa_seminar_end_time
+        # 游标: {chat_id: {"create_time": 毫秒时间戳, "message_ids": [同一秒内已下载的消息], "since": 已下载范围的起点(秒)}}
+        self.cursor_path = os.path.join(self.raw_data_path, "relay_cursor.json")
+
+        self.seminar_calendar = None
+        # 各周当前的最佳接龙 {周次: (组会时间窗, 姓名列表, 消息时间)}, 轮询时只需比较新消息
+        self._relay_best = {}
+
+    def _set_seminar_calendar(self):
+        self.seminar_calendar = SMCLabSeminarCalendar.get(self._year_semester, self._sem_data_path)
+
+    def _messages_path(self) -> str:
+        return os.path.join(self.raw_data_path, f"{self._year_semester}_chat_messages.jsonl")
+
+    def _load_messages(self) -> List[dict]:
+        messages_path = self._messages_path()
+        if not os.path.exists(messages_path):
+            return []
+        with open(messages_path, 'rb') as f:
+            return [json_codec.loads(line) for line in f if line.strip()]
+
+    def _check_resp(self, resp):
+        assert resp.code == 0, f"请求失败: {resp.code} {resp.msg}"
+
+    def _get_chat_id(self) -> str:
+        """按群名称查找群聊ID(机器人需要在群里)"""
+        if self.chat_id:
+            return self.chat_id
+        page_token = ""
+        while True:
+            request: ListChatRequest = ListChatRequest.builder() \
+                .page_size(100) \
+                .page_token(page_token) \
+                .build()
+            resp: ListChatResponse = self._client.im.v1.chat.list(request)
+            self._check_resp(resp)
+            for chat in resp.data.items or []:
+                if chat.name == self.chat_name:
+                    self.chat_id = chat.chat_id
+                    self.logger.info("群聊 %s 的ID: %s", self.chat_name, self.chat_id)
+                    return self.chat_id
+            if not resp.data.has_more:
+                break
+            page_token = resp.data.page_token
+        raise ValueError(f"未找到群聊: {self.chat_name}")
+
+    def _load_cursor(self, chat_id: str) -> dict:
+        if not os.path.exists(self.cursor_path):
+            return {}
+        return json_codec.load(self.cursor_path).get(chat_id, {})
+
+    def _save_cursor(self, chat_id: str, cursor: dict):
+        cursors = json_codec.load(self.cursor_path) if os.path.exists(self.cursor_path) else {}
+        cursors[chat_id] = cursor
+        json_codec.dump(cursors, self.cursor_path)
+
+    def _list_messages(self, chat_id: str, start_time: int, end_time: int = None) -> List[dict]:
+        """按时间升序列出 [start_time, end_time] (秒级时间戳) 内的消息"""
+        messages = []
+        page_token = ""
+        while True:
+            builder = ListMessageRequest.builder() \
+                .container_id_type("chat") \
+                .container_id(chat_id) \
+                .start_time(str(start_time)) \
+                .sort_type("ByCreateTimeAsc") \
+                .page_size(50) \
+                .page_token(page_token)
+            if end_time is not None:
+                builder = builder.end_time(str(end_time))
+            request: ListMessageRequest = builder.build()
+            resp: ListMessageResponse = self._client.im.v1.message.list(request)
+            self._check_resp(resp)
+            for item in resp.data.items or []:
+                if item.deleted:
+                    continue
+                messages.append({
+                    "message_id": item.message_id,
+                    "create_time": int(item.create_time),
+                    "sender_id": item.sender.id if item.sender else "",
+                    "msg_type": item.msg_type,
+                    "text": message_text(item.msg_type, item.body.content if item.body else ""),
+                })
+            if not resp.data.has_more:
+                break
+            page_token = resp.data.page_token
+        return messages
+
+    def _append_messages(self, messages: List[dict]):
+        with open(self._messages_path(), 'ab') as f:
+            for message in messages:
+                f.write(json_codec.dumps_bytes(message) + b"\n")
+
+    def fetch_new_messages(self, start_time: int = None) -> List[dict]:
+        """
+        从上次的游标开始下载群聊中的新消息, 逐行追加到 {学期}_chat_messages.jsonl
+
+        参考: https://open.feishu.cn/document/server-docs/im-v1/message/list
+
+        Args:
+            start_time: 需要覆盖的起始时间(秒级时间戳), 没有游标时默认从当前时间往前一天;
+                        早于已下载的范围(游标中的 since)时, 先补拉这段更早的消息
+
+        Returns:
+            list: 新消息 [{"message_id", "create_time", "sender_id", "msg_type", "text"}, ...]
+        """
+        chat_id = self._get_chat_id()
+        cursor = self._load_cursor(chat_id)
+        backfill = []
+        if cursor:
+            # 接口按秒过滤, 同一秒内已下载的消息按ID去重
+            cursor_time = int(cursor["create_time"]) // 1000
+            since = int(cursor.get("since", cursor_time))
+            if start_time is not None and start_time < since:
+                # 已下载范围之前的时间段(如补算更早的周), 只补拉本地还没有的消息
+                known_ids = {m["message_id"] for m in self._load_messages()}
+                backfill = [m for m in self._list_messages(chat_id, start_time, since)
+                            if m["message_id"] not in known_ids]
+                since = start_time
+            start_time = cursor_time
+        else:
+            if start_time is None:
+                start_time = int(time.time()) - 24 * 3600
+            since = start_time
+        seen_ids = set(cursor.get("message_ids", []))
+
+        new_messages = [m for m in self._list_messages(chat_id, start_time)
+                        if m["message_id"] not in seen_ids]
+        if backfill:
+            backfill_ids = {m["message_id"] for m in backfill}
+            new_messages = [m for m in new_messages if m["message_id"] not in backfill_ids]
+            self._append_messages(backfill)
+            self.logger.info("补拉群聊历史消息 %d 条", len(backfill))
+
+        if new_messages:
+            self._append_messages(new_messages)
+            last_time = new_messages[-1]["create_time"]
+            boundary_ids = [m["message_id"] for m in new_messages if m["create_time"] // 1000 == last_time // 1000]
+            if cursor and int(cursor["create_time"]) // 1000 == last_time // 1000:
+                boundary_ids = list(seen_ids) + boundary_ids
+            self._save_cursor(chat_id, {"create_time": last_time, "message_ids": boundary_ids, "since": since})
+        elif cursor and since != cursor.get("since"):
+            self._save_cursor(chat_id, dict(cursor, since=since))
+        self.logger.info("群聊新消息 %d 条", len(new_messages))
+        return backfill + new_messages
+
+    def _seminar_window_ms(self, week: int) -> Optional[tuple]:
+        """第week周组会当天 (开始前1小时, 结束后3小时) 的毫秒时间戳区间, 没有组会时返回None"""
+        if not self.seminar_calendar:
+            self._set_seminar_calendar()
+        seminar_weekday = self.seminar_calendar.weekday_of(week)
+        if not seminar_weekday:
+            return None
+        seminar_date = TimeParser.get_week_date(weekday=seminar_weekday, week=week)
+        end_time = min(self.seminar_end_time + 300, 2359)
+        timestamp_from, timestamp_to = TimeParser.get_sec_level_timestamps(seminar_date,
+                                                                           start_time=str(self.seminar_start_time - 100),
+                                                                           end_time=str(end_time))
+        return int(timestamp_from) * 1000, int(timestamp_to) * 1000
+
+    def sync_week_relay(self, week: int = None, fetch: bool = True) -> List[str]:
+        """
+        增量拉取群消息, 从组会时间窗内的消息中找出接龙并写出接龙txt
+
+        只有带接龙标记(RELAY_MARKER)的消息才算接龙; 同一个接龙会被不断复制追加,
+        取时间窗内接龙行数最多(相同时最新)的一条消息作为最终名单。
+        每周第一次同步时扫描整个消息日志, 之后只比较本次新下载(含补拉)的消息
+
+        Returns:
+            list: 接龙中的姓名, 没有组会或没有接龙时为空列表
+        """
+        if week is None:
+            week = self._this_week
+        if not (self.chat_id or self.chat_name):
+            self.logger.info("未配置接龙群聊(seminar_relay.chat_name/chat_id), 跳过")
+            return []
+        window = self._seminar_window_ms(week)
+        if window is None:
+            self.logger.info(f"第{week}周没有组会")
+            return []
+        new_messages = self.fetch_new_messages(start_time=window[0] // 1000) if fetch else []
+        cached = self._relay_best.get(week)
+        if cached is None or cached[0] != window or not fetch:
+            best, best_time = [], 0
+            messages = self._load_messages()
+        else:
+            _, best, best_time = cached
+            messages = new_messages
+        # 按 (行数, 时间) 取最大, 与消息在日志中的顺序无关(补拉的历史消息追加在末尾)
+        for message in messages:
+            if not window[0] <= message["create_time"] <= window[1]:
+                continue
+            names = parse_relay_names(message["text"])
+            if names and (len(names), message["create_time"]) >= (len(best), best_time):
+                best, best_time = names, message["create_time"]
+        self._relay_best[week] = (window, best, best_time)
+        if not best:
+            if cached is None:
+                self.logger.info(f"第{week}周组会暂无接龙")
+            return []
+        if cached is None or cached[1:] != (best, best_time):
+            relay_path = os.path.join(self.relay_txt_path, f"{self._year_semester}_Week{week}_seminar_attendance_relay.txt")
+            with open(relay_path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(f"{k}. {name}" for k, name in enumerate(best, 1)))
+            self.logger.info(f"第{week}周接龙 {len(best)} 人, 已写入 {relay_path}")
+        return best
+
+    def seminar_end_ms(self, week: int) -> Optional[int]:
+        """第week周组会结束时间的毫秒时间戳, 没有组会时返回None"""
+        if not self.seminar_calendar:
+            self._set_seminar_calendar()
+        seminar_weekday = self.seminar_calendar.weekday_of(week)
+        if not seminar_weekday:
+            return None
+        seminar_date = TimeParser.get_week_date(weekday=seminar_weekday, week=week)
+        _, timestamp_to = TimeParser.get_sec_level_timestamps(seminar_date,
+                                                              start_time=str(self.seminar_start_time),
+                                                              end_time=str(self.seminar_end_time))
+        return int(timestamp_to) * 1000
+
+    def watch_week_relay(self, week: int = None, until_ms: int = None) -> List[str]:
+        """
+        组会期间每隔 poll_interval 秒增量拉取一次, 直到 until_ms (默认为组会结束后3小时的窗口关闭)
+        """
+        if week is None:
+            week = self._this_week
+        window = self._seminar_window_ms(week)
+        if window is None:
+            self.logger.info(f"第{week}周没有组会")
+            return []
+        if until_ms is None:
+            until_ms = window[1]
+        names = []
+        while True:
+            names = self.sync_week_relay(week) or names
+            if time.time() * 1000 > until_ms:
+                break
+            time.sleep(self.poll_interval)
+        return names
@@ -1,11 +1,13 @@
-import json, os
+import os
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from openpyxl import load_workbook
 from openpyxl.styles import Font, PatternFill
 
 from ..common.baseparser import SMCLabBaseParser
+from ..common.excel_cache import read_excel_cached
 from ..config import Config
+from ..common import json_codec
 
 class SMCLabAddressBookParser(SMCLabBaseParser):
     def __init__(self, config: Config = None):
@@ -20,6 +22,7 @@ class SMCLabAddressBookParser(SMCLabBaseParser):
             os.makedirs(self.raw_data_path, exist_ok=True)
         # 需要提前下载的
         self.address_book_path = os.path.join(self.raw_data_path, "address_book.json")
+        self.address_book_delta_path = os.path.join(self.raw_data_path, "address_book_delta.json")
         self.group_info_path = config.da_group_info_path
         # 输出路径
         self.output_path = os.path.join(config.incre_data_path, "SMCLab学生扩展信息.xlsx")
@@ -27,8 +30,7 @@ class SMCLabAddressBookParser(SMCLabBaseParser):
     
     def _extract_users_from_bitable(self):
         members = []
-        with open(self.address_book_path, "r", encoding="utf-8") as f:
-            json_data = json.load(f)
+        json_data = json_codec.load(self.address_book_path)
         for department, primary_members in json_data.items():
             for user in primary_members.get("primary_members", []):
                 members.append({
@@ -48,12 +50,45 @@ class SMCLabAddressBookParser(SMCLabBaseParser):
     def _fetch_attendance_id(self):
         """从 group_info.json 读取并返回 group_users_name_list 字段"""
         assert os.path.exists(self.group_info_path), f"group_info.json 文件不存在, 请先调用SMCLabAttendanceCrawler的get_group_info"
-        with open(self.group_info_path, "r", encoding="utf-8") as f:
-            group_info = json.load(f)
+        group_info = json_codec.load(self.group_info_path)
         group_users_id_list = group_info.get("group_users_id_list", [])
         self.logger.info("读取考勤组信息成功, 共 %d 个成员", len(group_users_id_list))
         return group_users_id_list
 
+    def _load_address_book_delta(self):
+        """读取 SMCLabAddressBookCrawler 生成的通讯录差分, 不存在时返回None"""
+        if not os.path.exists(self.address_book_delta_path):
+            return None
+        return json_codec.load(self.address_book_delta_path)
+
+    def _is_up_to_date(self) -> bool:
+        """
+        判断扩展信息表是否已经是最新的:
+        通讯录差分为空, 且基本信息表和考勤组信息都没有比扩展信息表更新
+        """
+        if not os.path.exists(self.output_path):
+            return False
+        delta = self._load_address_book_delta()
+        if delta is None:
+            return False
+        if delta.get("joined") or delta.get("left") or delta.get("changed"):
+            return False
+        output_mtime = os.path.getmtime(self.output_path)
+        for dependency in (self.excel_path, self.group_info_path, self.address_book_path):
+            if os.path.exists(dependency) and os.path.getmtime(dependency) > output_mtime:
+                return False
+        return True
+
+    def _log_delta_rows(self, delta: dict):
+        """只对发生变化的成员输出明细"""
+        if not delta or self.merged_df is None:
+            return
+        name_col = "姓名" if "姓名" in self.merged_df.columns else "姓名_JSON"
+        id_name = dict(zip(self.merged_df["飞书账号"], self.merged_df[name_col]))
+        for key, label in (("joined", "新加入"), ("left", "已离开"), ("changed", "信息变化")):
+            for open_id in delta.get(key, []):
+                self.logger.info("\t%s\t%s (%s)", label, id_name.get(open_id, ""), open_id)
+
     def merge_dataframe(self):
         """合并并标记冲突"""
         # 读多维表格的信息
@@ -61,7 +96,7 @@ class SMCLabAddressBookParser(SMCLabBaseParser):
         self.logger.info("读取SMCLab扩展信息成功, 共 %d 行", len(json_df))
         # 读通讯录的信息
         assert os.path.exists(self.excel_path), "请首先运行SMCLabMemberInfoParser, parse_all方法"
-        excel_df = pd.read_excel(self.excel_path)
+        excel_df = read_excel_cached(self.excel_path, self.logger)
         self.logger.info("读取SMCLab基本信息成功, 共 %d 行", len(excel_df))
         # 读需要打卡的人的信息
         group_users_id_list = self._fetch_attendance_id()
@@ -81,17 +116,13 @@ class SMCLabAddressBookParser(SMCLabBaseParser):
         self.logger.info("已将 %d 个需要打卡的人员的'需要考勤'字段设为1", 
                         merged_df[merged_df["user_id"].isin(group_users_id_list)].shape[0])
 
-        # 用 Excel 和 JSON 数据进行缺失值的相互填充以尽量补足姓名和培养类型
-        for idx, row in merged_df.iterrows():
-            if not pd.notna(row["姓名_JSON"]) and pd.notna(row["姓名_Excel"]):
-                merged_df.at[idx, "姓名_JSON"] = row["姓名_Excel"]
-            if not pd.notna(row["姓名_Excel"]) and pd.notna(row["姓名_JSON"]):
-                merged_df.at[idx, "姓名_Excel"] = row["姓名_JSON"]
-            if not pd.notna(row["培养类型_JSON"]) and pd.notna(row["培养类型_Excel"]):
-                merged_df.at[idx, "培养类型_JSON"] = row["培养类型_Excel"]
-            if not pd.notna(row["培养类型_Excel"]) and pd.notna(row["培养类型_JSON"]):
-                merged_df.at[idx, "培养类型_Excel"] = row["培养类型_JSON"]
-
+        # 用 Excel 和 JSON 数据进行缺失值的相互填充以尽量补足姓名和培养类型(按列整体填充)
+        for col in ["姓名", "培养类型"]:
+            col_excel = f"{col}_Excel"
+            col_json = f"{col}_JSON"
+            if col_excel in merged_df.columns and col_json in merged_df.columns:
+                merged_df[col_json] = merged_df[col_json].combine_first(merged_df[col_excel])
+                merged_df[col_excel] = merged_df[col_excel].combine_first(merged_df[col_json])
 
         conflict_cols = []
         # 对于姓名, 培养类型, 有冲突就记录, 没冲突就合并
@@ -99,8 +130,8 @@ class SMCLabAddressBookParser(SMCLabBaseParser):
             col_excel = f"{col}_Excel"
             col_json = f"{col}_JSON"
             if col_excel in merged_df.columns and col_json in merged_df.columns:
-
-                merged_df[f"{col}_冲突"] = merged_df[col_excel] != merged_df[col_json] 
+                # 两边都缺失不算冲突
+                merged_df[f"{col}_冲突"] = (merged_df[col_excel] != merged_df[col_json]) & merged_df[col_excel].notna()
 
                 if merged_df[f"{col}_冲突"].any():
                     self.logger.warning("********* %s 字段有冲突！请优先处理！ *********", col)
@@ -114,46 +145,44 @@ class SMCLabAddressBookParser(SMCLabBaseParser):
 
         self.merged_df = merged_df
         self.conflict_cols = conflict_cols
-        self.merged_df.to_excel(self.output_path, index=False)
+        self._save_with_conflict_marks()
         self.logger.info("合并完成，共 %d 行，其中 %d 个字段存在冲突", len(merged_df), len(conflict_cols))
 
+    def _save_with_conflict_marks(self):
+        """写出合并结果, 并在同一次写入中对冲突单元格标红加粗"""
+        merged_df = self.merged_df
+        # 样式：红字、加粗
+        conflict_font = Font(bold=True, color="B01E1C")
+        name_col = "姓名_Excel" if "姓名" in self.conflict_cols else "姓名"
+
+        with pd.ExcelWriter(self.output_path, engine="openpyxl") as writer:
+            merged_df.to_excel(writer, index=False)
+            ws = next(iter(writer.sheets.values()))
+            for col in self.conflict_cols:
+                excel_col = f"{col}_Excel"
+                json_col = f"{col}_JSON"
+                conflict_mask = merged_df[f"{col}_冲突"].to_numpy(dtype=bool)
+                excel_col_idx = merged_df.columns.get_loc(excel_col) + 1
+                json_col_idx = merged_df.columns.get_loc(json_col) + 1
+                # 只遍历冲突行, 第一行为表头
+                for row in np.flatnonzero(conflict_mask):
+                    ws.cell(int(row) + 2, excel_col_idx).font = conflict_font
+                    ws.cell(int(row) + 2, json_col_idx).font = conflict_font
+                conflicts = merged_df.loc[conflict_mask, [name_col, excel_col, json_col]]
+                for name, excel_value, json_value in conflicts.itertuples(index=False):
+                    self.logger.warning("\t%s\t的*%s*字段有冲突: %s vs. %s", name, col, excel_value, json_value)
+        self.logger.info("文件已保存：%s", self.output_path)
+        if self.conflict_cols:
+            self.logger.info("红色加粗部分表示Excel与JSON存在差异")
+
     def mark_info_in_excel(self, update: bool=True):
         """保存Excel并对冲突单元格标红加粗"""
+        if update and self._is_up_to_date():
+            self.logger.info("通讯录与基本信息均无变化, 跳过合并: %s", self.output_path)
+            return
         if not os.path.exists(self.output_path) or update:
+            # 合并与标红在同一次写入中完成
             self.merge_dataframe()
-
-        wb = load_workbook(self.output_path)
-        ws = wb.active
-
-        # 样式：红底、白字、加粗
-        conflict_font = Font(bold=True, color="B01E1C")
-
-        # 对冲突单元格进行标红加粗
-        for col in self.conflict_cols:
-            excel_col = f"{col}_Excel"
-            json_col = f"{col}_JSON"
-            conflict_flag = f"{col}_冲突"
-
-            if conflict_flag not in self.merged_df.columns:
-                continue
-
-            for idx, is_conflict in enumerate(self.merged_df[conflict_flag], start=2):  # 从第二行开始（第一行为表头）
-                if is_conflict:
-                    excel_col_idx = self.merged_df.columns.get_loc(excel_col) + 1
-                    json_col_idx = self.merged_df.columns.get_loc(json_col) + 1
-                    ws.cell(idx, excel_col_idx).font = conflict_font
-                    ws.cell(idx, json_col_idx).font = conflict_font
-                    if '姓名' not in self.conflict_cols:
-                        name_col_idx = self.merged_df.columns.get_loc('姓名') + 1
-                    else:
-                        name_col_idx = self.merged_df.columns.get_loc('姓名_Excel') + 1
-
-                    name = ws.cell(idx, name_col_idx).value
-                    self.logger.warning("\t%s\t的*%s*字段有冲突: %s vs. %s", name, col, ws.cell(idx, excel_col_idx).value, ws.cell(idx, json_col_idx).value)
-
-
-        wb.save(self.output_path)
-        self.logger.info("文件已保存：%s", self.output_path)
-        self.logger.info("红色加粗部分表示Excel与JSON存在差异")
-
-
+            self._log_delta_rows(self._load_address_book_delta())
+        else:
+            self.logger.info("文件已存在, 未更新: %s", self.output_path)
@@ -1,8 +1,9 @@
-import json, os, glob
+import os, glob, time
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterable, Optional, Tuple
 
 from ..utils import TimeParser
 from ..common.baseparser import SMCLabBaseParser
@@ -11,8 +12,34 @@ from ..config import Config
 
 from .schedule_parser import SMCLabScheduleParser
 from .excel_manager import SMCLabInfoManager
-from .seminar_manager import SMCLabSeminarManager
+from .seminar_calendar import SMCLabSeminarCalendar
 from .bitable_parser import SMCLabSeminarLeaveParser
+from .member_index import SMCLabMemberInterner, MemberSet
+from .availability_index import SMCLabAvailabilityIndex
+from .interval_index import SMCLabIntervalIndex
+from .bitable_records import AttendanceStatsRecord, MAX_WEEKS
+from .record_pipeline import iter_records
+from .presence_heatmap import SMCLabPresenceHeatmap
+from .status_matrix import SMCLabAttendanceMatrix, STATUS_LATE as DAY_LATE, STATUS_MISSING as DAY_MISSING
+from .flow_classifier import (SMCLabFlowColumns, classify_flows, attendance_status,
+                              STATUS_LATE, STATUS_LEFT_EARLY)
+from ..common import json_codec
+
+
+def _schedule_for_week(sem_path: str, week: int) -> Tuple[str, Optional[int]]:
+    """
+    返回 (课表文件, 周次): 周次在课表范围内时使用逐周课表,
+    否则(第1周的"上周"、超出课表周次的周)退回不分周次的课表, 只要某周有课即算有课
+    """
+    if 1 <= week <= MAX_WEEKS:
+        schedule_path = os.path.join(sem_path, "schedule_by_week.json")
+        if not os.path.exists(schedule_path):
+            SMCLabScheduleParser().make_schedule_by_week_json()
+        return schedule_path, week
+    schedule_path = os.path.join(sem_path, "schedule_by_slot.json")
+    if not os.path.exists(schedule_path):
+        SMCLabScheduleParser().make_schedule_by_slot_json()
+    return schedule_path, None
 
 class SMCLabDailyAttendanceParser(SMCLabBaseParser):
     def __init__(self, config: Config = None):
@@ -22,6 +49,7 @@ class SMCLabDailyAttendanceParser(SMCLabBaseParser):
         self.raw_data_path = config.da_raw_path
         # 要存在学期数据里的
         self.this_sem_path = os.path.join(config.sem_data_path, self._year_semester)
+        self.presence_min_stay = config.lp_min_stay_minutes * 60
 
     def _simplify_raw_data(self):
         """
@@ -38,32 +66,18 @@ class SMCLabDailyAttendanceParser(SMCLabBaseParser):
         raw_data_files = sorted(glob.glob(os.path.join(self.raw_data_path, f"*_daily_attendance_raw.json")))
         raw_data_file = raw_data_files[-1] # 因为只有一个
         assert os.path.exists(raw_data_file), f"请先下载元数据: {raw_data_file}"
-        with open(raw_data_file, "r", encoding="utf-8") as f:
-            raw = json.load(f)
 
         simplified_raw = []
 
         # === 遍历每个用户记录 ===
-        for record in raw.get("user_datas", []):
-            name = record.get("name")
-            user_id = record.get("user_id")
-
-            date = None
-            status = None
-
-            for d in record.get("datas", []):
-                if d.get("code") == "51201":
-                    date = d.get("value")
-                elif d.get("code") == "51503-1-1":
-                    status = d.get("value")
-
-            if name and date and status:
+        for record in iter_records(AttendanceStatsRecord, [raw_data_file]):
+            if record.name and record.date and record.status:
                 simplified_raw.append({
-                    "name": name,
-                    "user_id": user_id,
-                    "date": date,
-                    "weekday": TimeParser.get_weekday_iso(date),
-                    "status": status
+                    "name": record.name,
+                    "user_id": record.user_id,
+                    "date": record.date,
+                    "weekday": TimeParser.get_weekday_iso(record.date),
+                    "status": record.status
                 })
 
         # === 保存结果到文件 ===
@@ -96,13 +110,10 @@ class SMCLabDailyAttendanceParser(SMCLabBaseParser):
         根据课表, 把因为课表导致的缺勤/迟到标记为"上课"
         '''
         # === 读取课表 ===
-        schedule_path = os.path.join(self.this_sem_path, "schedule_by_period.json")
-        # assert os.path.exists(schedule_path), "请先下载课表, 并运行解析器里的make_schedule_by_slot_json函数"
-        if not os.path.exists(schedule_path):
-            schedule_parser = SMCLabScheduleParser()
-            schedule_parser.make_period_summary_json()
-        with open(schedule_path, "r", encoding="utf-8") as f:
-            schedule = json.load(f)
+        # 只看上周实际有课的情况(考虑周次范围和单双周), 上周超出课表周次时按不分周次的课表
+        schedule_path, week = _schedule_for_week(self.this_sem_path, self._this_week - 1)
+        interner = SMCLabMemberInterner.get(self._year_semester, self._sem_data_path)
+        availability = SMCLabAvailabilityIndex.from_file(schedule_path, interner, week=week)
 
         # === 遍历出勤数据并修改 ===
         for name, info in weekly_summary.items():
@@ -110,7 +121,7 @@ class SMCLabDailyAttendanceParser(SMCLabBaseParser):
                 if status != "正常":
                     weekday_cn = TimeParser.get_weekday_iso(date)
                     # 检查是否在“上午”课表中
-                    if weekday_cn and name in schedule.get(weekday_cn, {}).get("上午", []):
+                    if weekday_cn and availability.is_busy(name, weekday_cn, "上午"):
                         info["week"][date] = "上课"
 
         weekly_summary_with_mark = weekly_summary
@@ -186,6 +197,18 @@ class SMCLabDailyAttendanceParser(SMCLabBaseParser):
         last_week_attendance = self._generate_last_week_attendance(simplified_raw_data)
         last_week_attendance_with_mark = self._amend_class_absence(last_week_attendance)
 
+        # 追加到学期考勤矩阵, 本周的次数由矩阵的前缀和直接得到
+        matrix = SMCLabAttendanceMatrix.get(self._year_semester, self._sem_data_path)
+        matrix.add_week_summary(last_week_attendance_with_mark)
+        matrix.save()
+        week_dates = [date for info in last_week_attendance_with_mark.values() for date in info["week"]]
+        first_date, last_date = (min(week_dates), max(week_dates)) if week_dates else (None, None)
+        missing_counts = matrix.counts(DAY_MISSING, first_date, last_date)
+        late_counts = matrix.counts(DAY_LATE, first_date, last_date)
+        chronic = matrix.chronic_lateness()
+        if chronic:
+            self.logger.warning("近四周迟到/缺卡较多: %s", ", ".join(chronic))
+
         table_data = []
         
         for name, info in last_week_attendance_with_mark.items():
@@ -202,8 +225,8 @@ class SMCLabDailyAttendanceParser(SMCLabBaseParser):
                 row[weekday] = week_data[date]
             
             # 统计缺卡次数
-            row['缺卡次数'] = sum(1 for status in week_data.values() if status == '缺卡')
-            row['迟到次数'] = sum(1 for status in week_data.values() if status == '迟到')
+            row['缺卡次数'] = missing_counts.get(name, 0)
+            row['迟到次数'] = late_counts.get(name, 0)
             
             table_data.append(row)
         
@@ -215,6 +238,21 @@ class SMCLabDailyAttendanceParser(SMCLabBaseParser):
 
         if plot:
             self._plot_attendance(df_sorted)
+
+    def last_week_presence_heatmap(self) -> List[str]:
+        """增量统计打卡流水中的在场时间, 画出上周和本学期至今的实验室在场热力图"""
+        heatmap = SMCLabPresenceHeatmap.get(self._year_semester, self._sem_data_path,
+                                            self.raw_data_path, self.presence_min_stay)
+        name_and_id, _, _ = SMCLabInfoManager().map_fields("user_id", "姓名")
+        start = time.perf_counter()
+        changed = heatmap.update(name_and_id)
+        self.logger.info("在场统计更新了 %d 周, 用时 %.3fs", len(changed), time.perf_counter() - start)
+        last_week = self._this_week - 1
+        plot_paths = [path for path in (heatmap.render([last_week]), heatmap.render())
+                      if path]
+        for path in plot_paths:
+            self.logger.info("在场热力图已保存: %s", path)
+        return plot_paths
     
 
 class SMCLabSeminarAttendanceParser(SMCLabBaseParser):
@@ -230,17 +268,34 @@ class SMCLabSeminarAttendanceParser(SMCLabBaseParser):
         # Seminar 相关配置
         self.seminar_start_time = config.sa_seminar_start_time
         self.seminar_end_time = config.sa_seminar_end_time
+        self.late_grace = config.sa_late_grace_minutes * 60
+        self.early_leave = config.sa_early_leave_minutes * 60
+        self.sysu_schedule_path = config.sysu_schedule_path
+
+        # 排除名单 {"*": [每周都排除的人], "周次": [该周排除的人]}
+        self.exclusions_path = os.path.join(self.this_sem_path, "seminar_attendance_exclusions.json")
+        # 各周的考勤结果 {"周次": {...}}
+        self.dataset_path = os.path.join(self.this_sem_path, "seminar_attendance.json")
 
         self.name_and_id = None
-        self.seminar_weekday_map = None
+        self.seminar_calendar = None
+        self.expected_attendees = None
+        # 请假记录解析器, 在 _prepare_shared_state 中创建一次, 各周(线程)共用
+        self.leave_parser = None
+        self._config = config
+        # 打卡流水的分类结果 {周次: {姓名: 出勤状态}}
+        self._flow_status = {}
+        # 各周的课程时间索引 {周次: SMCLabIntervalIndex}, 在分发到线程之前构建
+        self._intervals = {}
+        # 学期内的成员id驻留表, 名单都以位集合的形式运算
+        self.interner = SMCLabMemberInterner.get(self._year_semester, self._sem_data_path)
 
     def _set_info_manager(self):
         info_manager = SMCLabInfoManager()
         self.name_and_id, _, _ = info_manager.map_fields("user_id","姓名")
 
-    def _set_seminar_manager(self):
-        seminar_manager = SMCLabSeminarManager()
-        self.seminar_weekday_map = seminar_manager.get_seminar_weekday_map()
+    def _set_seminar_calendar(self):
+        self.seminar_calendar = SMCLabSeminarCalendar.get(self._year_semester, self._sem_data_path)
 
     def _get_attendance_group_list(self):
         '''
@@ -249,16 +304,23 @@ class SMCLabSeminarAttendanceParser(SMCLabBaseParser):
         group_info_path = self.group_info_path
         if not self.name_and_id:
             self._set_info_manager()
-        with open(group_info_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_codec.load(group_info_path)
         ids = data.get("group_users_id_list", [])
-        self.expected_attendees = set([self.name_and_id[id] for id in ids])
+        self.expected_attendees = self.interner.to_set(self.name_and_id[id] for id in ids)
 
-    def _load_attendees_from_relay(self, week: int) -> set:
+    def _load_attendees_from_relay(self, week: int, interactive: bool = True) -> MemberSet:
         """
         加载txt文件中的人名集合
+        
+        Args:
+            week: 周数
+            interactive: 文件为空时是否等待手动填写; 为False时直接返回空集合(改用打卡流水)
         """
         file_path = os.path.join(self.raw_data_path, f"{self._year_semester}_Week{week}_seminar_attendance_relay.txt")
+        if not interactive:
+            if not os.path.exists(file_path) or os.path.getsize(file_path) <= 4:
+                self.logger.info("第%d周没有接龙记录: %s", week, file_path)
+                return self.interner.empty()
         # 检查文件是否存在，如果不存在则创建
         if not os.path.exists(file_path):
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -274,7 +336,7 @@ class SMCLabSeminarAttendanceParser(SMCLabBaseParser):
                 break                
         
         # 读取文件内容
-        attendees = set()
+        attendees = self.interner.empty()
         with open(file_path, 'r', encoding='utf-8') as f:
             for line in f:
                 line = line.strip()
@@ -287,7 +349,7 @@ class SMCLabSeminarAttendanceParser(SMCLabBaseParser):
                         attendees.add(name)
         return attendees
 
-    def _backdoor_delete_spec_names(self, not_attended_names: set):
+    def _backdoor_delete_spec_names(self, not_attended_names: MemberSet):
         """
         删除指定姓名的记录
         """
@@ -308,28 +370,34 @@ class SMCLabSeminarAttendanceParser(SMCLabBaseParser):
                 print(f"{user_input} 不在未出勤名单中")
         return not_attended_names
 
+    def _load_exclusions(self, week: int) -> MemberSet:
+        """
+        读取排除名单 seminar_attendance_exclusions.json (代替交互式排除)
+        
+        格式: {"*": ["每周都排除的人"], "5": ["只在第5周排除的人"]}
+        """
+        if not os.path.exists(self.exclusions_path):
+            return self.interner.empty()
+        data = json_codec.load(self.exclusions_path)
+        return self.interner.to_set(list(data.get("*", [])) + list(data.get(str(week), [])))
+
     def _amend_course_absence(self, 
-                              not_attended_names: set, 
-                              seminar_weekday: int):
+                              not_attended_names: MemberSet, 
+                              seminar_weekday: int,
+                              week: int):
         """
-        修正因为上课缺卡人员
+        修正因为上课缺卡人员: 只排除该周与组会时间窗(seminar_start_time ~ seminar_end_time)真正重叠的课
         """
-        schedule_path = os.path.join(self.this_sem_path, "schedule_by_period.json")
-        if not os.path.exists(schedule_path):
-            schedule_parser = SMCLabScheduleParser()
-            schedule_parser.make_period_summary_json()
-        with open(schedule_path, "r", encoding="utf-8") as f:
-            schedule = json.load(f)
+        intervals = self._intervals[week]
         # 做一下组会信息的对应
         weekday_str = TimeParser.get_weekday_iso(seminar_weekday) 
-        day_period = TimeParser.get_day_period(int(self.seminar_start_time)) # 如"上午"
-        class_absent_names = schedule[weekday_str][day_period]
-        self.logger.info(f"删去课程缺卡人员: {class_absent_names}")
-        not_attended_names -= set(class_absent_names)
+        class_absent_names = intervals.busy_members(weekday_str, self.seminar_start_time, self.seminar_end_time)
+        self.logger.info(f"删去课程缺卡人员: {class_absent_names.names()}")
+        not_attended_names -= class_absent_names
         return not_attended_names
 
     def _amend_leave_absence(self,
-                             not_attended_names: set,
+                             not_attended_names: MemberSet,
                              week: int):
         """
         从未出勤名单中排除请假人员
@@ -341,8 +409,9 @@ class SMCLabSeminarAttendanceParser(SMCLabBaseParser):
         Returns:
             tuple: (处理后的未出勤人员集合, 请假人员集合)
         """
-        leave_parser = SMCLabSeminarLeaveParser()
-        leave_names = set(leave_parser.get_leave_list(week))
+        if not self.leave_parser:
+            self.leave_parser = SMCLabSeminarLeaveParser(self._config)
+        leave_names = self.interner.to_set(self.leave_parser.get_leave_list(week))
         
         # 从未出勤名单中减去请假人员
         not_attended_names = not_attended_names - leave_names
@@ -350,89 +419,171 @@ class SMCLabSeminarAttendanceParser(SMCLabBaseParser):
         return not_attended_names, leave_names
 
 
-    def _get_attended_names_byweek(self, 
-                                   week: int = None,
-                                   use_relay: bool = True,
-                                   backdoor_delete: bool = False):
+    def _prepare_shared_state(self, weeks: Iterable[int] = ()):
         """
-        获取指定周所有考勤文件中出现的人员姓名列表（去重）
+        加载各周共用的数据(成员映射、组会日历、应参会名单、请假记录解析器),
+        并在分发到线程之前依次准备各周的课表(缺失时生成)和课程时间索引
         """
-        # 筛选指定周的考勤文件
-        if week is None:
-            week = self._this_week
         if not self.name_and_id:
             self._set_info_manager()
-        if not self.seminar_weekday_map:
-            self._set_seminar_manager()
-        seminar_weekday = self.seminar_weekday_map.get(str(week), None)
+        if not self.leave_parser:
+            self.leave_parser = SMCLabSeminarLeaveParser(self._config)
+        if not self.seminar_calendar:
+            self._set_seminar_calendar()
+        self._get_attendance_group_list()
+        for week in weeks:
+            schedule_path, schedule_week = _schedule_for_week(self.this_sem_path, week)
+            self._intervals[week] = SMCLabIntervalIndex.from_file(schedule_path, self.sysu_schedule_path,
+                                                                  self.interner, week=schedule_week)
+
+    def _flow_files(self, week: int) -> List[str]:
+        """某一周已下载的组会打卡流水文件"""
+        return sorted(glob.glob(os.path.join(self.raw_data_path, f"{self._year_semester}_Week{week}_seminar_attendance_raw*.json")))
+
+    def _classify_weeks(self, weeks: Iterable[int]):
+        """
+        把多周的打卡流水读成列式数组, 一次性向量化分类为 准时/迟到/早退
+        """
+        weeks = list(weeks)
+        file_list = []
+        week_start, week_end = {}, {}
+        for week in weeks:
+            self._flow_status[week] = {}
+            file_list.extend(self._flow_files(week))
+            seminar_weekday = self.seminar_calendar.weekday_of(week)
+            if seminar_weekday:
+                seminar_date = TimeParser.get_week_date(weekday=seminar_weekday, week=week)
+                start, end = TimeParser.get_sec_level_timestamps(seminar_date,
+                                                                start_time=str(self.seminar_start_time),
+                                                                end_time=str(self.seminar_end_time))
+                week_start[week], week_end[week] = int(start), int(end)
+        if not file_list:
+            return
+        try:
+            flows = SMCLabFlowColumns.from_files(file_list)
+        except (json_codec.JSONDecodeError, FileNotFoundError) as e:
+            self.logger.error("读取打卡流水时出错: %s", e)
+            return
+        labels = classify_flows(flows, week_start, week_end, self.late_grace, self.early_leave)
+        statuses = attendance_status(flows, labels, self.late_grace)
+        for week, by_user in statuses.items():
+            self._flow_status[week] = {self.name_and_id[user_id]: status
+                                       for user_id, status in by_user.items()
+                                       if self.name_and_id.get(user_id)}
+        self.logger.info("已分类 %d 条打卡流水(%d 周)", len(flows), len(weeks))
+
+    def _load_flow_attendees(self, week: int) -> MemberSet:
+        """通过打卡流水得到出勤人员(时间窗内有有效打卡即算出勤)"""
+        if week not in self._flow_status:
+            self._classify_weeks([week])
+        return self.interner.to_set(self._flow_status[week])
+
+    def _compute_week_attendance(self,
+                                 week: int,
+                                 use_relay: bool = True,
+                                 interactive: bool = True,
+                                 backdoor_delete: bool = False) -> dict:
+        """
+        计算某一周的组会考勤(调用前需先用包含该周的周次列表调用 _prepare_shared_state)
+        
+        Returns:
+            dict: {"week", "weekday", "source", "attended", "not_attended", "leave", "course_absent", "excluded",
+                   "late", "left_early"},
+                  没有组会时 weekday 为None, 名单均为空;
+                  有组会但既没有接龙也没有打卡流水时 source 为None, 名单均为空
+        """
+        result = {"week": week, "weekday": None, "source": None, "attended": [],
+                  "not_attended": [], "leave": [], "course_absent": [], "excluded": [],
+                  "late": [], "left_early": []}
+        seminar_weekday = self.seminar_calendar.weekday_of(week)
         if not seminar_weekday:
             self.logger.info(f"第{week}周没有组会")
+            return result
+
+        attended_names = self.interner.empty()
+        source = None
+        if use_relay:
+            # 通过群里的接龙结果输出出勤
+            attended_names = self._load_attendees_from_relay(week, interactive)
+            if attended_names:
+                source = "relay"
+        if not attended_names and self._flow_files(week):
+            # 通过打卡流水输出出勤
+            attended_names = self._load_flow_attendees(week)
+            source = "flow"
+        if source is None:
+            # 既没有接龙也没有打卡流水时不能判定为全员缺席
+            self.logger.warning(f"第{week}周没有接龙和打卡流水, 无法统计考勤")
+            result.update(weekday=seminar_weekday)
+            return result
+        not_attended_names = self.expected_attendees - attended_names
+
+        # 根据上课情况进行自动排除
+        before_course = not_attended_names.copy()
+        not_attended_names = self._amend_course_absence(not_attended_names, seminar_weekday, week)
+        course_absent = before_course - not_attended_names
+
+        # 根据请假排除未出勤人员
+        not_attended_names, leave_names = self._amend_leave_absence(not_attended_names, week)
+        if leave_names:
+            self.logger.info("已排除请假人员 %d 人：%s", len(leave_names), ", ".join(sorted(leave_names)))
+
+        # 根据排除名单文件排除
+        excluded = not_attended_names & self._load_exclusions(week)
+        if excluded:
+            self.logger.info("已按排除名单排除 %d 人：%s", len(excluded), ", ".join(excluded.names()))
+            not_attended_names = not_attended_names - excluded
+
+        # 打印未出勤人员名单
+        self.logger.info("=== 第%d周未出勤人员名单 ===", week)
+        if not_attended_names:
+            self.logger.info("共有 %d 人未出勤：", len(not_attended_names))
+            for i, name in enumerate(sorted(not_attended_names), 1):
+                self.logger.info("%d. %s", i, name)
+        else:
+            self.logger.info("所有人员均已出勤")
+
+        if backdoor_delete:
+            before_backdoor = not_attended_names.copy()
+            not_attended_names = self._backdoor_delete_spec_names(not_attended_names)
+            excluded = excluded | (before_backdoor - not_attended_names)
+
+        flow_status = self._flow_status.get(week, {})
+        result.update(
+            late=sorted(name for name, status in flow_status.items() if status == STATUS_LATE),
+            left_early=sorted(name for name, status in flow_status.items() if status == STATUS_LEFT_EARLY),
+        )
+        result.update(
+            weekday=seminar_weekday,
+            source=source,
+            attended=attended_names.names(),
+            not_attended=not_attended_names.names(),
+            leave=leave_names.names(),
+            course_absent=course_absent.names(),
+            excluded=excluded.names(),
+        )
+        return result
+
+    def _write_week_summary(self, result: dict):
+        """写出 SMCLab第N周组会考勤统计.txt (第一行出勤, 第二行未出勤)"""
+        week = result["week"]
+        if not result["weekday"]:
             attended_str = "(本周无组会)"
             not_attended_str = "(本周无组会)"
+        elif result["source"] is None:
+            # 没有数据的周不覆盖已有的统计
+            return
         else:
-            pass
-            raw_data_files = sorted(glob.glob(os.path.join(self.raw_data_path, f"{self._year_semester}_Week{week}*seminar_attendance_raw*.json"), recursive=True))
-
-            # 使用集合来去重
-            attended_names = set()
-            self._get_attendance_group_list()
-
-            not_attended_names = self.expected_attendees
-            if use_relay:
-                # 通过群里的接龙结果输出出勤
-                attended_names = self._load_attendees_from_relay(week)
-                not_attended_names -= attended_names
-            if not use_relay or (use_relay and not attended_names):
-                # 通过打卡流水输出出勤
-                for file_path in raw_data_files:
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                        # 提取所有user_id
-                        user_flow_results = data.get("user_flow_results", [])
-                        for record in user_flow_results:
-                            user_id = record.get("user_id", None)
-                            type_attendance = record.get("type")
-                            if user_id and user_id in self.name_and_id:
-                                name = self.name_and_id[user_id]
-                                if name and (type_attendance==0 or type_attendance==6):  # 确保姓名不为空
-                                    attended_names.add(name)
-                                    not_attended_names.discard(name)
-                    except (json.JSONDecodeError, KeyError, FileNotFoundError) as e:
-                        self.logger.error("处理文件 %s 时出错: %s", file_path, e)
-                        continue
-
-            # 根据上课情况进行自动排除
-            not_attended_names = self._amend_course_absence(not_attended_names, seminar_weekday)
-
-            # 根据请假排除未出勤人员
-            not_attended_names, leave_names = self._amend_leave_absence(not_attended_names, week)
-            if leave_names:
-                self.logger.info("已排除请假人员 %d 人：%s", len(leave_names), ", ".join(sorted(leave_names)))
-
-            # 打印未出勤人员名单
-            self.logger.info("=== 未出勤人员名单 ===")
-            if not_attended_names:
-                self.logger.info("共有 %d 人未出勤：", len(not_attended_names))
-                for i, name in enumerate(sorted(not_attended_names), 1):
-                    self.logger.info("%d. %s", i, name)
-            else:
-                self.logger.info("所有人员均已出勤")
-            
-            if backdoor_delete:
-                not_attended_names = self._backdoor_delete_spec_names(not_attended_names)
-            
-            # 保存到文件
-            attended_names_list = sorted(list(attended_names))
-            not_attended_names_list = sorted(list(not_attended_names))
-            leave_names_list = sorted(list(leave_names))
+            attended_names_list = result["attended"]
+            not_attended_names_list = result["not_attended"]
+            leave_names_list = result["leave"]
             attended_str = ", ".join(attended_names_list) if len(attended_names_list) else "本周未收集到同学们的打卡流水"
             not_attended_str = ", ".join(not_attended_names_list) if len(not_attended_names_list) else "本周打卡流水全齐"
             leave_str = ", ".join(leave_names_list) if len(attended_names_list) else "本周无人请假"
             leave_str = f" (请假: {leave_str})"
             attended_str += leave_str
-            self.logger.info("组会出勤: %s", attended_names)
-            self.logger.info("组会未出勤: %s", not_attended_names)
+            self.logger.info("组会出勤: %s", attended_names_list)
+            self.logger.info("组会未出勤: %s", not_attended_names_list)
 
         sem_week_path = os.path.join(self.this_sem_path, f"week{week}")
         output_path = os.path.join(sem_week_path, f"SMCLab第{week}周组会考勤统计.txt")
@@ -441,7 +592,84 @@ class SMCLabSeminarAttendanceParser(SMCLabBaseParser):
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(f"{attended_str}\n")  # 第一行：出现的姓名
             f.write(f"{not_attended_str}")  # 第二行：未出现的姓名
-        # 转换为列表并按字母排序返回
+
+    def _save_dataset(self, results: Dict[int, dict]):
+        """
+        把各周结果合并写入 seminar_attendance.json
+
+        有组会但没有数据(source为None)的周会跳过, 不覆盖已经保存的结果
+        """
+        results = {week: result for week, result in results.items()
+                   if not result["weekday"] or result["source"] is not None}
+        if not results:
+            return
+        dataset = {}
+        if os.path.exists(self.dataset_path):
+            dataset = json_codec.load(self.dataset_path)
+        for week, result in results.items():
+            dataset[str(week)] = result
+        dataset = dict(sorted(dataset.items(), key=lambda item: int(item[0])))
+        os.makedirs(self.this_sem_path, exist_ok=True)
+        tmp_path = self.dataset_path + ".tmp"
+        json_codec.dump(dataset, tmp_path)
+        os.replace(tmp_path, self.dataset_path)
+        self.logger.info("组会考勤结果已保存到: %s", self.dataset_path)
+
+    def _get_attended_names_byweek(self, 
+                                   week: int = None,
+                                   use_relay: bool = True,
+                                   backdoor_delete: bool = False):
+        """
+        获取指定周所有考勤文件中出现的人员姓名列表（去重）
+        """
+        if week is None:
+            week = self._this_week
+        self._prepare_shared_state([week])
+        self._classify_weeks([week])
+        result = self._compute_week_attendance(week, use_relay, True, backdoor_delete)
+        # 保存到文件
+        self.interner.save()
+        self._write_week_summary(result)
+        self._save_dataset({week: result})
+        return result
+
+    def get_attendance_for_weeks(self,
+                                 weeks: Iterable[int],
+                                 use_relay: bool = True,
+                                 workers: int = None,
+                                 write_summary: bool = True) -> Dict[int, dict]:
+        """
+        非交互地批量计算多周的组会考勤(可用于补算历史周次和服务器定时任务)
+        
+        接龙只读取已有的txt文件(没有时使用打卡流水), 排除名单来自 seminar_attendance_exclusions.json,
+        结果合并写入 seminar_attendance.json
+        
+        Args:
+            weeks: 周次列表(小于1的周次会被忽略)
+            use_relay: 是否优先使用接龙结果
+            workers: 并行线程数, None 表示每周一个线程(不超过CPU数)
+            write_summary: 是否同时写出每周的考勤统计txt
+            
+        Returns:
+            dict: {周次: 该周结果}
+        """
+        weeks = sorted(w for w in set(weeks) if w >= 1)
+        if not weeks:
+            return {}
+        self._prepare_shared_state(weeks)
+        # 所有周的流水一次性读入并分类
+        self._classify_weeks(weeks)
+        if workers is None:
+            workers = min(len(weeks), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            computed = executor.map(lambda w: self._compute_week_attendance(w, use_relay, False), weeks)
+            results = dict(zip(weeks, computed))
+        self.interner.save()
+        if write_summary:
+            for result in results.values():
+                self._write_week_summary(result)
+        self._save_dataset(results)
+        return results
 
     def get_last_week_attended_names(self, 
                                      use_relay: bool = False, 
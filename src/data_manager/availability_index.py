@@ -0,0 +1,144 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from .member_index import SMCLabMemberInterner, MemberSet
+from ..common import json_codec
+
+
+class SMCLabAvailabilityIndex:
+    """
+    课表的位图索引
+
+    - 每个时段(星期, 节段)一个 MemberSet: 该时段有课的成员
+    - 每个成员一个整数位图: 第k位为1表示第k个时段有课
+    节段可以是 "上午-第1节" 这样的具体课时, 也可以是 "上午" 这样的半天;
+    按半天查询具体课时索引时, 取该半天内所有课时的并集。
+    """
+    # 缓存: 课表文件 -> (文件签名, 索引)
+    _file_cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, interner: SMCLabMemberInterner, slot_keys: List[Tuple[str, str]]):
+        self.interner = interner
+        # 时段列表, 下标即位图中的位置
+        self.slot_keys = list(slot_keys)
+        self._slot_pos = {key: k for k, key in enumerate(self.slot_keys)}
+        self._full = (1 << len(self.slot_keys)) - 1
+        # 时段 -> 有课成员位图
+        self._slot_members = [0] * len(self.slot_keys)
+        # 成员id -> 有课时段位图
+        self._person_slots: Dict[int, int] = {}
+        # (星期, 节段或半天) -> 时段位图
+        self._masks: Dict[Tuple[str, str], int] = {}
+
+    @classmethod
+    def from_schedule(cls, schedule: Dict[str, Dict[str, Iterable[str]]],
+                      interner: SMCLabMemberInterner) -> "SMCLabAvailabilityIndex":
+        """
+        由 {星期: {节段: [姓名, ...]}} 构建索引,
+        schedule_by_slot.json 和 schedule_by_period.json 的格式都适用
+        """
+        slot_keys = [(day, slot) for day, slots in schedule.items() for slot in slots]
+        index = cls(interner, slot_keys)
+        for k, (day, slot) in enumerate(slot_keys):
+            members = interner.to_set(schedule[day][slot]).bits
+            index._slot_members[k] = members
+            for member_id in MemberSet(interner, members).ids():
+                index._person_slots[member_id] = index._person_slots.get(member_id, 0) | (1 << k)
+        return index
+
+    @classmethod
+    def from_file(cls, schedule_path: str,
+                  interner: SMCLabMemberInterner,
+                  week: int = None) -> "SMCLabAvailabilityIndex":
+        """
+        读取课表JSON并构建索引, 文件不变时复用同一个索引
+
+        Args:
+            schedule_path: 课表JSON; 指定 week 时为 schedule_by_week.json
+            interner: 学期成员驻留表
+            week: 周次, 只取该周的课表
+        """
+        stat = os.stat(schedule_path)
+        key = (os.path.abspath(schedule_path), id(interner), week)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with cls._lock:
+            cached = cls._file_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        schedule = json_codec.load(schedule_path)
+        if week is not None:
+            schedule = schedule.get(str(week), {})
+        index = cls.from_schedule(schedule, interner)
+        with cls._lock:
+            cls._file_cache[key] = (signature, index)
+        return index
+
+    def _mask(self, day: str, slot: str) -> int:
+        """(星期, 节段或半天) 对应的时段位图, 不存在时为0"""
+        key = (day, slot)
+        mask = self._masks.get(key)
+        if mask is None:
+            pos = self._slot_pos.get(key)
+            if pos is not None:
+                mask = 1 << pos
+            else:
+                prefix = f"{slot}-"
+                mask = 0
+                for k, (d, s) in enumerate(self.slot_keys):
+                    if d == day and s.startswith(prefix):
+                        mask |= 1 << k
+            self._masks[key] = mask
+        return mask
+
+    def _person_mask(self, names: Iterable[str]) -> int:
+        """一组成员有课时段的并集"""
+        mask = 0
+        for name in names:
+            member_id = self.interner.id_of(name)
+            if member_id is not None:
+                mask |= self._person_slots.get(member_id, 0)
+        return mask
+
+    def busy_members(self, day: str, slot: str) -> MemberSet:
+        """某时段有课的成员"""
+        mask = self._mask(day, slot)
+        bits = 0
+        while mask:
+            lowest = mask & -mask
+            bits |= self._slot_members[lowest.bit_length() - 1]
+            mask ^= lowest
+        return MemberSet(self.interner, bits)
+
+    def is_busy(self, name: str, day: str, slot: str) -> bool:
+        """某人在某时段是否有课"""
+        return bool(self._person_mask([name]) & self._mask(day, slot))
+
+    def free_slots(self, names: Iterable[str]) -> List[Tuple[str, str]]:
+        """一组成员共同的空闲时段"""
+        free = self._full & ~self._person_mask(names)
+        return [self.slot_keys[k] for k in range(len(self.slot_keys)) if free >> k & 1]
+
+    def best_slots(self, names: Iterable[str], min_free: int = 1,
+                   top_k: int = None) -> List[Tuple[Tuple[str, str], MemberSet]]:
+        """
+        按空闲人数从多到少排列时段
+
+        Args:
+            names: 成员姓名
+            min_free: 至少需要多少人空闲
+            top_k: 最多返回多少个时段, None 表示全部
+
+        Returns:
+            list: [((星期, 节段), 空闲成员), ...]
+        """
+        group = self.interner.to_set(names).bits
+        result = []
+        for k, slot_key in enumerate(self.slot_keys):
+            free = group & ~self._slot_members[k]
+            if free.bit_count() >= min_free:
+                result.append((slot_key, MemberSet(self.interner, free)))
+        # 空闲人数相同时保持课表中的时段顺序
+        result.sort(key=lambda item: -len(item[1]))
+        return result if top_k is None else result[:top_k]
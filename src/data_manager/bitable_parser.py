@@ -1,8 +1,7 @@
-import json
 import os
 from glob import glob
-from openpyxl import Workbook
 import re
+from typing import List
 from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
 
 from src.utils import TimeParser
@@ -10,8 +9,21 @@ from src.utils import TimeParser
 from ..common.baseparser import SMCLabBaseParser
 from ..config import Config
 from .excel_manager import SMCLabInfoManager
+from .member_index import SMCLabMemberInterner
+from .bitable_records import (
+    get_nested,
+    SMCLabRecordStore,
+    SeminarRecord,
+    LeaveRecord,
+    WeeklyReportRecord,
+)
+from .record_pipeline import iter_records, map_records, run_pipeline, ExcelSink
+from ..common import json_codec
 
 class SMCLabBitableParser(SMCLabBaseParser):
+    # 原始页面文件名的匹配模式, 由子类指定
+    RAW_FILE_PATTERN = None
+
     def __init__(self, config: Config=None):
         if config is None:
             config = Config()
@@ -24,20 +36,22 @@ class SMCLabBitableParser(SMCLabBaseParser):
 
     def _load_json(self, file_path):
         """读取单个 JSON 文件"""
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return json_codec.load(file_path)
 
     def _get_nested(self, data_dict, keys):
         """安全地提取嵌套字段"""
-        try:
-            value = data_dict
-            for k in keys:
-                value = value[k]
-            return value
-        except (KeyError, IndexError, TypeError):
-            return ""
+        return get_nested(data_dict, keys)
+
+    def _get_raw_file_list(self) -> List[str]:
+        """raw_data_path 下匹配 RAW_FILE_PATTERN 的原始页面文件(按文件名排序)"""
+        file_list = sorted(glob(os.path.join(self.raw_data_path, self.RAW_FILE_PATTERN)))
+        if not file_list:
+            raise FileNotFoundError(f"未在 {self.raw_data_path} 中找到任何 {self.RAW_FILE_PATTERN} 文件")
+        return file_list
 
 class SMCLabInfoParser(SMCLabBitableParser):
+    RAW_FILE_PATTERN = "*seminar_raw*.json"
+
     def __init__(self, config: Config = None):
         if config is None:
             config = Config()
@@ -46,49 +60,20 @@ class SMCLabInfoParser(SMCLabBitableParser):
         self.raw_data_path = config.seminar.raw_path
         self.info_base_path = config.info_base_path
 
-    def _get_info_from_raw_data(self):
-        all_records = []
-        file_list = sorted(glob(os.path.join(self.raw_data_path, "*seminar_raw*.json")))
-        if not file_list:
-            raise FileNotFoundError(f"未在 {self.raw_data_path} 中找到任何 seminar*.json 文件")
-        for file in file_list:
-            data = self._load_json(file)
-            for item in data.get("items", []):
-                fields = item.get("fields", {})
-                record = {
-                    "姓名": self._get_nested(fields, ["姓名", 0, "text"]),
-                    "年级": fields.get("年级", ""),
-                    "导师": fields.get("导师", ""),
-                    "培养类型": fields.get("培养类型", ""),
-                    "在读情况": fields.get("_在读情况", ""),
-                    "飞书账号": self._get_nested(fields, ["_飞书账号", 0, "id"]),
-                    "学号": fields.get("_学号", ""),
-                }
-                all_records.append(record)
-        self.logger.info("共读取 %d 条记录，来自 %d 个 JSON 文件。", len(all_records), len(file_list))
-        return all_records
-
     def save_info_to_excel(self, output_path: str = None):
-        """将所有记录保存为 Excel 文件"""
+        """将所有记录逐页流式保存为 Excel 文件"""
         if not output_path:
             output_path = self.info_base_path
-        records = self._get_info_from_raw_data()
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "SMCLab成员信息"
-
+        file_list = self._get_raw_file_list()
         headers = ["姓名", "年级", "导师", "培养类型", "在读情况", "飞书账号", "学号"]
-        ws.append(headers)
-
-        for record in records:
-            ws.append([record[h] for h in headers])
-
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        wb.save(output_path)
+        count = run_pipeline(iter_records(SeminarRecord, file_list, workers=self._parse_workers),
+                             [ExcelSink(output_path, headers, title="SMCLab成员信息")])
+        self.logger.info("共读取 %d 条记录，来自 %d 个 JSON 文件。", count, len(file_list))
         self.logger.info("成员信息文件已保存到：%s", output_path)
 
 class SMCLabSeminarParser(SMCLabBitableParser):
+    RAW_FILE_PATTERN = "*seminar_raw*.json"
+
     def __init__(self, config: Config = None):
         if config is None:
             config = Config()
@@ -106,50 +91,17 @@ class SMCLabSeminarParser(SMCLabBitableParser):
         Returns:
             str: 所有文本用空格拼接后的字符串
         """
-        if not text_chunks or not isinstance(text_chunks, list):
-            return ""
-        
-        texts = []
-        for chunk in text_chunks:
-            if isinstance(chunk, dict) and "text" in chunk:
-                text = chunk.get("text", "").strip()
-                if text:
-                    texts.append(text)
-        
-        return " ".join(texts)
+        return SeminarRecord._join_text_chunks(text_chunks)
 
-    def _get_info_from_raw_data(self):
-        all_records = []
-        file_list = sorted(glob(os.path.join(self.raw_data_path, "*seminar_raw*.json")))
-        if not file_list:
-            raise FileNotFoundError(f"未在 {self.raw_data_path} 中找到任何 seminar*.json 文件")
-        for file in file_list:
-            data = self._load_json(file)
-            for item in data.get("items", []):
-                fields = item.get("fields", {})
-                last_seminar_date = fields.get("上次讲组会时间", None)
-                next_seminar_date = fields.get("近期预期", None)
-                if last_seminar_date:
-                    last_seminar_date = TimeParser.timestamp_ms_to_date_int(last_seminar_date)
-                if next_seminar_date:
-                    next_seminar_date = TimeParser.timestamp_ms_to_date_int(next_seminar_date)
-
-                record = {
-                    "姓名": self._get_nested(fields, ["姓名", 0, "text"]),
-                    "上次讲组会时间": last_seminar_date,
-                    "近期预期": next_seminar_date,
-                    "是否确认": fields.get("是否确认", ""),
-                    "会议室": fields.get("_会议室", ""),
-                    "顺序": fields.get("_Track", None),
-                    "分享主题": self._get_nested(fields, ["分享主题", 0, "text"]),
-                    "摘要": self._get_all_text_chunk(fields.get("摘要", []))
-                }
-                all_records.append(record)
+    def _get_info_from_raw_data(self) -> List[SeminarRecord]:
+        # 组会管理器和轮值排班读取同一批页面, 经过记录缓存只解码一次
+        file_list = self._get_raw_file_list()
+        all_records = SMCLabRecordStore.load(SeminarRecord, file_list, workers=self._parse_workers)
         self.logger.info("共读取 %d 条记录，来自 %d 个 JSON 文件。", len(all_records), len(file_list))
         return all_records
 
     def save_info_to_excel(self, output_path: str = None):
-        """将所有记录保存为 Excel 文件"""
+        """将所有记录逐页流式保存为 Excel 文件"""
         def clean_for_excel(value):
             """清理字符串中的非法字符，使其可以写入 Excel"""
             if not isinstance(value, str):
@@ -158,21 +110,12 @@ class SMCLabSeminarParser(SMCLabBitableParser):
             return ILLEGAL_CHARACTERS_RE.sub('', value)
         if not output_path:
             output_path = os.path.join(self.this_sem_path, "seminar_information.xlsx")
-        records = self._get_info_from_raw_data()
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "组会信息"
-
+        file_list = self._get_raw_file_list()
         headers = ["姓名", "上次讲组会时间", "近期预期", "是否确认", "会议室", "顺序", "分享主题", "摘要"]
-        ws.append(headers)
-
-        for record in records:
-            cleaned_record = {k: clean_for_excel(v) for k, v in record.items()}
-            ws.append([cleaned_record[h] for h in headers])
-
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        wb.save(output_path)
+        rows = map_records(lambda record: [clean_for_excel(v) for v in record.to_row(headers)],
+                           iter_records(SeminarRecord, file_list, workers=self._parse_workers))
+        count = run_pipeline(rows, [ExcelSink(output_path, headers, title="组会信息", row_func=list)])
+        self.logger.info("共读取 %d 条记录，来自 %d 个 JSON 文件。", count, len(file_list))
         self.logger.info("组会信息已保存到：%s", output_path)
 
 class SMCLabSeminarLeaveParser(SMCLabBitableParser):
@@ -199,15 +142,8 @@ class SMCLabSeminarLeaveParser(SMCLabBitableParser):
         if not file_list:
             return []
         
-        name_list = []
-        for file in file_list:
-            data = self._load_json(file)
-            for item in data.get("items", []):
-                fields = item.get("fields", {})
-                # 从请假人字段中提取名字
-                name = self._get_nested(fields, ["请假人", 0, "name"])
-                if name:  # 只添加非空的名字
-                    name_list.append(name)
+        # 只添加非空的名字
+        name_list = [record.name for record in SMCLabRecordStore.load(LeaveRecord, file_list, workers=self._parse_workers) if record.name]
         
         self.logger.info(
             "共读取 %d 个请假人名字，来自 %d 个 JSON 文件。", 
@@ -241,14 +177,19 @@ class SMCLabWeeklyReportParser(SMCLabBitableParser):
         id_name_pair, _, _ = self.info_manager.map_fields("user_id", "姓名")
         if not update and os.path.exists(group_info_path):
             self.logger.info("找到已有考勤组信息!")
-            with open(group_info_path, "r", encoding="utf-8") as f:
-                group_info = json.load(f)
+            group_info = json_codec.load(group_info_path)
             group_users_id_list = group_info.get("group_users_id_list", [])
             group_users_name_list = [id_name_pair[id] for id in group_users_id_list]
         else:
             raise RuntimeError("请先调用SMCLabAttendanceCrawler._get_group_list_user")
         return group_users_name_list
 
+    def _iter_raw_data(self):
+        """逐页流式读取原始上周周报记录"""
+        self.weekly_file_list = sorted(glob(os.path.join(self.raw_data_path, "*weekly_report_byweek_raw*.json")))
+        assert len(self.weekly_file_list)!=0, f"请先下载上周的周报元数据"
+        return iter_records(WeeklyReportRecord, self.weekly_file_list, workers=self._parse_workers)
+
     def _simplify_raw_data(self):
         """
         读取原始上周周报文件并提取核心字段：
@@ -259,21 +200,7 @@ class SMCLabWeeklyReportParser(SMCLabBitableParser):
         - file_name
         :return: 提取后的简化数据列表
         """
-        self.weekly_file_list = sorted(glob(os.path.join(self.raw_data_path, "*weekly_report_byweek_raw*.json")))
-        assert len(self.weekly_file_list)!=0, f"请先下载上周的周报元数据"
-        simplified_raw = []
-        for file in self.weekly_file_list:
-            data = self._load_json(file)
-            for item in data.get("items", []):
-                fields = item.get("fields", {})
-                record = {
-                    "姓名": self._get_nested(fields, ["汇报人", 0, "name"]),
-                    "飞书账号": self._get_nested(fields, ["汇报人", 0, "id"]),
-                    "文档链接": self._get_nested(fields, ["文档链接", 0, "link"]),
-                    "file_token": self._get_nested(fields, ["附件", 0, "file_token"]),
-                    "file_name": self._get_nested(fields, ["附件", 0, "name"]),
-                }
-                simplified_raw.append(record)
+        simplified_raw = list(self._iter_raw_data())
         self.logger.info("共读取 %d 条记录，来自 %d 个 JSON 文件。", len(simplified_raw), len(self.weekly_file_list))
         return simplified_raw
     
@@ -282,37 +209,29 @@ class SMCLabWeeklyReportParser(SMCLabBitableParser):
         检查总人员姓名列表中哪些出现在simplified_raw中, 哪些没有出现
         
         Args:
-            simplified_raw: list of dict, 每个字典包含"姓名"等键
+            simplified_raw: WeeklyReportRecord 的可迭代对象(可以是生成器, 只遍历一次)
             group_users_name_list: list of str, 总人员姓名列表
         
         Returns:
             tuple: (出现在simplified_raw中的姓名列表, 没有出现的姓名列表, 额外的人)
         """
-        # 从simplified_raw中提取所有姓名
-        raw_names = set()
-        for item in simplified_raw:
-            if "姓名" in item and item["姓名"]:  # 确保姓名键存在且不为空
-                raw_names.add(item["姓名"])
-        
-        # 找出出现和没有出现的姓名
-        appeared_names = []
-        not_appeared_names = []
-        
-        for name in group_users_name_list:
-            if name in raw_names:
-                appeared_names.append(name)
-                raw_names.remove(name)
-            else:
-                not_appeared_names.append(name)
-        
-        extra_in_raw = list(raw_names)
+        interner = SMCLabMemberInterner.get(self._year_semester, self._sem_data_path)
+        # 从simplified_raw中提取所有姓名, 以位集合表示
+        raw_names = interner.to_set(item.name for item in simplified_raw)
+        group_names = interner.to_set(group_users_name_list)
+
+        # 找出出现和没有出现的姓名(按总人员名单的顺序输出)
+        appeared = group_names & raw_names
+        appeared_names = [name for name in group_users_name_list if name in appeared]
+        not_appeared_names = [name for name in group_users_name_list if name not in appeared]
+        extra_in_raw = list(raw_names - group_names)
 
         return appeared_names, not_appeared_names, extra_in_raw
             
     def last_week_weekly_report_to_txt(self):
         """把上周的周报存为txt"""
-        simplified_raw_data = self._simplify_raw_data()
         group_users_name_list = self._get_group_info()
+        simplified_raw_data = self._iter_raw_data()
         appeared_names, not_appeared_names, extra_in_raw = self._check_name_occurrence(simplified_raw_data, group_users_name_list)
         # 将列表转换为逗号分隔的字符串
         extra_in_str = "," + ", ".join(extra_in_raw) if len(appeared_names) else ""
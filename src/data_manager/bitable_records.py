@@ -0,0 +1,391 @@
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple, Type
+
+from ..utils import TimeParser
+from ..common import json_codec
+
+# 页面数达到该值时才启用进程池并行解码
+PARALLEL_MIN_PAGES = 8
+# 一个学期最多的教学周数
+MAX_WEEKS = 20
+ALL_WEEKS = ((1 << MAX_WEEKS) - 1) << 1
+# 课时选项后的周次标注, 如 "上午-第1节(1-8周)"、"晚上-第2节（双周）"、"下午-第3节(1-16周,单周)"
+_SLOT_WEEKS_RE = re.compile(r"^(?P<slot>[^(（]+?)\s*[(（](?P<spec>[^)）]*)[)）]$")
+
+
+def get_nested(data_dict, keys):
+    """安全地提取嵌套字段, 失败时返回空字符串"""
+    try:
+        value = data_dict
+        for k in keys:
+            value = value[k]
+        return value
+    except (KeyError, IndexError, TypeError):
+        return ""
+
+
+class SMCLabBitableRecord:
+    """
+    多维表格记录的基类
+
+    子类用 __slots__ 声明属性, 用 LABELS 声明 表头 -> 属性 的对应关系,
+    并实现 from_item 作为原始页面JSON中单条记录的唯一解码入口。
+    """
+    __slots__ = ()
+    # 原始页面JSON中记录列表所在的键
+    ITEMS_KEY = "items"
+    # 表头(中文) -> 属性名
+    LABELS: Dict[str, str] = {}
+
+    @classmethod
+    def from_item(cls, item: dict) -> "SMCLabBitableRecord":
+        raise NotImplementedError("父类方法")
+
+    def to_row(self, headers: List[str]) -> list:
+        """按表头顺序返回一行数据"""
+        return [getattr(self, self.LABELS[h]) for h in headers]
+
+    def to_dict(self) -> dict:
+        """转换为 {表头: 值} 的字典"""
+        return {label: getattr(self, attr) for label, attr in self.LABELS.items()}
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+
+class SeminarRecord(SMCLabBitableRecord):
+    """组会表格(同时也是成员信息的来源)"""
+    __slots__ = ("name", "grade", "mentor", "cultivation", "status", "open_id", "student_id",
+                 "last_seminar_date", "next_seminar_date", "confirmed", "room", "track",
+                 "title", "abstract")
+    LABELS = {
+        "姓名": "name",
+        "年级": "grade",
+        "导师": "mentor",
+        "培养类型": "cultivation",
+        "在读情况": "status",
+        "飞书账号": "open_id",
+        "学号": "student_id",
+        "上次讲组会时间": "last_seminar_date",
+        "近期预期": "next_seminar_date",
+        "是否确认": "confirmed",
+        "会议室": "room",
+        "顺序": "track",
+        "分享主题": "title",
+        "摘要": "abstract",
+    }
+
+    def __init__(self, name, grade, mentor, cultivation, status, open_id, student_id,
+                 last_seminar_date, next_seminar_date, confirmed, room, track, title, abstract):
+        self.name = name
+        self.grade = grade
+        self.mentor = mentor
+        self.cultivation = cultivation
+        self.status = status
+        self.open_id = open_id
+        self.student_id = student_id
+        self.last_seminar_date = last_seminar_date
+        self.next_seminar_date = next_seminar_date
+        self.confirmed = confirmed
+        self.room = room
+        self.track = track
+        self.title = title
+        self.abstract = abstract
+
+    @staticmethod
+    def _join_text_chunks(text_chunks) -> str:
+        """从文本块数组 [{"text": "...", "type": "text"}, ...] 中提取所有文本并用空格拼接"""
+        if not text_chunks or not isinstance(text_chunks, list):
+            return ""
+        texts = []
+        for chunk in text_chunks:
+            if isinstance(chunk, dict) and "text" in chunk:
+                text = chunk.get("text", "").strip()
+                if text:
+                    texts.append(text)
+        return " ".join(texts)
+
+    @classmethod
+    def from_item(cls, item: dict) -> "SeminarRecord":
+        fields = item.get("fields", {})
+        last_seminar_date = fields.get("上次讲组会时间", None)
+        next_seminar_date = fields.get("近期预期", None)
+        if last_seminar_date:
+            last_seminar_date = TimeParser.timestamp_ms_to_date_int(last_seminar_date)
+        if next_seminar_date:
+            next_seminar_date = TimeParser.timestamp_ms_to_date_int(next_seminar_date)
+        return cls(
+            name=get_nested(fields, ["姓名", 0, "text"]),
+            grade=fields.get("年级", ""),
+            mentor=fields.get("导师", ""),
+            cultivation=fields.get("培养类型", ""),
+            status=fields.get("_在读情况", ""),
+            open_id=get_nested(fields, ["_飞书账号", 0, "id"]),
+            student_id=fields.get("_学号", ""),
+            last_seminar_date=last_seminar_date,
+            next_seminar_date=next_seminar_date,
+            confirmed=fields.get("是否确认", ""),
+            room=fields.get("_会议室", ""),
+            track=fields.get("_Track", None),
+            title=get_nested(fields, ["分享主题", 0, "text"]),
+            abstract=cls._join_text_chunks(fields.get("摘要", [])),
+        )
+
+
+def parse_week_spec(spec: str) -> int:
+    """
+    把周次标注解析为周次位图(第w位为1表示第w周有课)
+
+    支持 "1-8周"、"1-8,10-16周"、"3周"、"单周"、"双周" 及其组合, 如 "1-16周,单周";
+    没有周次范围时视为全学期。
+    """
+    spec = spec.replace("，", ",").replace("、", ",").replace(" ", "")
+    mask = 0
+    for start, end in re.findall(r"(\d+)(?:-(\d+))?周?", spec):
+        start = int(start)
+        end = int(end) if end else start
+        for week in range(max(start, 1), min(end, MAX_WEEKS) + 1):
+            mask |= 1 << week
+    if not mask:
+        mask = ALL_WEEKS
+    if "单" in spec:
+        mask &= int("10" * (MAX_WEEKS // 2 + 1), 2)
+    elif "双" in spec:
+        mask &= int("01" * (MAX_WEEKS // 2 + 1), 2)
+    return mask
+
+
+class ScheduleRecord(SMCLabBitableRecord):
+    """
+    课表: 每人每个工作日上课的节段, 如 {"周一": ("上午-第1节", ...)}
+
+    节段选项可以带周次标注(见 parse_week_spec), 带标注的节段记录在 weeks 中,
+    未出现在 weeks 中的节段每周都有课。
+    """
+    __slots__ = ("name", "slots", "weeks")
+    LABELS = {"姓名": "name"}
+    DAYS = ("周一", "周二", "周三", "周四", "周五")
+
+    def __init__(self, name: str, slots: Dict[str, Tuple[str, ...]],
+                 weeks: Dict[Tuple[str, str], int] = None):
+        self.name = name
+        self.slots = slots
+        # (星期, 节段) -> 周次位图
+        self.weeks = weeks or {}
+
+    def week_mask(self, day: str, slot: str) -> int:
+        """某节课的周次位图"""
+        return self.weeks.get((day, slot), ALL_WEEKS)
+
+    @classmethod
+    def from_item(cls, item: dict) -> "ScheduleRecord":
+        fields = item.get("fields", {})
+        name = get_nested(fields, ["姓名", 0, "text"]) or "未知"
+        slots = {}
+        weeks = {}
+        for day in cls.DAYS:
+            day_slots = []
+            for slot in fields.get(day, []):
+                if "（当天无课程" in slot or "(当天无课程" in slot:
+                    continue
+                match = _SLOT_WEEKS_RE.match(slot)
+                if match:
+                    slot = match.group("slot")
+                    mask = parse_week_spec(match.group("spec"))
+                else:
+                    mask = ALL_WEEKS
+                # 同一节课可能有多条不同周次的标注(或不带标注), 取并集, 与出现顺序无关
+                weeks[day, slot] = weeks.get((day, slot), 0) | mask
+                if slot not in day_slots:
+                    day_slots.append(slot)
+            slots[day] = tuple(day_slots)
+        return cls(name, slots, {k: v for k, v in weeks.items() if v != ALL_WEEKS})
+
+
+class WeeklyReportRecord(SMCLabBitableRecord):
+    """周报提交记录"""
+    __slots__ = ("name", "open_id", "doc_link", "file_token", "file_name")
+    LABELS = {
+        "姓名": "name",
+        "飞书账号": "open_id",
+        "文档链接": "doc_link",
+        "file_token": "file_token",
+        "file_name": "file_name",
+    }
+
+    def __init__(self, name, open_id, doc_link, file_token, file_name):
+        self.name = name
+        self.open_id = open_id
+        self.doc_link = doc_link
+        self.file_token = file_token
+        self.file_name = file_name
+
+    @classmethod
+    def from_item(cls, item: dict) -> "WeeklyReportRecord":
+        fields = item.get("fields", {})
+        return cls(
+            name=get_nested(fields, ["汇报人", 0, "name"]),
+            open_id=get_nested(fields, ["汇报人", 0, "id"]),
+            doc_link=get_nested(fields, ["文档链接", 0, "link"]),
+            file_token=get_nested(fields, ["附件", 0, "file_token"]),
+            file_name=get_nested(fields, ["附件", 0, "name"]),
+        )
+
+
+class LeaveRecord(SMCLabBitableRecord):
+    """组会请假记录"""
+    __slots__ = ("name", "reason")
+    LABELS = {"请假人": "name", "请假原因": "reason"}
+
+    def __init__(self, name, reason):
+        self.name = name
+        self.reason = reason
+
+    @classmethod
+    def from_item(cls, item: dict) -> "LeaveRecord":
+        fields = item.get("fields", {})
+        return cls(
+            name=get_nested(fields, ["请假人", 0, "name"]),
+            reason=get_nested(fields, ["请假原因", 0, "text"]) or fields.get("请假原因", ""),
+        )
+
+
+class AttendanceStatsRecord(SMCLabBitableRecord):
+    """日常考勤统计(UserStatsData), code=51201 为日期, code=51503-1-1 为第一次上班打卡结果"""
+    __slots__ = ("name", "user_id", "date", "status")
+    ITEMS_KEY = "user_datas"
+    LABELS = {"name": "name", "user_id": "user_id", "date": "date", "status": "status"}
+
+    def __init__(self, name, user_id, date, status):
+        self.name = name
+        self.user_id = user_id
+        self.date = date
+        self.status = status
+
+    @classmethod
+    def from_item(cls, item: dict) -> "AttendanceStatsRecord":
+        date = None
+        status = None
+        for d in item.get("datas", []):
+            if d.get("code") == "51201":
+                date = d.get("value")
+            elif d.get("code") == "51503-1-1":
+                status = d.get("value")
+        return cls(item.get("name"), item.get("user_id"), date, status)
+
+
+def _decode_page_values(record_cls: Type[SMCLabBitableRecord], file_path: str):
+    """
+    在子进程中解码单个页面
+
+    只返回 (页面签名, 属性值元组列表), 比传回记录对象的序列化体积更小,
+    主进程按 __slots__ 顺序直接重建记录。
+    """
+    stat = os.stat(file_path)
+    data = json_codec.load(file_path)
+    values = [
+        tuple(getattr(record, attr) for attr in record_cls.__slots__)
+        for record in (record_cls.from_item(item) for item in (data.get(record_cls.ITEMS_KEY) or []))
+    ]
+    return (stat.st_mtime_ns, stat.st_size), values
+
+
+def iter_decoded_pages(record_cls: Type[SMCLabBitableRecord],
+                       file_list: List[str],
+                       workers: int) -> Iterator[Tuple[Tuple[int, int], List[SMCLabBitableRecord]]]:
+    """
+    用进程池并行解码多个页面, 按 file_list 的顺序逐页产出 (页面签名, 记录列表)
+
+    最多提前提交 workers * 2 个页面, 消费端处理得慢时不会把所有页面的结果都堆在内存里
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        pages = iter(file_list)
+        for file_path in islice(pages, workers * 2):
+            pending.append(executor.submit(_decode_page_values, record_cls, file_path))
+        while pending:
+            signature, values = pending.popleft().result()
+            for file_path in islice(pages, 1):
+                pending.append(executor.submit(_decode_page_values, record_cls, file_path))
+            yield signature, [record_cls(*v) for v in values]
+
+
+def resolve_workers(workers: int, page_count: int) -> int:
+    """
+    决定实际使用的进程数: 0 表示使用全部CPU; 页面数少于 PARALLEL_MIN_PAGES 时不值得启动进程池, 返回1
+    """
+    if workers is None or page_count < PARALLEL_MIN_PAGES:
+        return 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, page_count))
+
+
+class SMCLabRecordStore:
+    """
+    进程内共享的记录缓存
+
+    以 (记录类型, 页面文件) 为键缓存解码结果, 页面文件的mtime/大小变化后重新解码。
+    同一次爬取的页面只会被解码一次, 所有解析器共享同一份记录对象(请勿修改)。
+    """
+    _cache = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def load_page(cls, record_cls: Type[SMCLabBitableRecord], file_path: str) -> List[SMCLabBitableRecord]:
+        """解码单个页面文件"""
+        stat = os.stat(file_path)
+        key = (record_cls, os.path.abspath(file_path))
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with cls._lock:
+            cached = cls._cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        data = json_codec.load(file_path)
+        records = [record_cls.from_item(item) for item in (data.get(record_cls.ITEMS_KEY) or [])]
+        with cls._lock:
+            cls._cache[key] = (signature, records)
+        return records
+
+    @classmethod
+    def load(cls, record_cls: Type[SMCLabBitableRecord], file_list: List[str],
+             workers: int = None) -> List[SMCLabBitableRecord]:
+        """
+        按文件顺序解码所有页面
+
+        Args:
+            record_cls: 记录类型
+            file_list: 页面文件列表
+            workers: 并行解码的进程数, None 表示串行, 0 表示使用全部CPU
+        """
+        missing = []
+        for file_path in file_list:
+            stat = os.stat(file_path)
+            with cls._lock:
+                cached = cls._cache.get((record_cls, os.path.abspath(file_path)))
+            if cached is None or cached[0] != (stat.st_mtime_ns, stat.st_size):
+                missing.append(file_path)
+
+        workers = resolve_workers(workers, len(missing))
+        if workers > 1:
+            # 未缓存的页面交给进程池解码, 结果按顺序写回缓存
+            decoded = zip(missing, iter_decoded_pages(record_cls, missing, workers))
+            for file_path, (signature, page_records) in decoded:
+                with cls._lock:
+                    cls._cache[(record_cls, os.path.abspath(file_path))] = (signature, page_records)
+
+        records = []
+        for file_path in file_list:
+            records.extend(cls.load_page(record_cls, file_path))
+        return records
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._cache.clear()
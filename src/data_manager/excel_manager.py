@@ -1,10 +1,166 @@
 import os
+import threading
+import numpy as np
 import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
+from ..common.excel_cache import read_excel_cached
 from ..config import Config
 
+class SMCLabMemberDirectory:
+    """
+    进程内共享的成员名录
+
+    同一个Excel文件在进程内只读取一次, 文件的mtime变化时自动重新加载。
+    加载时为常用的id字段建立哈希索引, 以这些字段为键的 map_fields 和 is/in 筛选
+    直接由索引得到行号, 不需要扫描整个表; map_fields的结果按参数缓存。
+    """
+    ID_FIELDS = ("姓名", "user_id", "飞书账号", "union_id", "导师")
+    JUDGE_CONDITIONS = {"is", "is not", "in", "not in"}
+
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.mtime = os.path.getmtime(filepath)
+        self.df = read_excel_cached(filepath)
+        self._indexes = {
+            field: self._build_index(self.df[field])
+            for field in self.ID_FIELDS if field in self.df.columns
+        }
+        self._mapping_cache = {}
+
+    @classmethod
+    def get(cls, filepath: str) -> "SMCLabMemberDirectory":
+        """获取filepath对应的名录, 文件被修改过时重新加载"""
+        key = os.path.abspath(filepath)
+        mtime = os.path.getmtime(key)
+        with cls._lock:
+            directory = cls._instances.get(key)
+            if directory is None or directory.mtime != mtime:
+                directory = cls(key)
+                cls._instances[key] = directory
+            return directory
+
+    @staticmethod
+    def _build_index(column: pd.Series) -> dict:
+        """建立 {字段值: [行号, ...]} 的索引, 缺失值不入索引"""
+        valid = column.notna().to_numpy()
+        positions = pd.Series(range(len(column)))[valid]
+        return positions.groupby(column[valid].to_numpy(), sort=False).apply(list).to_dict()
+
+    def _check_field(self, field: str):
+        if field not in self.df.columns:
+            raise ValueError(f"字段名{field}不存在于Excel中, 请检查'SMCLab学生扩展信息.xlsx'")
+
+    def mask(self,
+             judge_field: str,
+             judge_condition: str = "is",
+             judge_value: str | int | list[any] = None) -> pd.Series:
+        """向量化地计算筛选条件的布尔掩码"""
+        self._check_field(judge_field)
+        assert judge_value
+        assert judge_condition in self.JUDGE_CONDITIONS
+        if judge_condition in {"is", "is not"}:
+            assert not isinstance(judge_value, list), "判断条件为是否时，不允许判断值为列表"
+        if judge_condition in {"in", "not in"}:
+            assert isinstance(judge_value, list), "判断条件为在不在时，判断值必须为列表"
+        if judge_field in self._indexes:
+            values = judge_value if isinstance(judge_value, list) else [judge_value]
+            index = self._indexes[judge_field]
+            selected = np.zeros(len(self.df), dtype=bool)
+            for value in values:
+                selected[index.get(value, [])] = True
+            if judge_condition in {"is not", "not in"}:
+                selected = ~selected
+            return pd.Series(selected, index=self.df.index)
+        column = self.df[judge_field]
+        if judge_condition == "is":
+            return column == judge_value
+        if judge_condition == "is not":
+            return column != judge_value
+        if judge_condition == "in":
+            return column.isin(judge_value)
+        return ~column.isin(judge_value)
+
+    def filter(self,
+               judge_field: str,
+               judge_condition: str = "is",
+               judge_value: str | int | list[any] = None) -> pd.DataFrame:
+        """返回满足筛选条件的行"""
+        return self.df[self.mask(judge_field, judge_condition, judge_value)]
+
+    def map_fields(self, field1: str,
+                         field2: str,
+                         judge_field: str=None,
+                         judge_condition: str="is",
+                         judge_value: str| int | list[any]=None
+                         ):
+        """见 SMCLabInfoManager.map_fields"""
+        cache_key = (field1, field2, judge_field, judge_condition,
+                     tuple(judge_value) if isinstance(judge_value, list) else judge_value)
+        if cache_key not in self._mapping_cache:
+            self._mapping_cache[cache_key] = self._map_fields(
+                field1, field2, judge_field, judge_condition, judge_value)
+        mapping_dict, missing_names, one2one_flag = self._mapping_cache[cache_key]
+        # 返回副本, 防止调用方修改缓存
+        mapping_dict = {k: list(v) if isinstance(v, list) else v for k, v in mapping_dict.items()}
+        return mapping_dict, list(missing_names), one2one_flag
+
+    def _map_fields(self, field1, field2, judge_field, judge_condition, judge_value):
+        if field1 not in self.df.columns or \
+           field2 not in self.df.columns:
+            raise ValueError(f"字段名不存在于Excel中, 请检查'SMCLab学生扩展信息.xlsx'")
+        col1, col2 = self.df[field1], self.df[field2]
+
+        # 统计缺失这两个字段的人员的姓名(在筛选之前统计)
+        missing = col1.isna() | col2.isna()
+        if "姓名" in self.df.columns:
+            missing_names = self.df.loc[missing, "姓名"].tolist()
+        else:
+            missing_names = [None] * int(missing.sum())
+
+        valid = ~missing
+        if judge_field:
+            valid &= self.mask(judge_field, judge_condition, judge_value)
+        if field1 in self._indexes:
+            mapping_dict, one2one_flag = self._map_indexed(field1, col2, valid)
+            return mapping_dict, missing_names, one2one_flag
+        pairs = pd.Series(col2[valid].tolist(), index=col1[valid].tolist())
+        if pairs.empty:
+            return {}, missing_names, True
+
+        # 同一个val1出现多次时, 映射为去重后的列表
+        grouped = pairs.groupby(level=0, sort=False)
+        sizes = grouped.size()
+        uniques = grouped.unique()
+        mapping_dict = {
+            key: (values[0] if sizes[key] == 1 else list(values))
+            for key, values in uniques.items()
+        }
+        one2one_flag = bool((sizes == 1).all())
+        return mapping_dict, missing_names, one2one_flag
+
+    def _map_indexed(self, field1: str, col2: pd.Series, valid: pd.Series):
+        """field1 有索引时, 按索引中每个值的行号取出 field2, 不扫描整个表"""
+        keep = valid.to_numpy()
+        values2 = col2.to_numpy()
+        mapping_dict, one2one_flag = {}, True
+        for key, positions in self._indexes[field1].items():
+            positions = [p for p in positions if keep[p]]
+            if not positions:
+                continue
+            if len(positions) == 1:
+                mapping_dict[key] = values2[positions[0]]
+            else:
+                # 同一个val1出现多次时, 映射为去重后的列表
+                mapping_dict[key] = list(pd.unique(values2[positions]))
+                one2one_flag = False
+        return mapping_dict, one2one_flag
+
+
 class SMCLabInfoManager:
     def __init__(self, config: Config = None):
         if config is None:
@@ -12,10 +168,23 @@ class SMCLabInfoManager:
         self.incre_data_path = config.incre_data_path
         self.filepath = config.info_plus_path
         try:
-            self.df = pd.read_excel(self.filepath)
+            self._directory = SMCLabMemberDirectory.get(self.filepath)
         except Exception as e:
             raise FileNotFoundError(f"请先运行SMCLabAddressbookParser")
 
+    @property
+    def directory(self) -> SMCLabMemberDirectory:
+        """共享的成员名录, Excel被修改后自动重新加载"""
+        try:
+            self._directory = SMCLabMemberDirectory.get(self.filepath)
+        except OSError:
+            pass
+        return self._directory
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.directory.df
+
     def map_fields(self, field1: str, 
                          field2: str, 
                          judge_field: str=None,
@@ -44,57 +213,7 @@ class SMCLabInfoManager:
             mapping_dict: {field1_value: field2_value}
             missing_names: list[姓名]
         """
-        if field1 not in self.df.columns or \
-           field2 not in self.df.columns:
-            raise ValueError(f"字段名不存在于Excel中, 请检查'SMCLab学生扩展信息.xlsx'")
-        if judge_field:
-            assert judge_field in self.df.columns, f"字段名{judge_field}不存在于Excel中, 请检查'SMCLab学生扩展信息.xlsx'"
-            assert judge_value
-            assert judge_condition in {"is", "is not", "in", "not in"}
-            if judge_condition in {"is", "is not"}:
-                assert not isinstance(judge_value, list), "判断条件为是否时，不允许判断值为列表"
-            if judge_condition in {"in", "not in"}:
-                assert isinstance(judge_value, list), "判断条件为在不在时，判断值必须为列表"
-        mapping_dict = {} # 映射结果
-        missing_names = [] # 统计缺失这两个字段的人员的姓名
-        one2one_flag = True # 该映射是否是一对一映射
-
-        for _, row in self.df.iterrows():
-            val1, val2 = row[field1], row[field2]
-
-            name = row.get("姓名", None)
-
-            # 判断是否有缺失
-            if pd.isna(val1) or pd.isna(val2):
-                missing_names.append(name)
-                continue  # 跳过这行，不加入映射
-            # 根据 judge_field 进行筛选
-            if judge_field is not None:
-                judge_val = row[judge_field]
-                should_skip = False
-                if judge_condition == "is":
-                    should_skip = judge_val != judge_value
-                elif judge_condition == "is not":
-                    should_skip = judge_val == judge_value
-                elif judge_condition == "in":
-                    should_skip = judge_val not in judge_value
-                elif judge_condition == "not in":
-                    should_skip = judge_val in judge_value
-                if should_skip:
-                    continue
-            # 若 val1 已存在，则追加到列表
-            if val1 in mapping_dict:
-                # 若不是列表则转为列表
-                if not isinstance(mapping_dict[val1], list):
-                    mapping_dict[val1] = [mapping_dict[val1]]
-                    one2one_flag = False
-                # 仅当 val2 不重复时才添加
-                if val2 not in mapping_dict[val1]:
-                    mapping_dict[val1].append(val2)
-            else:
-                mapping_dict[val1] = val2
-
-        return mapping_dict, missing_names, one2one_flag
+        return self.directory.map_fields(field1, field2, judge_field, judge_condition, judge_value)
 
     def export_signature_sheet(self, output_path: str = None):
         """
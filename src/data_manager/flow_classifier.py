@@ -0,0 +1,166 @@
+import os
+import re
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from ..common import json_codec
+
+# 单条打卡流水的分类
+FLOW_OUTSIDE = 0     # 不在组会时间窗内
+FLOW_ON_TIME = 1     # 开始前 padding ~ 开始后 grace
+FLOW_LATE = 2        # 开始 grace 之后、结束之前
+FLOW_DURING_END = 3  # 结束前 early_leave ~ 结束后 padding (散会打卡)
+
+# 每人每周的出勤状态
+STATUS_ABSENT = 0
+STATUS_ON_TIME = 1
+STATUS_LATE = 2
+STATUS_LEFT_EARLY = 3
+STATUS_NAMES = {
+    STATUS_ABSENT: "absent",
+    STATUS_ON_TIME: "on_time",
+    STATUS_LATE: "late",
+    STATUS_LEFT_EARLY: "left_early",
+}
+
+# 计入出勤的打卡类型(与原来的逐条判断一致)
+VALID_FLOW_TYPES = (0, 6)
+
+_WEEK_RE = re.compile(r"_Week(\d+)_")
+
+
+class SMCLabFlowColumns:
+    """
+    打卡流水的列式存储
+
+    每条流水一行: 用户编号、打卡时间(秒)、打卡类型、地点编号、周次,
+    用户和地点以编号存储, 对应的字符串放在 users / locations 中。
+    """
+    __slots__ = ("users", "locations", "user", "check_time", "type", "location", "week")
+
+    def __init__(self, users: List[str], locations: List[str],
+                 user: np.ndarray, check_time: np.ndarray, type: np.ndarray,
+                 location: np.ndarray, week: np.ndarray):
+        self.users = users
+        self.locations = locations
+        self.user = user
+        self.check_time = check_time
+        self.type = type
+        self.location = location
+        self.week = week
+
+    def __len__(self) -> int:
+        return len(self.user)
+
+    @classmethod
+    def from_files(cls, file_list: Iterable[str]) -> "SMCLabFlowColumns":
+        """
+        读取 *_Week{N}_seminar_attendance_raw_*.json, 周次取自文件名
+        """
+        user_codes, location_codes = {}, {}
+        user, check_time, flow_type, location, week = [], [], [], [], []
+        for file_path in file_list:
+            match = _WEEK_RE.search(os.path.basename(file_path))
+            file_week = int(match.group(1)) if match else 0
+            data = json_codec.load(file_path) or {}
+            for record in data.get("user_flow_results") or []:
+                user_id = record.get("user_id")
+                if not user_id:
+                    continue
+                user.append(user_codes.setdefault(user_id, len(user_codes)))
+                check_time.append(int(record.get("check_time") or 0))
+                flow_type.append(record.get("type", -1) if record.get("type") is not None else -1)
+                location.append(location_codes.setdefault(record.get("location_name") or "", len(location_codes)))
+                week.append(file_week)
+        return cls(
+            users=list(user_codes),
+            locations=list(location_codes),
+            user=np.asarray(user, dtype=np.int32),
+            check_time=np.asarray(check_time, dtype=np.int64),
+            type=np.asarray(flow_type, dtype=np.int16),
+            location=np.asarray(location, dtype=np.int32),
+            week=np.asarray(week, dtype=np.int16),
+        )
+
+
+def classify_flows(flows: SMCLabFlowColumns,
+                   week_start: Dict[int, int],
+                   week_end: Dict[int, int],
+                   grace: int = 600,
+                   early_leave: int = 900,
+                   padding: int = 3600) -> np.ndarray:
+    """
+    向量化地对每条流水分类(FLOW_*)
+
+    Args:
+        flows: 列式流水
+        week_start / week_end: {周次: 组会开始/结束的秒级时间戳}
+        grace: 开始后多少秒内仍算准时
+        early_leave: 结束前多少秒开始算散会打卡
+        padding: 开始前/结束后多少秒内的流水算在时间窗内
+    """
+    if not len(flows):
+        return np.zeros(0, dtype=np.int8)
+    max_week = int(max(flows.week.max(), *week_start.keys(), 0)) + 1
+    starts = np.full(max_week, -1, dtype=np.int64)
+    ends = np.full(max_week, -1, dtype=np.int64)
+    for week, start in week_start.items():
+        starts[week] = start
+        ends[week] = week_end[week]
+    start = starts[flows.week]
+    end = ends[flows.week]
+    t = flows.check_time
+
+    labels = np.full(len(flows), FLOW_OUTSIDE, dtype=np.int8)
+    known = start >= 0
+    labels[known & (t >= start - padding) & (t <= start + grace)] = FLOW_ON_TIME
+    labels[known & (t > start + grace) & (t < end - early_leave)] = FLOW_LATE
+    labels[known & (t >= end - early_leave) & (t <= end + padding)] = FLOW_DURING_END
+    return labels
+
+
+def attendance_status(flows: SMCLabFlowColumns,
+                      labels: np.ndarray,
+                      grace: int = 600) -> Dict[int, Dict[str, int]]:
+    """
+    把流水分类聚合为每人每周的出勤状态(STATUS_*)
+
+    - 到达时间 = 时间窗内第一条有效流水, 开始后 grace 之内为准时, 之后为迟到
+    - 最后一条流水是会议中途(FLOW_LATE, 即早于 结束 - early_leave)的离场打卡,
+      且晚于到达 grace 秒以上时视为早退;
+      到达时连续打两次卡不算早退, 最后一条是散会打卡的也不算
+    - 只有散会打卡(FLOW_DURING_END)的视为迟到
+
+    Returns:
+        dict: {周次: {user_id: 状态}}
+    """
+    valid = np.isin(flows.type, VALID_FLOW_TYPES) & (labels != FLOW_OUTSIDE)
+    if not valid.any():
+        return {}
+    user = flows.user[valid].astype(np.int64)
+    week = flows.week[valid].astype(np.int64)
+    t = flows.check_time[valid]
+    label = labels[valid]
+
+    # (周次, 用户) 组合成一个键, 排序后按组做归约
+    key = week * len(flows.users) + user
+    order = np.lexsort((t, key))
+    key, t, label = key[order], t[order], label[order]
+    group_start = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    group_end = np.r_[group_start[1:], len(key)] - 1
+    first_label = label[group_start]
+    first_time = t[group_start]
+    last_label = label[group_end]
+    last_time = t[group_end]
+
+    group_week = key[group_start] // len(flows.users)
+    status = np.where(first_label == FLOW_ON_TIME, STATUS_ON_TIME, STATUS_LATE)
+    # 离场打卡: 会议中途的流水, 且不属于到达时的重复打卡
+    left_early = (last_label == FLOW_LATE) & (last_time > first_time + grace)
+    status = np.where(left_early, STATUS_LEFT_EARLY, status)
+
+    result: Dict[int, Dict[str, int]] = {}
+    for k, g in enumerate(key[group_start]):
+        result.setdefault(int(group_week[k]), {})[flows.users[int(g % len(flows.users))]] = int(status[k])
+    return result
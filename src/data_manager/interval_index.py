@@ -0,0 +1,135 @@
+import os
+import threading
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+from .member_index import SMCLabMemberInterner, MemberSet
+from ..common import json_codec
+
+
+def hhmm_to_minutes(value) -> int:
+    """把 "19:00" / "1900" / 1900 转换为当天的分钟数"""
+    if isinstance(value, str):
+        value = value.replace(":", "")
+    value = int(value)
+    return value // 100 * 60 + value % 100
+
+
+def load_section_times(sysu_schedule_path: str = "configs/sysu_schedule.json") -> Dict[str, Tuple[int, int]]:
+    """
+    读取中大作息时间表
+
+    Returns:
+        dict: {"上午-第1节": (开始分钟, 结束分钟), ...}
+    """
+    sysu_schedule = json_codec.load(sysu_schedule_path)
+    section_times = {}
+    for period, sections in sysu_schedule.items():
+        for section, span in sections.items():
+            section_times[f"{period}-{section}"] = (hhmm_to_minutes(span["开始"]),
+                                                    hhmm_to_minutes(span["结束"]))
+    return section_times
+
+
+class SMCLabIntervalIndex:
+    """
+    分钟级的课表区间索引
+
+    每个工作日把各节课按开始时间排序成两个有序数组(开始/结束分钟),
+    并为每节课保存一个有课成员的位图。各节课互不重叠, 因此结束时间也有序,
+    查询任意时间窗 [start, end) 时用二分找到第一节 结束 > start 的课,
+    再向后取 开始 < end 的课即可, 不需要逐人比较。
+    """
+    # 缓存: 课表文件 -> (文件签名, 索引)
+    _file_cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, interner: SMCLabMemberInterner):
+        self.interner = interner
+        # 星期 -> (开始分钟列表, 结束分钟列表, 成员位图列表)
+        self._days: Dict[str, Tuple[List[int], List[int], List[int]]] = {}
+
+    @classmethod
+    def from_schedule(cls, schedule: Dict[str, Dict[str, Iterable[str]]],
+                      section_times: Dict[str, Tuple[int, int]],
+                      interner: SMCLabMemberInterner) -> "SMCLabIntervalIndex":
+        """
+        由 {星期: {"上午-第1节": [姓名, ...]}} (即 schedule_by_slot.json) 构建索引
+
+        Args:
+            schedule: 每节课的上课名单
+            section_times: load_section_times 的返回值
+            interner: 学期成员驻留表
+        """
+        index = cls(interner)
+        for day, slots in schedule.items():
+            spans = []
+            for slot, names in slots.items():
+                if slot not in section_times:
+                    continue
+                start, end = section_times[slot]
+                spans.append((start, end, interner.to_set(names).bits))
+            spans.sort()
+            index._days[day] = ([s[0] for s in spans], [s[1] for s in spans], [s[2] for s in spans])
+        return index
+
+    @classmethod
+    def from_file(cls, schedule_path: str, sysu_schedule_path: str,
+                  interner: SMCLabMemberInterner,
+                  week: int = None) -> "SMCLabIntervalIndex":
+        """
+        读取课表并构建索引, 两个文件都不变时复用同一个索引
+
+        Args:
+            schedule_path: schedule_by_slot.json; 指定 week 时为 schedule_by_week.json
+            sysu_schedule_path: 作息时间表
+            interner: 学期成员驻留表
+            week: 周次, 只取该周的课表
+        """
+        paths = (schedule_path, sysu_schedule_path)
+        signature = tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in paths)
+        key = (tuple(os.path.abspath(p) for p in paths), id(interner), week)
+        with cls._lock:
+            cached = cls._file_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        schedule = json_codec.load(schedule_path)
+        if week is not None:
+            schedule = schedule.get(str(week), {})
+        index = cls.from_schedule(schedule, load_section_times(sysu_schedule_path), interner)
+        with cls._lock:
+            cls._file_cache[key] = (signature, index)
+        return index
+
+    def _overlapping(self, day: str, start: int, end: int) -> range:
+        """与 [start, end) 重叠的课在当天数组中的下标范围"""
+        starts, ends, _ = self._days.get(day, ([], [], []))
+        first = bisect_right(ends, start)
+        last = first
+        while last < len(starts) and starts[last] < end:
+            last += 1
+        return range(first, last)
+
+    def busy_members(self, day: str, start, end) -> MemberSet:
+        """
+        时间窗内有课的成员
+
+        Args:
+            day: 星期, 如 "周三"
+            start, end: 时间窗, 支持 "19:00" / "1900" / 1900
+        """
+        start, end = hhmm_to_minutes(start), hhmm_to_minutes(end)
+        members = self._days.get(day, ([], [], []))[2]
+        bits = 0
+        for k in self._overlapping(day, start, end):
+            bits |= members[k]
+        return MemberSet(self.interner, bits)
+
+    def is_busy(self, name: str, day: str, start, end) -> bool:
+        """某人在时间窗内是否有课"""
+        member_id = self.interner.id_of(name)
+        if member_id is None:
+            return False
+        start, end = hhmm_to_minutes(start), hhmm_to_minutes(end)
+        members = self._days.get(day, ([], [], []))[2]
+        return any(members[k] >> member_id & 1 for k in self._overlapping(day, start, end))
@@ -0,0 +1,169 @@
+import os
+import threading
+from typing import Iterable, Iterator, List
+from ..common import json_codec
+
+
+class SMCLabMemberInterner:
+    """
+    学期内的成员驻留表: 为每个姓名分配一个稠密的整数id(0, 1, 2, ...)
+
+    id按学期持久化在 data_sem/{学期}/member_ids.json 中, 同一学期内跨周、跨数据集保持不变,
+    因此不同来源的名单都可以转换为 MemberSet (位集合) 后直接做集合运算。
+    """
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, semester: str, sem_data_path: str = "data_sem"):
+        self.semester = semester
+        self.path = os.path.join(sem_data_path, semester, "member_ids.json")
+        self._names: List[str] = []
+        self._ids = {}
+        self._dirty = False
+        if os.path.exists(self.path):
+            for name in json_codec.load(self.path):
+                self._ids[name] = len(self._names)
+                self._names.append(name)
+
+    @classmethod
+    def get(cls, semester: str, sem_data_path: str = "data_sem") -> "SMCLabMemberInterner":
+        """获取某学期的驻留表(进程内共享)"""
+        key = os.path.abspath(os.path.join(sem_data_path, semester))
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(semester, sem_data_path)
+            return cls._instances[key]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def intern(self, name: str) -> int:
+        """返回姓名对应的id, 新名字会分配下一个id"""
+        member_id = self._ids.get(name)
+        if member_id is None:
+            with self._lock:
+                member_id = self._ids.get(name)
+                if member_id is None:
+                    member_id = len(self._names)
+                    self._names.append(name)
+                    self._ids[name] = member_id
+                    self._dirty = True
+        return member_id
+
+    def id_of(self, name: str) -> int:
+        """查询已有的id, 不存在时返回None(不会分配新id)"""
+        return self._ids.get(name)
+
+    def name_of(self, member_id: int) -> str:
+        return self._names[member_id]
+
+    def to_set(self, names: Iterable[str]) -> "MemberSet":
+        """把姓名集合转换为位集合"""
+        bits = 0
+        for name in names:
+            if name:
+                bits |= 1 << self.intern(name)
+        return MemberSet(self, bits)
+
+    def empty(self) -> "MemberSet":
+        return MemberSet(self, 0)
+
+    def save(self):
+        """有新成员时写回 member_ids.json"""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        json_codec.dump(self._names, self.path)
+        self._dirty = False
+
+
+class MemberSet:
+    """
+    以Python整数为位图的成员集合, 第i位为1表示id为i的成员在集合中。
+    并、交、差都是整数的按位运算, 不需要生成字符串集合。
+    """
+    __slots__ = ("interner", "bits")
+
+    def __init__(self, interner: SMCLabMemberInterner, bits: int = 0):
+        self.interner = interner
+        self.bits = bits
+
+    def _coerce(self, other) -> int:
+        if isinstance(other, MemberSet):
+            assert other.interner is self.interner, "不同学期的成员集合不能直接运算"
+            return other.bits
+        # 兼容普通的姓名集合/列表
+        return self.interner.to_set(other).bits
+
+    def __or__(self, other) -> "MemberSet":
+        return MemberSet(self.interner, self.bits | self._coerce(other))
+
+    def __and__(self, other) -> "MemberSet":
+        return MemberSet(self.interner, self.bits & self._coerce(other))
+
+    def __sub__(self, other) -> "MemberSet":
+        return MemberSet(self.interner, self.bits & ~self._coerce(other))
+
+    def __xor__(self, other) -> "MemberSet":
+        return MemberSet(self.interner, self.bits ^ self._coerce(other))
+
+    def __ior__(self, other) -> "MemberSet":
+        self.bits |= self._coerce(other)
+        return self
+
+    def __iand__(self, other) -> "MemberSet":
+        self.bits &= self._coerce(other)
+        return self
+
+    def __isub__(self, other) -> "MemberSet":
+        self.bits &= ~self._coerce(other)
+        return self
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, MemberSet):
+            return self.interner is other.interner and self.bits == other.bits
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self.interner), self.bits))
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __contains__(self, name: str) -> bool:
+        member_id = self.interner.id_of(name)
+        return member_id is not None and bool(self.bits >> member_id & 1)
+
+    def ids(self) -> Iterator[int]:
+        """按id从小到大遍历集合中的成员id"""
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+    def __iter__(self) -> Iterator[str]:
+        for member_id in self.ids():
+            yield self.interner.name_of(member_id)
+
+    def add(self, name: str):
+        if name:
+            self.bits |= 1 << self.interner.intern(name)
+
+    def discard(self, name: str):
+        member_id = self.interner.id_of(name)
+        if member_id is not None:
+            self.bits &= ~(1 << member_id)
+
+    def copy(self) -> "MemberSet":
+        return MemberSet(self.interner, self.bits)
+
+    def names(self) -> List[str]:
+        """返回排序后的姓名列表"""
+        return sorted(self)
+
+    def __repr__(self) -> str:
+        return f"MemberSet({self.names()})"
@@ -0,0 +1,253 @@
+import os
+import glob
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from .flow_classifier import SMCLabFlowColumns, VALID_FLOW_TYPES
+from .member_index import SMCLabMemberInterner
+from ..common import json_codec
+
+HOURS_PER_WEEK = 7 * 24
+WEEKDAY_LABELS = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+
+
+def _utc_offset() -> int:
+    """本地时区相对UTC的秒数(打卡时间是UTC时间戳, 按本地时间分桶)"""
+    return int(datetime.now().astimezone().utcoffset().total_seconds())
+
+
+def hourly_occupancy(flows: SMCLabFlowColumns,
+                     num_rows: int,
+                     rows: np.ndarray,
+                     min_stay: int = 1800) -> np.ndarray:
+    """
+    把打卡流水向量化地分桶为每人每个"周内小时"的在场时长(小时)
+
+    - 每人每天从第一条有效流水到最后一条视为在实验室, 只有一条时按 min_stay 秒计
+    - 区间按整点切开, 每段的时长用 bincount 累加到 行号*168 + 周内小时 的桶中
+
+    Args:
+        flows: 列式流水
+        num_rows: 输出的行数
+        rows: flows.users 中每个用户对应的输出行号, -1 表示丢弃
+        min_stay: 只有一条流水时的在场秒数
+
+    Returns:
+        np.ndarray: (num_rows, 168) 的在场小时数
+    """
+    occupancy = np.zeros(num_rows * HOURS_PER_WEEK, dtype=np.float64)
+    if not len(flows):
+        return occupancy.reshape(num_rows, HOURS_PER_WEEK)
+    valid = np.isin(flows.type, VALID_FLOW_TYPES) & (rows[flows.user] >= 0)
+    row = rows[flows.user[valid]].astype(np.int64)
+    t = flows.check_time[valid] + _utc_offset()
+    if not len(t):
+        return occupancy.reshape(num_rows, HOURS_PER_WEEK)
+
+    # (行号, 本地日期) 为一组, 取组内最早和最晚的流水
+    key = row * 100000 + t // 86400
+    order = np.lexsort((t, key))
+    key, t = key[order], t[order]
+    group_start = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    group_end = np.r_[group_start[1:], len(key)] - 1
+    group_row = key[group_start] // 100000
+    first = t[group_start]
+    last = np.maximum(t[group_end], first + min_stay)
+    # 不跨过当天24点
+    last = np.minimum(last, (first // 86400 + 1) * 86400)
+
+    # 每个区间展开为经过的各个整点小时
+    first_hour, last_hour = first // 3600, (last - 1) // 3600
+    spans = last_hour - first_hour + 1
+    segment = np.repeat(np.arange(len(first)), spans)
+    hour = first_hour[segment] + np.arange(len(segment)) - np.repeat(np.cumsum(spans) - spans, spans)
+    seconds = np.minimum(last[segment], (hour + 1) * 3600) - np.maximum(first[segment], hour * 3600)
+
+    # 1970-01-01 是周四, 周一为0
+    hour_of_week = ((hour // 24 + 3) % 7) * 24 + hour % 24
+    bucket = group_row[segment] * HOURS_PER_WEEK + hour_of_week
+    occupancy += np.bincount(bucket, weights=seconds / 3600, minlength=num_rows * HOURS_PER_WEEK)
+    return occupancy.reshape(num_rows, HOURS_PER_WEEK)
+
+
+class SMCLabPresenceHeatmap:
+    """
+    实验室在场时间分布(周内小时热力图)
+
+    每周的打卡流水分桶为 成员 × 168小时 的在场时长, 按周缓存在
+    data_sem/{学期}/presence_heatmap.npz; 流水文件没有变化的周不会重新读取,
+    原始流水被清理后已统计的周仍然保留。热力图按所含周次的签名缓存。
+    """
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, semester: str, sem_data_path: str = "data_sem",
+                 raw_data_path: str = "data_raw/attendance_raw_data", min_stay: int = 1800):
+        self.semester = semester
+        self.raw_data_path = raw_data_path
+        self.min_stay = min_stay
+        self.this_sem_path = os.path.join(sem_data_path, semester)
+        self.cache_path = os.path.join(self.this_sem_path, "presence_heatmap.npz")
+        self.plot_dir = os.path.join(self.this_sem_path, "presence")
+        self.interner = SMCLabMemberInterner.get(semester, sem_data_path)
+        # 周次 -> 流水文件签名 / 在场时长矩阵
+        self._signatures: Dict[int, list] = {}
+        self._weeks: Dict[int, np.ndarray] = {}
+        self._load()
+
+    @classmethod
+    def get(cls, semester: str, sem_data_path: str = "data_sem",
+            raw_data_path: str = "data_raw/attendance_raw_data", min_stay: int = 1800) -> "SMCLabPresenceHeatmap":
+        """获取某学期的在场统计(进程内共享)"""
+        key = os.path.abspath(os.path.join(sem_data_path, semester))
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(semester, sem_data_path, raw_data_path, min_stay)
+            return cls._instances[key]
+
+    def _load(self):
+        if not os.path.exists(self.cache_path):
+            return
+        with np.load(self.cache_path) as data:
+            meta = json_codec.loads(str(data["meta"]))
+            if meta.get("min_stay") != self.min_stay:
+                return
+            for week, signature in meta["weeks"].items():
+                self._signatures[int(week)] = signature
+                self._weeks[int(week)] = data[f"week{week}"]
+
+    def _save(self):
+        os.makedirs(self.this_sem_path, exist_ok=True)
+        meta = {"min_stay": self.min_stay, "weeks": {str(w): s for w, s in self._signatures.items()}}
+        arrays = {f"week{w}": occupancy.astype(np.float32) for w, occupancy in self._weeks.items()}
+        tmp_path = self.cache_path + ".tmp.npz"
+        np.savez_compressed(tmp_path, meta=np.array(json_codec.dumps(meta)), **arrays)
+        os.replace(tmp_path, self.cache_path)
+        self.interner.save()
+
+    def _week_files(self) -> Dict[int, List[str]]:
+        files = {}
+        pattern = os.path.join(self.raw_data_path, f"{self.semester}_Week*_presence_flow_raw_*.json")
+        for file_path in sorted(glob.glob(pattern)):
+            week = int(os.path.basename(file_path).split("_Week")[1].split("_")[0])
+            files.setdefault(week, []).append(file_path)
+        return files
+
+    def update(self, name_and_id: Dict[str, str]) -> List[int]:
+        """
+        增量统计流水文件有变化的周
+
+        Args:
+            name_and_id: {user_id: 姓名}
+
+        Returns:
+            list: 重新统计的周次
+        """
+        changed = []
+        for week, file_list in self._week_files().items():
+            signature = [[os.path.basename(p), os.stat(p).st_mtime_ns, os.stat(p).st_size] for p in file_list]
+            if self._signatures.get(week) == signature:
+                continue
+            flows = SMCLabFlowColumns.from_files(file_list)
+            rows = np.array([self.interner.intern(name_and_id[u]) if name_and_id.get(u) else -1
+                             for u in flows.users], dtype=np.int64)
+            self._weeks[week] = hourly_occupancy(flows, len(self.interner), rows, self.min_stay)
+            self._signatures[week] = signature
+            changed.append(week)
+        if changed:
+            self._save()
+        return changed
+
+    def weeks(self) -> List[int]:
+        return sorted(self._weeks)
+
+    def occupancy(self, weeks: Optional[List[int]] = None) -> np.ndarray:
+        """所选周次(默认全部)累计的 (成员, 168) 在场小时数"""
+        if weeks is None:
+            weeks = self.weeks()
+        total = np.zeros((len(self.interner), HOURS_PER_WEEK), dtype=np.float64)
+        for week in weeks:
+            occupancy = self._weeks.get(week)
+            if occupancy is not None:
+                total[:occupancy.shape[0]] += occupancy
+        return total
+
+    def lab_occupancy(self, weeks: Optional[List[int]] = None) -> np.ndarray:
+        """每个周内小时平均在场人数, 形状 (7, 24)"""
+        if weeks is None:
+            weeks = self.weeks()
+        weeks = [w for w in weeks if w in self._weeks]
+        if not weeks:
+            return np.zeros((7, 24))
+        return (self.occupancy(weeks).sum(axis=0) / len(weeks)).reshape(7, 24)
+
+    def person_occupancy(self, name: str, weeks: Optional[List[int]] = None) -> np.ndarray:
+        """某人每个周内小时平均在场时长(小时), 形状 (7, 24)"""
+        if weeks is None:
+            weeks = self.weeks()
+        weeks = [w for w in weeks if w in self._weeks]
+        member_id = self.interner.id_of(name)
+        if member_id is None or member_id >= len(self.interner) or not weeks:
+            return np.zeros((7, 24))
+        return (self.occupancy(weeks)[member_id] / len(weeks)).reshape(7, 24)
+
+    def weekly_hours(self, weeks: Optional[List[int]] = None) -> Dict[str, float]:
+        """所选周次内每人平均每周在场小时数(从多到少)"""
+        if weeks is None:
+            weeks = self.weeks()
+        weeks = [w for w in weeks if w in self._weeks]
+        if not weeks:
+            return {}
+        hours = self.occupancy(weeks).sum(axis=1) / len(weeks)
+        order = np.argsort(-hours, kind="stable")
+        return {self.interner.name_of(int(i)): round(float(hours[i]), 1) for i in order if hours[i] > 0}
+
+    def render(self, weeks: Optional[List[int]] = None, name: Optional[str] = None) -> Optional[str]:
+        """
+        画热力图(横轴小时, 纵轴星期), 所含周次的流水没变化时直接返回已有的图片
+
+        Args:
+            weeks: 统计的周次, 默认全部
+            name: 某个成员, 默认整个实验室的平均在场人数
+
+        Returns:
+            str: 图片路径, 没有数据时为None
+        """
+        if weeks is None:
+            weeks = self.weeks()
+        weeks = sorted(w for w in weeks if w in self._weeks)
+        if not weeks:
+            return None
+        signature = json_codec.dumps([self._signatures[w] for w in weeks])
+        suffix = f"week{weeks[0]}-{weeks[-1]}" if len(weeks) > 1 else f"week{weeks[0]}"
+        plot_path = os.path.join(self.plot_dir, f"{name or 'lab'}_{suffix}.png")
+        signature_path = plot_path.replace(".png", ".json")
+        if os.path.exists(plot_path) and os.path.exists(signature_path) \
+                and json_codec.load(signature_path).get("signature") == signature:
+            return plot_path
+
+        data = self.person_occupancy(name, weeks) if name else self.lab_occupancy(weeks)
+        # 设置中文字体
+        plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
+        plt.rcParams['axes.unicode_minus'] = False
+        fig, ax = plt.subplots(figsize=(8, 3), dpi=300)
+        image = ax.imshow(data, aspect='auto', cmap='YlOrRd', vmin=0)
+        ax.set_xticks(range(0, 24, 2))
+        ax.set_xticklabels([f"{h}" for h in range(0, 24, 2)])
+        ax.set_yticks(range(7))
+        ax.set_yticklabels(WEEKDAY_LABELS)
+        ax.set_xlabel('小时', fontsize=12)
+        title = f"{name}平均在场时长(小时)" if name else "实验室平均在场人数"
+        ax.set_title(f"{title} 第{weeks[0]}-{weeks[-1]}周", fontsize=14, fontweight='bold')
+        fig.colorbar(image, ax=ax)
+        plt.tight_layout()
+
+        os.makedirs(self.plot_dir, exist_ok=True)
+        plt.savefig(plot_path, dpi=300, bbox_inches='tight')
+        plt.close(fig)
+        json_codec.dump({"signature": signature}, signature_path)
+        return plot_path
@@ -0,0 +1,119 @@
+"""
+流式解析管道: 页面文件 -> 记录 -> 变换 -> 输出(Excel)
+
+每一级都是生成器: 串行解码时同一时刻只持有一个页面的数据(并行时最多 workers * 2 个页面),
+内存占用与表格总行数无关; use_store=True 时记录会留在 SMCLabRecordStore 中, 不再有这个保证。
+典型用法:
+    records = iter_records(SeminarRecord, file_list)
+    records = map_records(clean, records)
+    run_pipeline(records, [ExcelSink(path, headers)])
+"""
+import os
+from typing import Callable, Iterable, Iterator, List, Type
+
+from openpyxl import Workbook
+
+from .bitable_records import SMCLabBitableRecord, SMCLabRecordStore, iter_decoded_pages, resolve_workers
+from ..common import json_codec
+
+
+def iter_pages(file_list: Iterable[str]) -> Iterator[dict]:
+    """逐个读取页面文件, 读完一个再读下一个"""
+    for file_path in file_list:
+        yield json_codec.load(file_path)
+
+
+def iter_records(record_cls: Type[SMCLabBitableRecord],
+                 file_list: Iterable[str],
+                 use_store: bool = False,
+                 workers: int = None) -> Iterator[SMCLabBitableRecord]:
+    """
+    逐条产出解码后的记录
+
+    Args:
+        record_cls: 记录类型
+        file_list: 页面文件列表(按顺序)
+        use_store: 是否经过 SMCLabRecordStore (会缓存所有页面的记录, 适合被多个消费者共享的小表)
+        workers: 并行解码的进程数, None 表示串行, 0 表示使用全部CPU; 输出顺序与串行一致
+    """
+    if use_store:
+        for file_path in file_list:
+            yield from SMCLabRecordStore.load_page(record_cls, file_path)
+        return
+    file_list = list(file_list)
+    workers = resolve_workers(workers, len(file_list))
+    if workers > 1:
+        for _, page_records in iter_decoded_pages(record_cls, file_list, workers):
+            yield from page_records
+        return
+    for page in iter_pages(file_list):
+        for item in page.get(record_cls.ITEMS_KEY) or []:
+            yield record_cls.from_item(item)
+
+
+def map_records(func: Callable, records: Iterable) -> Iterator:
+    """逐条变换"""
+    for record in records:
+        yield func(record)
+
+
+class ExcelSink:
+    """以 write_only 模式逐行写入Excel, 不在内存中保留整张表"""
+
+    def __init__(self, output_path: str, headers: List[str], title: str = None,
+                 row_func: Callable = None):
+        self.output_path = output_path
+        self.headers = headers
+        self.row_func = row_func
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(title)
+        self._ws.append(headers)
+
+    def write(self, record):
+        if self.row_func is not None:
+            self._ws.append(self.row_func(record))
+        elif isinstance(record, dict):
+            self._ws.append([record.get(h) for h in self.headers])
+        else:
+            self._ws.append(record.to_row(self.headers))
+
+    def close(self):
+        """先保存到临时文件, 成功后再替换目标文件"""
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        root, ext = os.path.splitext(self.output_path)
+        tmp_path = f"{root}.tmp{ext}"
+        try:
+            self._wb.save(tmp_path)
+            os.replace(tmp_path, self.output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._wb = self._ws = None
+
+    def abort(self):
+        """丢弃已写入的行, 已有的输出文件保持不变"""
+        # 结束工作表的写入流(临时文件由openpyxl在退出时清理), 不保存工作簿
+        self._ws.close()
+        self._wb = self._ws = None
+
+
+def run_pipeline(records: Iterable, sinks: List) -> int:
+    """
+    把记录逐条分发给所有输出端, 结束后关闭输出端; 出错时放弃写入
+
+    Returns:
+        int: 处理的记录条数
+    """
+    count = 0
+    try:
+        for record in records:
+            for sink in sinks:
+                sink.write(record)
+            count += 1
+    except BaseException:
+        for sink in sinks:
+            sink.abort()
+        raise
+    for sink in sinks:
+        sink.close()
+    return count
@@ -1,4 +1,6 @@
-import json, os, glob
+import os, glob
+import hashlib
+import threading
 import pandas as pd
 from collections import defaultdict
 from pathlib import Path
@@ -8,6 +10,11 @@ from openpyxl.styles import PatternFill
 
 from ..common.baseparser import SMCLabBaseParser
 from ..config import Config
+from .bitable_records import ScheduleRecord, MAX_WEEKS
+from .record_pipeline import iter_records
+from .member_index import SMCLabMemberInterner
+from .availability_index import SMCLabAvailabilityIndex
+from ..common import json_codec
 
 # 上午/下午/晚上 时段底色（浅绿→深绿）
 PERIOD_FILLS = {
@@ -20,6 +27,12 @@ COUNT_COLOR_LIGHT = (0xE7, 0xF5, 0xFE)  # #E7F5FE
 COUNT_COLOR_DEEP = (0x87, 0xCE, 0xFA)   # #87CEFA
 
 class SMCLabScheduleParser(SMCLabBaseParser):
+    # 进程内共享的课表模型: 输入哈希 -> 模型, 所有导出函数都从同一个模型渲染
+    _model_cache = {}
+    # 课表位图索引: (输入哈希, 周次) -> SMCLabAvailabilityIndex, 与模型分开缓存
+    _index_cache = {}
+    _model_lock = threading.Lock()
+
     def __init__(self, config: Config = None):
         if config is None:
             config = Config()
@@ -46,28 +59,111 @@ class SMCLabScheduleParser(SMCLabBaseParser):
         """返回所有时段元组列表 [('上午','第1节'), ('上午','第2节'), ...]"""
         return [(p, s) for p in self.time_table for s in self.time_table[p]]
 
-    def _collect_schedule(self):
-        """提取每个工作日每节课的上课同学名单"""
+    def _raw_file_list(self):
         file_list = sorted(glob.glob(os.path.join(self.raw_data_path, "*schedule_raw*.json")))
         if not file_list:
-            raise FileNotFoundError(f"未在 {self.raw_data_path} 中找到任何 schedule*.json 文件")
-        raw_file = file_list[0]
-        if not os.path.exists(raw_file):
-            raise RuntimeError(f"未找到 {raw_file}, 请先运行 SMCLabScheduleCrawler 下载数据")
-        with open(raw_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)["items"]
-
-        schedule = {day: defaultdict(list) for day in self.days}
-        for item in data:
-            fields = item.get("fields", {})
-            name = fields.get("姓名", [{}])[0].get("text", "未知")
+            raise FileNotFoundError(f"未在 {self.raw_data_path} 中找到任何 schedule*.json 文件, 请先运行 SMCLabScheduleCrawler 下载数据")
+        return file_list
+
+    @staticmethod
+    def _input_hash(file_list) -> str:
+        """由所有页面文件的路径、mtime和大小计算输入哈希"""
+        sha1 = hashlib.sha1()
+        for file_path in file_list:
+            stat = os.stat(file_path)
+            sha1.update(f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}\n".encode("utf-8"))
+        return sha1.hexdigest()
+
+    def _schedule_model(self) -> dict:
+        """
+        课表模型(读取全部页面, 按输入哈希缓存, 请勿修改返回值)
+
+        Returns:
+            dict: {
+                "by_slot": {星期: {"上午-第1节": [姓名, ...]}},
+                "by_period": {星期: {"上午": [排序后的姓名, ...], "下午": [...], "晚上": [...]}},
+                "by_week": {周次: {星期: {"上午-第1节": [姓名, ...]}}},
+            }
+            by_slot/by_period 不区分周次(只要某周有课即算有课), by_week 按课程的周次范围和单双周逐周展开
+        """
+        file_list = self._raw_file_list()
+        key = self._input_hash(file_list)
+        with self._model_lock:
+            model = self._model_cache.get(key)
+        if model is not None:
+            return model
+
+        weeks = range(1, MAX_WEEKS + 1)
+        by_slot = {day: defaultdict(list) for day in self.days}
+        by_period = {day: {period: set() for period in self.time_table} for day in self.days}
+        by_week = {week: {day: defaultdict(list) for day in self.days} for week in weeks}
+        people = 0
+        # 模型本身按输入哈希缓存, 记录不需要再经过记录缓存
+        for record in iter_records(ScheduleRecord, file_list, workers=self._parse_workers):
+            people += 1
             for day in self.days:
-                slots = fields.get(day, [])
-                for slot in slots:
-                    if "（当天无课程" in slot or "(当天无课程" in slot:
-                        continue
-                    schedule[day][slot].append(name)
-        return schedule
+                for slot in record.slots.get(day, ()):
+                    by_slot[day][slot].append(record.name)
+                    by_period[day][slot.split("-")[0]].add(record.name)
+                    week_mask = record.week_mask(day, slot)
+                    for week in weeks:
+                        if week_mask >> week & 1:
+                            by_week[week][day][slot].append(record.name)
+        model = {
+            "by_slot": {day: dict(slots) for day, slots in by_slot.items()},
+            "by_period": {d: {p: sorted(v) for p, v in ps.items()} for d, ps in by_period.items()},
+            "by_week": {w: {day: dict(slots) for day, slots in days.items()} for w, days in by_week.items()},
+        }
+        self.logger.info("课表模型已构建: %d 人, 来自 %d 个 JSON 文件", people, len(file_list))
+        with self._model_lock:
+            # 只保留最新输入对应的模型
+            self._model_cache.clear()
+            self._model_cache[key] = model
+        return model
+
+    def availability_index(self, week: int = None) -> SMCLabAvailabilityIndex:
+        """
+        按 (星期, 具体课时) 编译的课表位图索引, 也支持按半天查询
+
+        Args:
+            week: 周次, None 表示不区分周次; 每个周次的索引只编译一次
+        """
+        input_hash = self._input_hash(self._raw_file_list())
+        with self._model_lock:
+            index = self._index_cache.get((input_hash, week))
+        if index is not None:
+            return index
+        model = self._schedule_model()
+        by_slot = model["by_slot"] if week is None else model["by_week"].get(week, {})
+        # 时段按 星期 x 课表顺序 排列, 没人上课的课时也占一位
+        schedule = {day: {f"{p}-{s}": by_slot.get(day, {}).get(f"{p}-{s}", []) for p, s in self._all_slots()}
+                    for day in self.days}
+        interner = SMCLabMemberInterner.get(self._year_semester, self._sem_data_path)
+        index = SMCLabAvailabilityIndex.from_schedule(schedule, interner)
+        with self._model_lock:
+            # 只保留最新输入对应的索引
+            for key in [k for k in self._index_cache if k[0] != input_hash]:
+                del self._index_cache[key]
+            index = self._index_cache.setdefault((input_hash, week), index)
+        return index
+
+    def _collect_schedule(self):
+        """提取每个工作日每节课的上课同学名单"""
+        return self._schedule_model()["by_slot"]
+
+    def _slot_rows(self, cell_func):
+        """按 节段 x 星期 生成表格行, cell_func(names) 决定单元格内容"""
+        schedule = self._collect_schedule()
+        records = []
+        row_periods = []  # 每行对应的时段（上午/下午/晚上）
+        for period, sub in self.time_table.items():
+            for section, (start, end) in sub.items():
+                row = {"上课节段": f"{period}-{section}", "时间": f"{start}-{end}"}
+                for day in self.days:
+                    row[day] = cell_func(schedule[day].get(f"{period}-{section}", []))
+                records.append(row)
+                row_periods.append(period)
+        return records, row_periods
 
     def _count_fill(self, value: int, value_max: int) -> PatternFill:
         """按人数在浅蓝到深蓝之间插值得到底色。value_max 为 0 时用浅蓝。"""
@@ -83,17 +179,7 @@ class SMCLabScheduleParser(SMCLabBaseParser):
 
     def make_schedule_count_xlsx(self):
         output_path = os.path.join(self.sem_path, "schedule_count.xlsx")
-        schedule = self._collect_schedule()
-        records = []
-        row_periods = []  # 每行对应的时段（上午/下午/晚上）
-        for period, sub in self.time_table.items():
-            for section, (start, end) in sub.items():
-                row = {"上课节段": f"{period}-{section}", "时间": f"{start}-{end}"}
-                for day in self.days:
-                    names = schedule[day].get(f"{period}-{section}", [])
-                    row[day] = len(names)
-                records.append(row)
-                row_periods.append(period)
+        records, row_periods = self._slot_rows(len)
         df = pd.DataFrame(records)
         df.to_excel(output_path, index=False, engine="openpyxl")
 
@@ -116,15 +202,7 @@ class SMCLabScheduleParser(SMCLabBaseParser):
 
     def make_schedule_names_xlsx(self):
         output_path = os.path.join(self.sem_path, "schedule_names.xlsx")
-        schedule = self._collect_schedule()
-        records = []
-        for period, sub in self.time_table.items():
-            for section, (start, end) in sub.items():
-                row = {"上课节段": f"{period}-{section}", "时间": f"{start}-{end}"}
-                for day in self.days:
-                    names = schedule[day].get(f"{period}-{section}", [])
-                    row[day] = ",".join(names)
-                records.append(row)
+        records, _ = self._slot_rows(",".join)
         df = pd.DataFrame(records)
         df.to_excel(output_path, index=False)
         self.logger.info("课时姓名表已保存: %s", Path(output_path).absolute())
@@ -132,20 +210,26 @@ class SMCLabScheduleParser(SMCLabBaseParser):
     def make_schedule_by_slot_json(self):
         output_path = os.path.join(self.sem_path, "schedule_by_slot.json")
         schedule = self._collect_schedule()
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(schedule, f, ensure_ascii=False, indent=4)
+        json_codec.dump(schedule, output_path)
         self.logger.info("每节课学生名单JSON已保存: %s", Path(output_path).absolute())
 
     def make_period_summary_json(self):
         output_path = os.path.join(self.sem_path, "schedule_by_period.json")
-        schedule = self._collect_schedule()
-        summary = {day: {"上午": set(), "下午": set(), "晚上": set()} for day in self.days}
-        for day in self.days:
-            for slot, names in schedule[day].items():
-                period, _ = slot.split("-")
-                summary[day][period].update(names)
-        # 转换为列表形式
-        summary = {d: {p: sorted(list(v)) for p, v in ps.items()} for d, ps in summary.items()}
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(summary, f, ensure_ascii=False, indent=4)
+        summary = self._schedule_model()["by_period"]
+        json_codec.dump(summary, output_path)
         self.logger.info("每日三时段学生名单JSON已保存: %s", Path(output_path).absolute())
+
+    def make_schedule_by_week_json(self):
+        output_path = os.path.join(self.sem_path, "schedule_by_week.json")
+        by_week = {str(week): days for week, days in self._schedule_model()["by_week"].items()}
+        json_codec.dump(by_week, output_path)
+        self.logger.info("逐周每节课学生名单JSON已保存: %s", Path(output_path).absolute())
+
+    def export_all(self):
+        """一次解析, 导出全部课表文件"""
+        self._schedule_model()
+        self.make_schedule_count_xlsx()
+        self.make_schedule_names_xlsx()
+        self.make_schedule_by_slot_json()
+        self.make_period_summary_json()
+        self.make_schedule_by_week_json()
@@ -0,0 +1,143 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from ..utils import get_semester_start_date
+from ..common import json_codec
+
+
+class SMCLabSeminarCalendar:
+    """
+    学期组会日历(进程内共享)
+
+    由 seminar_information.json 编译出 周次 -> 组会 和 日期 -> 组会 的索引,
+    每次查询前只比较文件的mtime/大小, 文件变化后才重新读取。
+    同一学期的所有使用者(考勤爬虫、考勤解析、消息发送等)共用同一个实例。
+    """
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, semester: str, seminar_info_path: str):
+        self.semester = semester
+        self.seminar_info_path = seminar_info_path
+        # 上一次读取时的文件签名, False 表示还没有读取过
+        self._signature = False
+        self._sem_start_date = None
+        # 周次 -> 该周的组会记录(文件中的顺序)
+        self._by_week: Dict[int, List[dict]] = {}
+        # 日期整数(YYYYMMDD) -> 该日期的组会记录
+        self._by_date: Dict[int, List[dict]] = {}
+        # prefer_happened -> {"周次": 星期}
+        self._weekday_maps: Dict[bool, Dict[str, int]] = {}
+
+    @classmethod
+    def get(cls, semester: str, sem_data_path: str = "data_sem") -> "SMCLabSeminarCalendar":
+        """获取某学期的组会日历"""
+        seminar_info_path = os.path.join(sem_data_path, semester, "seminar_information.json")
+        key = os.path.abspath(seminar_info_path)
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(semester, seminar_info_path)
+            return cls._instances[key]
+
+    def _refresh(self):
+        """文件变化时重新编译索引"""
+        if os.path.exists(self.seminar_info_path):
+            stat = os.stat(self.seminar_info_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        else:
+            signature = None
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            seminars = json_codec.load(self.seminar_info_path) if signature else []
+            if not isinstance(seminars, list):
+                seminars = []
+            by_week, by_date = {}, {}
+            for seminar in seminars:
+                week = seminar.get("week")
+                if week is None:
+                    continue
+                by_week.setdefault(int(week), []).append(seminar)
+                weekday = seminar.get("weekday")
+                if weekday is not None:
+                    by_date.setdefault(self._date_int(int(week), int(weekday)), []).append(seminar)
+            self._by_week, self._by_date = by_week, by_date
+            self._weekday_maps = {}
+            self._signature = signature
+
+    def _date_int(self, week: int, weekday: int) -> int:
+        if self._sem_start_date is None:
+            self._sem_start_date = get_semester_start_date(self.semester)
+        date = self._sem_start_date + timedelta(days=(week - 1) * 7 + weekday - 1)
+        return int(date.strftime("%Y%m%d"))
+
+    def seminars_of_week(self, week: int) -> List[dict]:
+        """某周的所有组会记录(可能同时有已发生和未发生的)"""
+        self._refresh()
+        return self._by_week.get(int(week), [])
+
+    def seminar_of_week(self, week: int, prefer_happened: bool = False) -> Optional[dict]:
+        """某周的组会记录, 有多条时按 prefer_happened 选择"""
+        seminars = self.seminars_of_week(week)
+        if not seminars:
+            return None
+        if prefer_happened:
+            for seminar in reversed(seminars):
+                if seminar.get("happened", False):
+                    return seminar
+            return seminars[-1]
+        return seminars[0]
+
+    def weekday_of(self, week: int, prefer_happened: bool = False) -> Optional[int]:
+        """某周组会在星期几(1=周一), 没有组会时返回None"""
+        return self.weekday_map(prefer_happened).get(str(week))
+
+    def room_of(self, week: int) -> str:
+        seminar = self.seminar_of_week(week)
+        return seminar.get("room", "") if seminar else ""
+
+    def presenters_of(self, week: int) -> List[str]:
+        seminar = self.seminar_of_week(week)
+        if not seminar:
+            return []
+        return [p.get("presenter", "") for p in seminar.get("presentations", [])]
+
+    def seminar_on(self, date) -> Optional[dict]:
+        """
+        某天的组会记录
+
+        Args:
+            date: 日期整数/字符串(YYYYMMDD)或datetime
+        """
+        self._refresh()
+        if isinstance(date, datetime):
+            date = date.strftime("%Y%m%d")
+        seminars = self._by_date.get(int(date), [])
+        return seminars[0] if seminars else None
+
+    def weekday_map(self, prefer_happened: bool = False) -> Dict[str, int]:
+        """
+        周数对应的星期几, 如 {"4": 3, "5": 4}
+
+        Args:
+            prefer_happened: 同一周有多条记录时是否优先使用已发生的组会, 否则使用第一次遇到的
+        """
+        self._refresh()
+        weekday_map = self._weekday_maps.get(prefer_happened)
+        if weekday_map is None:
+            weekday_map = {}
+            for week, seminars in self._by_week.items():
+                candidates = [s for s in seminars if s.get("weekday") is not None]
+                if not candidates:
+                    continue
+                if prefer_happened:
+                    happened = [s for s in candidates if s.get("happened", False)]
+                    weekday_map[str(week)] = (happened or candidates)[-1]["weekday"]
+                else:
+                    weekday_map[str(week)] = candidates[0]["weekday"]
+            self._weekday_maps[prefer_happened] = weekday_map
+        return weekday_map
@@ -1,4 +1,3 @@
-import json
 import os
 import pandas as pd
 from datetime import datetime
@@ -7,6 +6,13 @@ from typing import List, Dict, Optional
 from ..common.baseparser import SMCLabBaseParser
 from ..utils import TimeParser, get_semester_start_date
 from ..config import Config
+from .bitable_parser import SMCLabSeminarParser
+from .bitable_records import SeminarRecord
+from .seminar_calendar import SMCLabSeminarCalendar
+from .seminar_store import SMCLabSeminarStore
+from .seminar_search import SMCLabSeminarSearchIndex
+from .seminar_minhash import SMCLabTopicDedupIndex
+from ..common import json_codec
 
 
 class SMCLabSeminarManager(SMCLabBaseParser):
@@ -24,30 +30,36 @@ class SMCLabSeminarManager(SMCLabBaseParser):
         super().__init__(config)
         # 学期文件夹路径
         self.this_sem_path = os.path.join(self._sem_data_path, self._year_semester)
-        # JSON文件路径
-        self.json_file_path = os.path.join(self.this_sem_path, "seminar_information.json")
+        # 组会存储: seminar_information.json 为数据源, 没有变化时不重写
+        self.store = SMCLabSeminarStore(self.this_sem_path, self.logger)
+        self.json_file_path = self.store.source_path
         # Excel文件路径
         self.excel_file_path = os.path.join(self.this_sem_path, "seminar_information.xlsx")
         # 学期起始日期
         self.sem_start_date = get_semester_start_date(self._year_semester)
+        # 组会多维表格的原始记录由它读取(与其他解析器共享记录缓存)
+        self.seminar_parser = SMCLabSeminarParser(config)
+        # 跨学期的组会全文索引(进程内共享)
+        self.search_index = SMCLabSeminarSearchIndex.get(self._sem_data_path)
+        # 跨学期的报告主题MinHash签名(近重复检测)
+        self.topic_index = SMCLabTopicDedupIndex.get(self._sem_data_path)
+        # 组会日历(按学期共享, 文件变化时自动失效)
+        self.calendar = SMCLabSeminarCalendar.get(self._year_semester, self._sem_data_path)
     
-    def load_from_excel(self) -> pd.DataFrame:
+    def load_records(self) -> List[SeminarRecord]:
         """
-        从Excel文件读取组会信息
+        直接读取爬取到的组会多维表格记录
         
         Returns:
-            pd.DataFrame: 包含组会信息的DataFrame，列包括：姓名、上次讲组会时间、近期预期、是否确认、会议室、顺序、分享主题、摘要
+            list: SeminarRecord 列表
             
         Raises:
-            FileNotFoundError: 如果Excel文件不存在
+            FileNotFoundError: 如果没有原始记录文件
         """
-        if not os.path.exists(self.excel_file_path):
-            raise FileNotFoundError(f"Excel文件不存在: {self.excel_file_path}")
-        
-        df = pd.read_excel(self.excel_file_path)
-        self.logger.info(f"成功从Excel文件读取 {len(df)} 条组会记录")
-        return df
-    
+        records = self.seminar_parser._get_info_from_raw_data()
+        self.logger.info(f"成功读取 {len(records)} 条组会记录")
+        return records
+
     def _date_to_datetime(self, date_value) -> Optional[datetime]:
         """
         将日期值转换为datetime对象
@@ -111,32 +123,12 @@ class SMCLabSeminarManager(SMCLabBaseParser):
         
         return week, weekday
     
-    def _group_by_date(self, records: List[Dict]) -> Dict[int, List[Dict]]:
-        """
-        将记录按日期分组
-        
-        Args:
-            records: 记录列表，每个记录包含日期信息
-            
-        Returns:
-            dict: 键为日期整数（YYYYMMDD格式），值为该日期的记录列表
-        """
-        grouped = {}
-        for record in records:
-            date_obj = record.get('date_obj')
-            if date_obj:
-                date_int = int(date_obj.strftime("%Y%m%d"))
-                if date_int not in grouped:
-                    grouped[date_int] = []
-                grouped[date_int].append(record)
-        return grouped
-    
     def _convert_record_to_presentation(self, record: Dict) -> Dict:
         """
-        将Excel记录转换为presentation格式
+        将一条组会记录转换为presentation格式
         
         Args:
-            record: Excel记录字典
+            record: SeminarRecord.to_dict() 得到的记录字典
             
         Returns:
             dict: presentation字典，包含presenter, track, title, abstract
@@ -160,167 +152,117 @@ class SMCLabSeminarManager(SMCLabBaseParser):
     
     def _load_existing_json(self) -> List[Dict]:
         """
-        加载现有的JSON文件
+        加载现有的组会信息(seminar_information.json)
         
         Returns:
-            list: 现有的组会信息列表，如果文件不存在则返回空列表
+            list: 现有的组会信息列表，如果没有数据则返回空列表
         """
-        if os.path.exists(self.json_file_path):
-            try:
-                with open(self.json_file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data if isinstance(data, list) else []
-            except Exception as e:
-                self.logger.warning(f"加载现有JSON文件失败: {e}，将创建新文件")
-                return []
-        return []
+        try:
+            return self.store.load_all()
+        except Exception as e:
+            self.logger.warning(f"加载现有组会信息失败: {e}")
+            return []
     
-    def _save_to_json(self, seminar_list: List[Dict]):
+    def _parse_seminars_from_records(self, records: List[SeminarRecord]) -> tuple:
         """
-        保存组会信息到JSON文件
+        一次遍历原始记录, 同时得到已完成和将要开始的组会
         
-        Args:
-            seminar_list: 组会信息列表
-        """
-        os.makedirs(self.this_sem_path, exist_ok=True)
-        with open(self.json_file_path, 'w', encoding='utf-8') as f:
-            json.dump(seminar_list, f, ensure_ascii=False, indent=2)
-        self.logger.info(f"组会信息已保存到: {self.json_file_path}")
-    
-    def _parse_seminars_from_df(self, df: pd.DataFrame, date_column: str, happened: bool) -> List[Dict]:
-        """
-        从DataFrame解析组会信息
+        "上次讲组会时间" 在本学期起始日期之后的记录归入已完成的组会,
+        "近期预期" 在本学期起始日期之后的记录归入将要开始的组会, 同一条记录可以同时出现在两边。
         
         Args:
-            df: 包含组会信息的DataFrame
-            date_column: 日期列名（"上次讲组会时间" 或 "近期预期"）
-            happened: 是否已发生
+            records: SeminarRecord 列表
             
         Returns:
-            list: 组会信息列表
+            tuple: (已完成的组会列表, 将要开始的组会列表)
         """
-        seminars = []
-        
-        # 筛选有效记录
-        valid_records = []
-        for _, row in df.iterrows():
-            date_value = row.get(date_column)
-            date_obj = self._date_to_datetime(date_value)
-            
-            # 只处理在本学期起始日期之后的记录
-            if date_obj and date_obj >= self.sem_start_date:
-                record = row.to_dict()
-                record['date_obj'] = date_obj
-                valid_records.append(record)
-        
-        if not valid_records:
-            self.logger.info(f"未找到符合条件（{date_column} >= 学期起始日期）的记录")
-            return seminars
-        
-        # 按日期分组
-        grouped_records = self._group_by_date(valid_records)
-        
-        # 为每个日期创建组会记录
-        for date_int, records in grouped_records.items():
-            # 获取第一条记录的日期信息（同一日期的记录应该有相同的日期）
-            date_obj = records[0]['date_obj']
-            week, weekday = self._calculate_week_and_weekday(date_obj)
-            
-            # 获取会议室信息（通常同一日期的记录应该有相同的会议室）
-            room = ""
-            for record in records:
-                room_value = record.get("会议室", "")
-                if pd.notna(room_value) and room_value:
-                    room = str(room_value)
-                    break
-            
-            # 转换为presentations格式
-            presentations = []
-            for record in sorted(records, key=lambda x: x.get("顺序", 999) if pd.notna(x.get("顺序")) else 999):
-                presentation = self._convert_record_to_presentation(record)
-                presentations.append(presentation)
-            
-            # 创建组会记录
-            seminar = {
-                "week": week,
-                "weekday": weekday,
-                "happened": happened,
-                "room": room,
-                "presentations": presentations
-            }
-            seminars.append(seminar)
-        
-        self.logger.info(f"解析到 {len(seminars)} 个组会记录（happened={happened}）")
-        return seminars
-    
+        # (是否已发生, 日期整数) -> 该日期的记录
+        grouped = {True: {}, False: {}}
+        for record in records:
+            for date_value, happened in ((record.last_seminar_date, True), (record.next_seminar_date, False)):
+                date_obj = self._date_to_datetime(date_value)
+                if date_obj and date_obj >= self.sem_start_date:
+                    date_int = int(date_obj.strftime("%Y%m%d"))
+                    grouped[happened].setdefault(date_int, (date_obj, []))[1].append(record)
+        
+        results = []
+        for happened in (True, False):
+            seminars = []
+            for date_obj, date_records in grouped[happened].values():
+                week, weekday = self._calculate_week_and_weekday(date_obj)
+                # 同一日期的记录应该有相同的会议室, 取第一个非空的
+                room = next((str(r.room) for r in date_records if r.room), "")
+                presentations = [
+                    self._convert_record_to_presentation(r.to_dict())
+                    for r in sorted(date_records, key=lambda r: r.track if r.track is not None else 999)
+                ]
+                seminars.append({
+                    "week": week,
+                    "weekday": weekday,
+                    "happened": happened,
+                    "room": room,
+                    "presentations": presentations
+                })
+            self.logger.info(f"解析到 {len(seminars)} 个组会记录（happened={happened}）")
+            results.append(seminars)
+        return results[0], results[1]
+
     def parse_past_seminars(self) -> List[Dict]:
         """
-        解析已完成的组会信息：根据"上次讲组会时间"字段大于本学期起始时间的行，收录进JSON文件
+        解析已完成的组会信息：根据"上次讲组会时间"字段大于本学期起始时间的记录，收录进JSON文件
         
         Returns:
             list: 已完成的组会信息列表
         """
-        df = self.load_from_excel()
-        seminars = self._parse_seminars_from_df(df, "上次讲组会时间", happened=True)
-        return seminars
+        return self._parse_seminars_from_records(self.load_records())[0]
     
     def parse_upcoming_seminars(self) -> List[Dict]:
         """
-        解析将要开始的组会信息：根据"近期预期"字段大于本学期起始时间的行，收录进JSON文件
+        解析将要开始的组会信息：根据"近期预期"字段大于本学期起始时间的记录，收录进JSON文件
         与parse_past_seminars相同，但happened字段为False
         
         Returns:
             list: 将要开始的组会信息列表
         """
-        df = self.load_from_excel()
-        seminars = self._parse_seminars_from_df(df, "近期预期", happened=False)
-        return seminars
+        return self._parse_seminars_from_records(self.load_records())[1]
     
-    def update_seminar_schedule(self, merge: bool = True):
+    def update_seminar_schedule(self, merge: bool = True, export_excel: bool = False):
         """
-        更新组会信息JSON文件，合并已完成的组会和将要开始的组会
+        更新组会信息，合并已完成的组会和将要开始的组会
+        (只合并本次出现的周, 内容没有变化时不重写 seminar_information.json)
         
         Args:
             merge: 是否与现有数据合并，如果为False则完全替换
+            export_excel: 是否同时导出 seminar_information.xlsx (仅供查看, 不参与解析)
         """
-        # 解析已完成的组会
-        past_seminars = self.parse_past_seminars()
+        # 一次遍历原始记录, 同时解析已完成和将要开始的组会
+        records = self.load_records()
+        past_seminars, upcoming_seminars = self._parse_seminars_from_records(records)
+        if export_excel:
+            self.seminar_parser.save_info_to_excel(self.excel_file_path)
         
-        # 解析将要开始的组会
-        upcoming_seminars = self.parse_upcoming_seminars()
-        
-        # 合并所有组会
+        # 合并所有组会, 只重写内容发生变化的周
         all_seminars = past_seminars + upcoming_seminars
+        os.makedirs(self.this_sem_path, exist_ok=True)
+        changed_weeks = self.store.upsert(all_seminars, replace=not merge)
+        if changed_weeks:
+            self.logger.info(f"组会信息已更新, 变化的周次: {changed_weeks}")
+            # 全文索引只重新索引变化的周
+            reindexed = self.search_index.update(self._year_semester)
+            self.logger.info(f"组会全文索引已更新: {reindexed}")
+            self.topic_index.update(self._year_semester)
+        else:
+            self.logger.info("组会信息没有变化")
+        self._flag_overlapping_topics(upcoming_seminars)
         
-        if merge:
-            # 加载现有数据
-            existing_seminars = self._load_existing_json()
-            # 创建现有数据的索引（按week, weekday, happened）
-            existing_index = {
-                (s.get("week"), s.get("weekday"), s.get("happened")): s
-                for s in existing_seminars
-            }
-            
-            # 更新或添加新数据
-            for seminar in all_seminars:
-                key = (seminar.get("week"), seminar.get("weekday"), seminar.get("happened"))
-                existing_index[key] = seminar
-            
-            # 转换回列表并排序
-            all_seminars = list(existing_index.values())
-        
-        # 按周数和星期几排序
-        all_seminars.sort(key=lambda x: (x.get("week", 0), x.get("weekday", 0)))
-        
-        # 保存到JSON
-        self._save_to_json(all_seminars)
-        
-        self.logger.info(f"共更新 {len(all_seminars)} 个组会记录")
+        all_seminars = self._load_existing_json()
+        self.logger.info(f"共 {len(all_seminars)} 个组会记录")
         return all_seminars
     
     def get_seminar_weekday_map(self, prefer_happened: bool = False) -> Dict[str, int]:
         """
         读取seminar_information.json文件，返回周数对应的星期几的字典
+        (由进程内共享的 SMCLabSeminarCalendar 提供, 文件不变时不会重复读取)
         
         Args:
             prefer_happened: 如果同一周有多条记录（已发生和未发生），是否优先使用已发生的组会
@@ -330,36 +272,69 @@ class SMCLabSeminarManager(SMCLabBaseParser):
             dict: 键为周数（字符串格式），值为星期几（1=周一，7=周日）
                   例如：{"4": 3, "5": 4} 表示第4周在周三，第5周在周四
         """
-        seminars = self._load_existing_json()
-        weekday_map = {}
+        return self.calendar.weekday_map(prefer_happened)
+
+    def search_seminars(self, query: str, top_k: int = 10, semester: Optional[str] = None) -> List[Dict]:
+        """
+        在所有学期的组会报告中检索(报告人、题目、摘要), 按相关度排序
         
-        # 如果优先使用已发生的，先处理未发生的，再处理已发生的（后面的会覆盖前面的）
-        # 如果不优先，直接按顺序处理（第一次遇到的就保留）
-        if prefer_happened:
-            # 先处理未发生的
-            for seminar in seminars:
-                week = seminar.get("week")
-                weekday = seminar.get("weekday")
-                if week is not None and weekday is not None and not seminar.get("happened", False):
-                    weekday_map[str(week)] = weekday
+        Args:
+            query: 查询, 如 "LLM serving"、"大模型推理"、报告人姓名
+            top_k: 最多返回多少条
+            semester: 只检索某个学期, 如 "2025-Fall"
             
-            # 再处理已发生的（会覆盖未发生的）
-            for seminar in seminars:
-                week = seminar.get("week")
-                weekday = seminar.get("weekday")
-                if week is not None and weekday is not None and seminar.get("happened", False):
-                    weekday_map[str(week)] = weekday
-        else:
-            # 按顺序处理，第一次遇到的保留
-            for seminar in seminars:
-                week = seminar.get("week")
-                weekday = seminar.get("weekday")
-                if week is not None and weekday is not None:
-                    week_str = str(week)
-                    if week_str not in weekday_map:
-                        weekday_map[week_str] = weekday
+        Returns:
+            list: [{"score", "semester", "week", "weekday", "presenter", "title", ...}, ...]
+        """
+        # 首次使用或有学期文件在其他地方更新时, 补齐索引
+        self.search_index.update()
+        return self.search_index.search(query, top_k, semester)
+
+    def check_topic_overlap(self, title: str, abstract: str = "", threshold: float = 0.5,
+                            top_k: int = 5, exclude_week: Optional[int] = None) -> List[Dict]:
+        """
+        检查一个新提交的分享主题/摘要是否与历史报告高度重合
         
-        # self.logger.info(f"成功读取组会星期映射，共 {len(weekday_map)} 周")
-        return weekday_map
+        Args:
+            title: 分享主题
+            abstract: 摘要
+            threshold: 相似度(估计的Jaccard系数)下限
+            top_k: 最多返回多少条
+            exclude_week: 本学期的周次, 排除该周自身的记录
+            
+        Returns:
+            list: [{"similarity", "semester", "week", "presenter", "title"}, ...]
+        """
+        self.topic_index.update()
+        exclude = (self._year_semester, exclude_week) if exclude_week is not None else None
+        return self.topic_index.similar(title, abstract, threshold, top_k, exclude)
 
-    
\ No newline at end of file
+    def _flag_overlapping_topics(self, upcoming_seminars: List[Dict], threshold: float = 0.5) -> Dict[str, List[Dict]]:
+        """
+        检查将要开始的组会中与历史报告重合的主题, 记录警告
+        
+        Returns:
+            dict: {报告人: 相似的历史报告列表}
+        """
+        flagged = {}
+        self.topic_index.update()
+        for seminar in upcoming_seminars:
+            for presentation in seminar.get("presentations", []):
+                if not presentation.get("title") and not presentation.get("abstract"):
+                    continue
+                presenter = presentation.get("presenter", "")
+                # 该周的记录和同一报告已发生的记录都不算重合
+                similar = self.topic_index.similar(presentation.get("title", ""),
+                                                   presentation.get("abstract", ""),
+                                                   threshold,
+                                                   exclude=(self._year_semester, seminar.get("week")),
+                                                   exclude_talk=(presenter, presentation.get("title", "")))
+                if similar:
+                    flagged[presenter] = similar
+                    for item in similar:
+                        self.logger.warning(
+                            f"第{seminar.get('week')}周 {presenter} 的主题《{presentation.get('title', '')}》"
+                            f"与 {item['semester']} 第{item['week']}周 {item['presenter']} 的《{item['title']}》"
+                            f"相似度 {item['similarity']}"
+                        )
+        return flagged
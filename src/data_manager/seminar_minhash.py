@@ -0,0 +1,219 @@
+import os
+import zlib
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .seminar_store import SMCLabSeminarStore
+from .seminar_search import tokenize
+from ..common import json_codec
+
+# MinHash 签名长度 = 分段数 × 每段行数
+NUM_PERM = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+# 通用哈希 (a*x + b) mod p 使用的梅森素数, 乘积不会溢出uint64
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20250302)
+_PERM_A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+
+
+def shingles(text: str) -> set:
+    """相邻两个词(中文为字二元组)组成的片段集合"""
+    tokens = tokenize(text)
+    if len(tokens) < 2:
+        return set(tokens)
+    return {f"{tokens[k]} {tokens[k + 1]}" for k in range(len(tokens) - 1)}
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """
+    文本的MinHash签名
+
+    片段用crc32映射为整数(跨进程稳定), 再用 NUM_PERM 个通用哈希一次性向量化计算最小值
+    """
+    pieces = shingles(text)
+    if not pieces:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    values = np.fromiter((zlib.crc32(p.encode("utf-8")) for p in pieces),
+                         dtype=np.uint64, count=len(pieces)) % np.uint64(_PRIME)
+    hashed = (values[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) % np.uint64(_PRIME)
+    return hashed.min(axis=0)
+
+
+def _band_keys(signature: np.ndarray) -> List[str]:
+    rows = signature.reshape(LSH_BANDS, LSH_ROWS)
+    return [f"{band}:{zlib.crc32(rows[band].tobytes()):08x}" for band in range(LSH_BANDS)]
+
+
+class SMCLabTopicDedupIndex:
+    """
+    组会报告主题的近重复检测(MinHash + LSH分段)
+
+    每个历史报告(题目+摘要)保存一个 NUM_PERM 维的MinHash签名,
+    签名切成 LSH_BANDS 段, 每段落入一个桶; 新提交只和至少有一段同桶的报告比较,
+    不需要遍历全部历史。签名保存在 data_sem/seminar_minhash.json,
+    和全文索引一样按每周内容的签名增量更新。
+    """
+    INDEX_FILE = "seminar_minhash.json"
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, sem_data_path: str = "data_sem"):
+        self.sem_data_path = sem_data_path
+        self.index_path = os.path.join(sem_data_path, self.INDEX_FILE)
+        # "学期/周次" -> 该周内容的签名
+        self._week_signatures: Dict[str, int] = {}
+        # 文档id -> {"meta": {...}, "sig": [...]}
+        self._docs: Dict[str, dict] = {}
+        self._sigs: Dict[str, np.ndarray] = {}
+        # LSH桶 -> 文档id集合
+        self._buckets: Dict[str, set] = {}
+        self._load()
+
+    @classmethod
+    def get(cls, sem_data_path: str = "data_sem") -> "SMCLabTopicDedupIndex":
+        """获取进程内共享的索引"""
+        key = os.path.abspath(sem_data_path)
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(sem_data_path)
+            return cls._instances[key]
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            data = json_codec.load(self.index_path)
+        except json_codec.JSONDecodeError:
+            return
+        if data.get("num_perm") != NUM_PERM or data.get("bands") != LSH_BANDS:
+            return
+        self._week_signatures = data.get("weeks", {})
+        for doc_id, doc in data.get("docs", {}).items():
+            self._add_doc(doc_id, doc["meta"], np.asarray(doc["sig"], dtype=np.uint64))
+
+    def _save(self):
+        os.makedirs(self.sem_data_path, exist_ok=True)
+        docs = {doc_id: {"meta": doc["meta"], "sig": self._sigs[doc_id].tolist()}
+                for doc_id, doc in self._docs.items()}
+        tmp_path = self.index_path + ".tmp"
+        json_codec.dump({"num_perm": NUM_PERM, "bands": LSH_BANDS,
+                         "weeks": self._week_signatures, "docs": docs}, tmp_path)
+        os.replace(tmp_path, self.index_path)
+
+    def _add_doc(self, doc_id: str, meta: dict, signature: np.ndarray):
+        self._docs[doc_id] = {"meta": meta}
+        self._sigs[doc_id] = signature
+        for key in _band_keys(signature):
+            self._buckets.setdefault(key, set()).add(doc_id)
+
+    def _remove_week(self, week_key: str):
+        prefix = f"{week_key}/"
+        for doc_id in [d for d in self._docs if d.startswith(prefix)]:
+            del self._docs[doc_id]
+            for key in _band_keys(self._sigs.pop(doc_id)):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(doc_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def _semesters(self) -> List[str]:
+        if not os.path.isdir(self.sem_data_path):
+            return []
+        return sorted(d for d in os.listdir(self.sem_data_path)
+                      if os.path.isdir(os.path.join(self.sem_data_path, d)))
+
+    def update(self, semester: Optional[str] = None) -> List[str]:
+        """
+        增量更新签名
+
+        Args:
+            semester: 只更新该学期, None 表示 sem_data_path 下的所有学期
+
+        Returns:
+            list: 重新计算或删除的 "学期/周次"
+        """
+        semesters = [semester] if semester else self._semesters()
+        changed = []
+        with self._lock:
+            for sem in semesters:
+                store = SMCLabSeminarStore(os.path.join(self.sem_data_path, sem))
+                seen = set()
+                for week in store.weeks():
+                    week_key = f"{sem}/{week}"
+                    seen.add(week_key)
+                    signature = store.week_signature(week)
+                    if self._week_signatures.get(week_key) == signature:
+                        continue
+                    self._remove_week(week_key)
+                    # 同一报告的已发生/未发生两条记录只保留一份签名(优先已发生)
+                    talks = {}
+                    for seminar in sorted(store.load_week(week), key=lambda s: not s.get("happened", False)):
+                        for presentation in seminar.get("presentations", []):
+                            key = (presentation.get("presenter", ""), presentation.get("title", ""))
+                            if key in talks or not (key[1] or presentation.get("abstract")):
+                                continue
+                            talks[key] = (seminar, presentation)
+                    for k, (seminar, presentation) in enumerate(talks.values()):
+                        meta = {
+                            "semester": sem,
+                            "week": seminar.get("week"),
+                            "presenter": presentation.get("presenter", ""),
+                            "title": presentation.get("title", ""),
+                        }
+                        text = f"{presentation.get('title', '')} {presentation.get('abstract', '')}"
+                        self._add_doc(f"{week_key}/{k}", meta, minhash_signature(text))
+                    self._week_signatures[week_key] = signature
+                    changed.append(week_key)
+                prefix = f"{sem}/"
+                for week_key in [w for w in self._week_signatures if w.startswith(prefix)]:
+                    if week_key not in seen:
+                        self._remove_week(week_key)
+                        del self._week_signatures[week_key]
+                        changed.append(week_key)
+            if changed:
+                self._save()
+        return changed
+
+    def similar(self, title: str, abstract: str = "", threshold: float = 0.5,
+                top_k: int = 5, exclude: Optional[tuple] = None,
+                exclude_talk: Optional[tuple] = None) -> List[dict]:
+        """
+        查找与一个报告主题高度重合的历史报告
+
+        Args:
+            title: 分享主题
+            abstract: 摘要
+            threshold: 估计的Jaccard相似度下限
+            top_k: 最多返回多少条
+            exclude: (学期, 周次), 排除该周自身的记录
+            exclude_talk: (报告人, 分享主题), 排除同一个报告在其他周的记录(如推迟后再次出现)
+
+        Returns:
+            list: [{"similarity": 相似度, "semester", "week", "presenter", "title"}, ...]
+        """
+        signature = minhash_signature(f"{title} {abstract}")
+        candidates = set()
+        for key in _band_keys(signature):
+            candidates |= self._buckets.get(key, set())
+        if exclude is not None:
+            prefix = f"{exclude[0]}/{exclude[1]}/"
+            candidates = {d for d in candidates if not d.startswith(prefix)}
+        if exclude_talk is not None:
+            candidates = {d for d in candidates
+                          if (self._docs[d]["meta"]["presenter"], self._docs[d]["meta"]["title"]) != tuple(exclude_talk)}
+        if not candidates:
+            return []
+        doc_ids = list(candidates)
+        similarity = (np.stack([self._sigs[d] for d in doc_ids]) == signature).mean(axis=1)
+        order = np.argsort(-similarity, kind="stable")
+        results = []
+        for k in order[:top_k]:
+            if similarity[k] < threshold:
+                break
+            results.append(dict(self._docs[doc_ids[k]]["meta"], similarity=round(float(similarity[k]), 3)))
+        return results
@@ -0,0 +1,238 @@
+import os
+import re
+import math
+import threading
+from typing import Dict, List, Optional
+
+from .seminar_store import SMCLabSeminarStore
+from ..common import json_codec
+
+# 各字段的词频权重
+FIELD_WEIGHTS = {"presenter": 3.0, "title": 2.0, "abstract": 1.0}
+# BM25参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[㐀-鿿]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "we",
+    "with", "who", "what", "which", "when", "where", "how", "our", "these", "their",
+}
+# 按顺序尝试的后缀改写规则, 只处理第一条命中的
+_SUFFIX_RULES = (
+    ("ational", "ate"), ("ization", "ize"), ("fulness", "ful"), ("iveness", "ive"),
+    ("ies", "y"), ("sses", "ss"), ("ing", ""), ("ed", ""), ("es", "e"), ("s", ""),
+)
+
+
+def stem(word: str) -> str:
+    """简单的英文词干提取(后缀剥离), 让 serving/served/serve 落到同一个词"""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, replacement in _SUFFIX_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word.endswith("ss"):
+                break
+            word = word[:len(word) - len(suffix)] + replacement
+            break
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    中英文混合分词
+
+    - 英文/数字: 转小写, 去停用词, 取词干
+    - 中文: 连续汉字切成字二元组, 单个汉字保留本身
+    """
+    if not text:
+        return []
+    tokens = []
+    for piece in _TOKEN_RE.findall(str(text).lower()):
+        if piece[0] < "㐀":
+            if piece not in _STOPWORDS:
+                tokens.append(stem(piece))
+        elif len(piece) == 1:
+            tokens.append(piece)
+        else:
+            tokens.extend(piece[k:k + 2] for k in range(len(piece) - 1))
+    return tokens
+
+
+class SMCLabSeminarSearchIndex:
+    """
+    跨学期的组会报告全文索引(倒排索引 + BM25排序)
+
+    每个报告(presentation)是一篇文档, 索引报告人、题目和摘要。
+    索引保存在 data_sem/seminar_search_index.json, 记录每周组会内容的签名,
+    update 时只重新索引签名发生变化的周, 并删除已经不存在的周。
+    """
+    INDEX_FILE = "seminar_search_index.json"
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, sem_data_path: str = "data_sem"):
+        self.sem_data_path = sem_data_path
+        self.index_path = os.path.join(sem_data_path, self.INDEX_FILE)
+        # "学期/周次" -> 该周内容的签名
+        self._week_signatures: Dict[str, int] = {}
+        # 文档id -> {"meta": {...}, "tf": {词: 加权词频}, "len": 文档长度}
+        self._docs: Dict[str, dict] = {}
+        # 词 -> {文档id: 加权词频}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._total_len = 0.0
+        self._load()
+
+    @classmethod
+    def get(cls, sem_data_path: str = "data_sem") -> "SMCLabSeminarSearchIndex":
+        """获取进程内共享的索引"""
+        key = os.path.abspath(sem_data_path)
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(sem_data_path)
+            return cls._instances[key]
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            data = json_codec.load(self.index_path)
+        except json_codec.JSONDecodeError:
+            return
+        self._week_signatures = data.get("weeks", {})
+        for doc_id, doc in data.get("docs", {}).items():
+            self._add_doc(doc_id, doc)
+
+    def _save(self):
+        os.makedirs(self.sem_data_path, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        json_codec.dump({"weeks": self._week_signatures, "docs": self._docs}, tmp_path)
+        os.replace(tmp_path, self.index_path)
+
+    def _add_doc(self, doc_id: str, doc: dict):
+        self._docs[doc_id] = doc
+        self._total_len += doc["len"]
+        for term, tf in doc["tf"].items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _remove_week(self, week_key: str):
+        prefix = f"{week_key}/"
+        for doc_id in [d for d in self._docs if d.startswith(prefix)]:
+            doc = self._docs.pop(doc_id)
+            self._total_len -= doc["len"]
+            for term in doc["tf"]:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    @staticmethod
+    def _build_doc(semester: str, seminar: dict, presentation: dict) -> dict:
+        tf = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(presentation.get(field, "")):
+                tf[term] = tf.get(term, 0.0) + weight
+        meta = {
+            "semester": semester,
+            "week": seminar.get("week"),
+            "weekday": seminar.get("weekday"),
+            "happened": seminar.get("happened", False),
+            "presenter": presentation.get("presenter", ""),
+            "title": presentation.get("title", ""),
+            "track": presentation.get("track"),
+        }
+        return {"meta": meta, "tf": tf, "len": sum(tf.values())}
+
+    def _semesters(self) -> List[str]:
+        if not os.path.isdir(self.sem_data_path):
+            return []
+        return sorted(d for d in os.listdir(self.sem_data_path)
+                      if os.path.isdir(os.path.join(self.sem_data_path, d)))
+
+    def update(self, semester: Optional[str] = None) -> List[str]:
+        """
+        增量更新索引
+
+        Args:
+            semester: 只更新该学期, None 表示 sem_data_path 下的所有学期
+
+        Returns:
+            list: 重新索引或删除的 "学期/周次"
+        """
+        semesters = [semester] if semester else self._semesters()
+        changed = []
+        with self._lock:
+            for sem in semesters:
+                store = SMCLabSeminarStore(os.path.join(self.sem_data_path, sem))
+                seen = set()
+                for week in store.weeks():
+                    week_key = f"{sem}/{week}"
+                    seen.add(week_key)
+                    signature = store.week_signature(week)
+                    if self._week_signatures.get(week_key) == signature:
+                        continue
+                    self._remove_week(week_key)
+                    for seminar in store.load_week(week):
+                        happened = "h" if seminar.get("happened", False) else "u"
+                        for k, presentation in enumerate(seminar.get("presentations", [])):
+                            doc_id = f"{week_key}/{seminar.get('weekday')}{happened}/{k}"
+                            self._add_doc(doc_id, self._build_doc(sem, seminar, presentation))
+                    self._week_signatures[week_key] = signature
+                    changed.append(week_key)
+                prefix = f"{sem}/"
+                for week_key in [w for w in self._week_signatures if w.startswith(prefix)]:
+                    if week_key not in seen:
+                        self._remove_week(week_key)
+                        del self._week_signatures[week_key]
+                        changed.append(week_key)
+            if changed:
+                self._save()
+        return changed
+
+    def search(self, query: str, top_k: int = 10, semester: Optional[str] = None) -> List[dict]:
+        """
+        BM25排序的全文检索
+
+        Args:
+            query: 查询, 如 "LLM serving" / "大模型推理" / 报告人姓名
+            top_k: 最多返回多少条
+            semester: 只在该学期内检索
+
+        Returns:
+            list: [{"score": 分数, "semester", "week", "weekday", "presenter", "title", ...}, ...]
+        """
+        n_docs = len(self._docs)
+        if not n_docs:
+            return []
+        avg_len = self._total_len / n_docs or 1.0
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                doc_len = self._docs[doc_id]["len"]
+                norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_len))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+        if semester:
+            prefix = f"{semester}/"
+            scores = {d: s for d, s in scores.items() if d.startswith(prefix)}
+        # 同一周同一个报告可能同时有已发生和未发生两条记录, 只保留一条(优先已发生)
+        ranked = sorted(scores.items(),
+                        key=lambda item: (-item[1], not self._docs[item[0]]["meta"]["happened"]))
+        results, seen = [], set()
+        for doc_id, score in ranked:
+            meta = self._docs[doc_id]["meta"]
+            key = (meta["semester"], meta["week"], meta["presenter"], meta["title"])
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append(dict(meta, score=round(score, 4)))
+            if len(results) >= top_k:
+                break
+        return results
@@ -0,0 +1,109 @@
+import os
+import zlib
+import threading
+from typing import Dict, List, Optional
+
+from ..common import json_codec
+
+
+class SMCLabSeminarStore:
+    """
+    组会信息存储
+
+    seminar_information.json 是唯一的数据源(纳入git管理, 可以手动修改)。
+    读取时按文件的mtime/大小在内存中按周拆分一次, 文件不变时不会重复读取;
+    写入时只合并本次出现的周, 内容没有变化时不写文件。
+    """
+    _lock = threading.Lock()
+
+    def __init__(self, this_sem_path: str, logger=None):
+        self.this_sem_path = this_sem_path
+        self.source_path = os.path.join(this_sem_path, "seminar_information.json")
+        self.logger = logger
+        # 数据源按周拆分的内存副本 (数据源签名, {周次: 记录})
+        self._grouped_signature = None
+        self._grouped: Dict[int, List[dict]] = {}
+
+    @staticmethod
+    def _entry_key(seminar: dict) -> tuple:
+        return (seminar.get("week"), seminar.get("weekday"), seminar.get("happened"))
+
+    @staticmethod
+    def _atomic_dump(obj, path: str, pretty: bool = False):
+        tmp_path = path + ".tmp"
+        json_codec.dump(obj, tmp_path, pretty=pretty)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _group_by_week(seminars: List[dict]) -> Dict[int, List[dict]]:
+        grouped = {}
+        for seminar in seminars:
+            week = seminar.get("week")
+            if week is not None:
+                grouped.setdefault(int(week), []).append(seminar)
+        return grouped
+
+    def _source_signature(self) -> Optional[list]:
+        if not os.path.exists(self.source_path):
+            return None
+        stat = os.stat(self.source_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def load_all(self) -> List[dict]:
+        """读取数据源中的全部组会记录"""
+        if not os.path.exists(self.source_path):
+            return []
+        data = json_codec.load(self.source_path)
+        return data if isinstance(data, list) else []
+
+    def _load_grouped(self) -> Dict[int, List[dict]]:
+        signature = self._source_signature()
+        if signature != self._grouped_signature:
+            self._grouped = self._group_by_week(self.load_all())
+            self._grouped_signature = signature
+        return self._grouped
+
+    def weeks(self) -> List[int]:
+        """有组会记录的周次(升序)"""
+        return sorted(self._load_grouped())
+
+    def load_week(self, week: int) -> List[dict]:
+        """读取某一周的组会记录"""
+        return list(self._load_grouped().get(int(week), []))
+
+    def week_signature(self, week: int) -> int:
+        """某一周内容的签名, 供索引判断该周是否需要重建"""
+        return zlib.crc32(json_codec.dumps_bytes(self.load_week(week)))
+
+    def upsert(self, seminars: List[dict], replace: bool = False) -> List[int]:
+        """
+        写入组会记录: 与数据源逐周比较, 有变化时才写回 seminar_information.json
+
+        Args:
+            seminars: 组会记录列表
+            replace: True 时每周的内容完全替换, 且删除本次没有出现的周;
+                     False 时按 (week, weekday, happened) 合并到已有记录(保留手动修改的其他记录)
+
+        Returns:
+            list: 内容发生变化的周次
+        """
+        incoming = self._group_by_week(seminars)
+        with self._lock:
+            existing = self._load_grouped()
+            merged_weeks = {} if replace else {week: list(entries) for week, entries in existing.items()}
+            changed = []
+            for week, entries in incoming.items():
+                index = {} if replace else {self._entry_key(s): s for s in existing.get(week, [])}
+                for seminar in entries:
+                    index[self._entry_key(seminar)] = seminar
+                merged_weeks[week] = sorted(index.values(), key=lambda s: s.get("weekday", 0))
+            for week in set(existing) | set(merged_weeks):
+                if existing.get(week) != merged_weeks.get(week):
+                    changed.append(week)
+            if changed:
+                os.makedirs(self.this_sem_path, exist_ok=True)
+                # 没有周次的记录(手动添加的)原样保留在最前面
+                all_seminars = [s for s in self.load_all() if s.get("week") is None]
+                all_seminars += [s for week in sorted(merged_weeks) for s in merged_weeks[week]]
+                self._atomic_dump(all_seminars, self.source_path, pretty=True)
+        return sorted(changed)
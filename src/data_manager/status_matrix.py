@@ -0,0 +1,191 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from ..utils import get_semester_start_date
+from .member_index import SMCLabMemberInterner
+
+# 每天的考勤状态编码(0表示没有记录)
+STATUS_NONE = 0
+STATUS_NORMAL = 1
+STATUS_LATE = 2
+STATUS_MISSING = 3
+STATUS_CLASS = 4
+STATUS_OTHER = 5
+STATUS_CODES = {"正常": STATUS_NORMAL, "迟到": STATUS_LATE, "缺卡": STATUS_MISSING, "上课": STATUS_CLASS}
+STATUS_LABELS = {code: label for label, code in STATUS_CODES.items()}
+NUM_STATUS = 6
+
+
+class SMCLabAttendanceMatrix:
+    """
+    学期级的 成员 × 日期 考勤状态矩阵
+
+    行是学期成员驻留表中的成员id, 列是从学期第一天开始的天数, 元素是 STATUS_* 编码。
+    另外为每种状态维护按天的前缀和, 任意时间段/滑动窗口的次数都是两列相减;
+    新加入的天只会让该天之后的前缀和失效, 之前的历史不需要重新计算。
+    矩阵保存在 data_sem/{学期}/attendance_matrix.npz
+    """
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, semester: str, sem_data_path: str = "data_sem"):
+        self.semester = semester
+        self.path = os.path.join(sem_data_path, semester, "attendance_matrix.npz")
+        self.interner = SMCLabMemberInterner.get(semester, sem_data_path)
+        self.start_date = get_semester_start_date(semester)
+        self.status = np.zeros((0, 0), dtype=np.uint8)
+        # 已记录的天数(列数), 矩阵容量可能更大
+        self.num_days = 0
+        # 各状态的前缀和 (状态, 成员, 天+1), 只有 [:, :, :_prefix_valid+1] 是有效的
+        self._prefix = np.zeros((NUM_STATUS, 0, 1), dtype=np.int32)
+        self._prefix_valid = 0
+        self._load()
+
+    @classmethod
+    def get(cls, semester: str, sem_data_path: str = "data_sem") -> "SMCLabAttendanceMatrix":
+        """获取某学期的考勤矩阵(进程内共享)"""
+        key = os.path.abspath(os.path.join(sem_data_path, semester))
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(semester, sem_data_path)
+            return cls._instances[key]
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path) as data:
+            status = data["status"]
+            self.num_days = int(data["num_days"])
+        self._reserve(status.shape[0], status.shape[1])
+        self.status[:status.shape[0], :status.shape[1]] = status
+
+    def save(self):
+        """保存矩阵(只保存已记录的列)"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        rows = len(self.interner)
+        self._reserve(rows, self.num_days)
+        np.savez_compressed(self.path, status=self.status[:rows, :self.num_days], num_days=self.num_days)
+        self.interner.save()
+
+    def _reserve(self, rows: int, days: int):
+        """容量不足时按2倍扩展矩阵"""
+        cur_rows, cur_days = self.status.shape
+        if rows <= cur_rows and days <= cur_days:
+            return
+        new_rows = max(rows, cur_rows * 2, 16) if rows > cur_rows else cur_rows
+        new_days = max(days, cur_days * 2, 28) if days > cur_days else cur_days
+        status = np.zeros((new_rows, new_days), dtype=np.uint8)
+        status[:cur_rows, :cur_days] = self.status
+        self.status = status
+
+    def day_index(self, date) -> int:
+        """日期(YYYYMMDD 整数/字符串或datetime) -> 列号"""
+        if not isinstance(date, datetime):
+            date = datetime.strptime(str(date), "%Y%m%d")
+        return (date - self.start_date).days
+
+    def date_of(self, day: int) -> int:
+        return int((self.start_date + timedelta(days=day)).strftime("%Y%m%d"))
+
+    def add_records(self, records: Iterable[Tuple[str, object, str]]) -> int:
+        """
+        写入(或覆盖)考勤记录
+
+        Args:
+            records: [(姓名, 日期, 状态字符串), ...]
+
+        Returns:
+            int: 写入的记录数
+        """
+        rows, days, codes = [], [], []
+        for name, date, status in records:
+            day = self.day_index(date)
+            if not name or day < 0:
+                continue
+            rows.append(self.interner.intern(name))
+            days.append(day)
+            codes.append(STATUS_CODES.get(status, STATUS_OTHER))
+        if not rows:
+            return 0
+        rows = np.asarray(rows, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        self._reserve(int(rows.max()) + 1, int(days.max()) + 1)
+        self.status[rows, days] = np.asarray(codes, dtype=np.uint8)
+        self.num_days = max(self.num_days, int(days.max()) + 1)
+        # 只有最早被修改的那天之后的前缀和需要重新计算
+        self._prefix_valid = min(self._prefix_valid, int(days.min()))
+        return len(rows)
+
+    def add_week_summary(self, weekly_summary: Dict[str, Dict]) -> int:
+        """写入 {姓名: {"week": {日期: 状态}}} 格式的每周汇总"""
+        return self.add_records((name, date, status)
+                                for name, info in weekly_summary.items()
+                                for date, status in info["week"].items())
+
+    def _prefix_sums(self) -> np.ndarray:
+        """各状态按天的前缀和, 形状 (状态, 成员, 天数+1)"""
+        rows, days = len(self.interner), self.num_days
+        self._reserve(rows, days)
+        if self._prefix.shape[1] != rows or self._prefix.shape[2] != days + 1:
+            old = self._prefix
+            self._prefix = np.zeros((NUM_STATUS, rows, days + 1), dtype=np.int32)
+            keep_rows, keep_days = min(old.shape[1], rows), min(old.shape[2], days + 1, self._prefix_valid + 1)
+            self._prefix[:, :keep_rows, :keep_days] = old[:, :keep_rows, :keep_days]
+            if keep_rows < rows:
+                self._prefix_valid = 0
+            self._prefix_valid = min(self._prefix_valid, keep_days - 1)
+        start = self._prefix_valid
+        if start < days:
+            block = self.status[:rows, start:days]
+            onehot = block[None, :, :] == np.arange(NUM_STATUS, dtype=np.uint8)[:, None, None]
+            self._prefix[:, :, start + 1:] = self._prefix[:, :, start:start + 1] + np.cumsum(onehot, axis=2, dtype=np.int32)
+            self._prefix_valid = days
+        return self._prefix
+
+    def counts(self, code: int, start=None, end=None) -> Dict[str, int]:
+        """
+        某状态在 [start, end] 日期内的次数
+
+        Args:
+            code: STATUS_*
+            start / end: 起止日期(含), 默认整个学期
+        """
+        prefix = self._prefix_sums()[code]
+        first = 0 if start is None else max(self.day_index(start), 0)
+        last = self.num_days if end is None else min(self.day_index(end) + 1, self.num_days)
+        last = max(first, last)
+        values = prefix[:, last] - prefix[:, first]
+        return {self.interner.name_of(i): int(v) for i, v in enumerate(values)}
+
+    def rolling_counts(self, code: int, window: int = 7) -> np.ndarray:
+        """
+        截至每天(含)的最近 window 天内某状态的次数, 形状 (成员, 天数)
+        """
+        prefix = self._prefix_sums()[code]
+        upper = np.arange(1, self.num_days + 1)
+        lower = np.maximum(upper - window, 0)
+        return prefix[:, upper] - prefix[:, lower]
+
+    def trend(self, name: str, code: int = STATUS_LATE, window: int = 7) -> Dict[int, int]:
+        """某人每天的滑动窗口次数 {日期: 次数}"""
+        member_id = self.interner.id_of(name)
+        if member_id is None or member_id >= len(self.interner):
+            return {}
+        series = self.rolling_counts(code, window)[member_id]
+        return {self.date_of(day): int(v) for day, v in enumerate(series)}
+
+    def chronic_lateness(self, window: int = 28, threshold: int = 4,
+                         codes: Tuple[int, ...] = (STATUS_LATE, STATUS_MISSING)) -> List[str]:
+        """
+        最近 window 天内 迟到/缺卡 次数达到 threshold 的成员(按次数从多到少)
+        """
+        if not self.num_days:
+            return []
+        total = sum(self.rolling_counts(code, window)[:, -1] for code in codes)
+        flagged = np.flatnonzero(total >= threshold)
+        flagged = flagged[np.argsort(-total[flagged], kind="stable")]
+        return [self.interner.name_of(int(i)) for i in flagged]
@@ -1,4 +1,4 @@
-import json, os
+import os
 import copy
 
 import lark_oapi as lark
@@ -6,8 +6,10 @@ from lark_oapi.api.im.v1 import *
 
 from ..common.baseclient import SMCLabClient
 from ..data_manager.excel_manager import SMCLabInfoManager
+from ..data_manager.seminar_calendar import SMCLabSeminarCalendar
 from ..utils import TimeParser, get_semester_and_week
 from ..config import Config
+from ..common import json_codec
 
 ABS_PATH = os.path.abspath(__file__)        # SMCLabDailyManager\source_code\message\sender.py
 CURRENT_PATH = os.path.dirname(ABS_PATH)    # SMCLabDailyManager\source_code\message
@@ -78,17 +80,13 @@ class SMCLabMessageSender(SMCLabClient):
                 assert presentation.get("abstract", None), f"{presenter}怎么没有提交摘要!"
                 count += 1
 
-        seminar_info_path = os.path.join(self._sem_data_path, sem, f"seminar_information.json")
-        assert os.path.exists(seminar_info_path), "请先下载组会多维表格"
-        
-        with open(seminar_info_path, "r", encoding="utf-8") as f:
-            seminar_info = json.load(f)
+        calendar = SMCLabSeminarCalendar.get(sem, self._sem_data_path)
+        assert os.path.exists(calendar.seminar_info_path), "请先下载组会多维表格"
 
         target_seminar_info = None
-        for seminar_info_item in seminar_info:
-            if seminar_info_item.get("week", None) == week:
-                check_seminar_item(seminar_info_item)
-                target_seminar_info = seminar_info_item 
+        for seminar_info_item in calendar.seminars_of_week(week):
+            check_seminar_item(seminar_info_item)
+            target_seminar_info = seminar_info_item 
         # TODO: 不要使用assert进行运行时检查, 为空的时候发送空消息
         assert target_seminar_info, f"没有找到{week}周的组会信息, 请确认该周是否真的有组会"
         return target_seminar_info
@@ -96,8 +94,7 @@ class SMCLabMessageSender(SMCLabClient):
     def _build_seminar_preview_content(self):
         
         # 加载发送给陈旭老师的模板
-        with open(self.seminar_preview_template_path, "r", encoding="utf-8") as f:
-            post_message = json.load(f)
+        post_message = json_codec.load(self.seminar_preview_template_path)
 
         # 在此处构造数据
         target_seminar_info = self._fetch_seminar_preview(self._year_semester, self._this_week)
@@ -115,8 +112,7 @@ class SMCLabMessageSender(SMCLabClient):
             presentation_content[7]["text"] = str(pre["abstract"])
             new_content_list.append(presentation_content)
         # 根据实际情况是否
-        with open(self.semester_info_path, "r", encoding="utf-8") as f:
-            semester_info = json.load(f)
+        semester_info = json_codec.load(self.semester_info_path)
         this_semester_info = semester_info[self._year_semester]
         # 添加预告时间段的文本
         period_content = template_content_list[1].copy()
@@ -151,8 +147,7 @@ class SMCLabMessageSender(SMCLabClient):
                                         sem: str, 
                                         week: int):
         # 生成周报链接
-        with open(self.semester_info_path, "r", encoding="utf-8") as f:
-            seminar_info = json.load(f)
+        seminar_info = json_codec.load(self.semester_info_path)
         weekly_report_url = seminar_info[sem]["bitable"]["weekly_report"]["url"]
 
         weekly_report_txt_path = os.path.join(self._sem_data_path, sem, f"week{week}", f"SMCLab第{week}周周报统计.txt")
@@ -182,8 +177,7 @@ class SMCLabMessageSender(SMCLabClient):
         week = self._this_week if week==None else week
 
         # 加载发送给陈旭老师的模板
-        with open(self.weekly_summary_template_path, "r", encoding="utf-8") as f:
-            post_message = json.load(f)
+        post_message = json_codec.load(self.weekly_summary_template_path)
 
         # 在此处构造数据
         image_key = self._fetch_daily_attendance(semester, week)
@@ -197,7 +191,7 @@ class SMCLabMessageSender(SMCLabClient):
         post_message["zh_cn"]["content"][7][1]["text"] = attended_str
         post_message["zh_cn"]["content"][8][1]["text"] = not_attended_str
 
-        post_string = json.dumps(post_message, ensure_ascii=False)
+        post_string = json_codec.dumps(post_message)
         # 构造请求对象
         for receive_id, receive_name in zip(receive_ids, receive_names):
             if receive_name == "梁涵":
@@ -258,7 +252,7 @@ class SMCLabMessageSender(SMCLabClient):
 
         post_message = self._build_seminar_preview_content()
 
-        post_string = json.dumps(post_message, ensure_ascii=False)
+        post_string = json_codec.dumps(post_message)
         # 构造请求对象
         for receive_id, receive_name in zip(receive_ids, receive_names):
             if receive_name == "梁涵":
@@ -300,7 +294,7 @@ class SMCLabMessageSender(SMCLabClient):
         message = {
             "text": message
         }
-        message_string = json.dumps(message, ensure_ascii=False)
+        message_string = json_codec.dumps(message)
 
         request: CreateMessageRequest = CreateMessageRequest.builder() \
             .receive_id_type("open_id") \
@@ -348,7 +342,7 @@ class SMCLabMessageSender(SMCLabClient):
         message = {
             "image_key": image_key
         }
-        message_string = json.dumps(message, ensure_ascii=False)
+        message_string = json_codec.dumps(message)
 
         request: CreateMessageRequest = CreateMessageRequest.builder() \
             .receive_id_type("open_id") \
@@ -1,5 +1,5 @@
 import os
-import json
+import re
 import logging
 import pulp
 import math
@@ -8,6 +8,10 @@ from collections import defaultdict
 from ..config import Config
 from ..utils import get_semester_and_week
 from ..data_manager.excel_manager import SMCLabInfoManager
+from ..data_manager.member_index import SMCLabMemberInterner
+from ..data_manager.availability_index import SMCLabAvailabilityIndex
+from ..data_manager.interval_index import SMCLabIntervalIndex
+from ..common import json_codec
 
 
 class SMCLabGroupMeetingScheduler:
@@ -32,6 +36,7 @@ class SMCLabGroupMeetingScheduler:
         self.advisor = "陈旭"
         self.periods = config.default_periods
         self.max_groups_per_period = config.max_groups_per_period
+        self.sysu_schedule_path = config.sysu_schedule_path
         self.name_list = []
         self.already_grouped = []
         self.course_schedule = {}
@@ -56,8 +61,7 @@ class SMCLabGroupMeetingScheduler:
 
         if from_file:
             if os.path.exists(group_meeting_name_list_path):
-                with open(group_meeting_name_list_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                data = json_codec.load(group_meeting_name_list_path)
                 if not isinstance(data, list):
                     raise ValueError(
                         f"group_meeting_name_list.json 格式错误：期望列表，实际为 {type(data).__name__}"
@@ -98,38 +102,39 @@ class SMCLabGroupMeetingScheduler:
         if from_file:
             # 将生成的名单保存到文件，便于下次直接加载
             os.makedirs(os.path.dirname(group_meeting_name_list_path), exist_ok=True)
-            with open(group_meeting_name_list_path, "w", encoding="utf-8") as f:
-                json.dump(self.name_list, f, ensure_ascii=False, indent=2)
+            json_codec.dump(self.name_list, group_meeting_name_list_path, pretty=True)
             self.logger.info(
                 f"已将学生名单保存到文件: {group_meeting_name_list_path}"
             )
         return self.name_list
 
-    def fetch_course_schedule(self, semester: str = None) -> dict:
+    def fetch_course_schedule(self, semester: str = None, week: int = None) -> dict:
         """
         读取指定学期的课程日程文件
 
         Args:
             semester: 学期标识(如 "2025-Fall"), 若为None则使用当前学期
+            week: 周次, 若指定则只读取该周实际有课的日程(考虑周次范围和单双周)
 
         Returns:
-            课程日程字典，格式为 {周几: {时段: [人名列表]}}
+            课程日程字典，格式为 {周几: {时段: [人名列表]}}；指定周次时时段为具体课时，如 "上午-第1节"
         """
         if semester is None:
             semester = self._year_semester
 
-        schedule_path = os.path.join(
-            self._sem_data_path, semester, "schedule_by_period.json"
-        )
+        file_name = "schedule_by_period.json" if week is None else "schedule_by_week.json"
+        schedule_path = os.path.join(self._sem_data_path, semester, file_name)
 
         if not os.path.exists(schedule_path):
             self.logger.error(f"课程日程文件不存在: {schedule_path}")
             raise FileNotFoundError(f"课程日程文件不存在: {schedule_path}")
 
-        with open(schedule_path, "r", encoding="utf-8") as f:
-            self.course_schedule = json.load(f)
+        schedule = json_codec.load(schedule_path)
+        if week is not None:
+            schedule = schedule.get(str(week), {})
+        self.course_schedule = schedule
 
-        self.logger.info(f"已加载学期 {semester} 的课程日程")
+        self.logger.info(f"已加载学期 {semester} 的课程日程" + (f"（第{week}周）" if week is not None else ""))
         return self.course_schedule
 
     def fetch_already_grouped(self, semester: str = None) -> list:
@@ -149,8 +154,7 @@ class SMCLabGroupMeetingScheduler:
         )
 
         if os.path.exists(already_grouped_path):
-            with open(already_grouped_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = json_codec.load(already_grouped_path)
             # 检查是否为嵌套列表
             if not isinstance(data, list):
                 raise ValueError(
@@ -166,8 +170,7 @@ class SMCLabGroupMeetingScheduler:
         else:
             # 文件不存在，创建空列表
             self.already_grouped = []
-            with open(already_grouped_path, "w", encoding="utf-8") as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
+            json_codec.dump([], already_grouped_path, pretty=True)
             self.logger.info(f"已创建空的已分组文件: {already_grouped_path}")
 
         return self.already_grouped
@@ -179,16 +182,19 @@ class SMCLabGroupMeetingScheduler:
         name_list: list = None,
         already_grouped: list = None,
         schedule: dict = None,
+        week: int = None,
     ) -> dict:
         """
         使用整数线性规划安排小组会议
 
         Args:
-            periods: 可用的时间段列表，如 ["周一上午", "周一下午", "周二上午"]
+            periods: 可用的时间段列表，如 ["周一上午", "周一下午", "周二上午"]，
+                     也可以是精确到分钟的时间窗，如 "周三19:00-20:30"（按具体课时判断冲突）
             max_groups_per_period: 每个非最后时间段最多安排的小组数
             already_grouped: 已确定要在一起的人员分组，如 [["张三", "李四"], ["王五", "赵六"]]
             name_list: 参与人员名单，若为None则使用 self.name_list
             schedule: 课程日程，若为None则使用 self.course_schedule
+            week: 周次，若指定则按该周实际有课的日程安排（schedule 为None时读取 schedule_by_week.json）
 
         Returns:
             调度结果，格式为 {时间段: [[小组1成员], [小组2成员], ...]}
@@ -206,7 +212,9 @@ class SMCLabGroupMeetingScheduler:
                 self.fetch_already_grouped()
             already_grouped = self.already_grouped
         if schedule is None:
-            if not self.course_schedule:
+            if week is not None:
+                self.fetch_course_schedule(week=week)
+            elif not self.course_schedule:
                 self.fetch_course_schedule()
             schedule = self.course_schedule
 
@@ -221,8 +229,28 @@ class SMCLabGroupMeetingScheduler:
             name_list=name_list,
             schedule=schedule,
             already_grouped=already_grouped,
+            week=week,
         )
 
+    def _busy_members(self, meeting_periods: list, schedule: dict, interner: SMCLabMemberInterner,
+                      week: int = None) -> list:
+        """每个时间段有课的成员: 半天用半天课表判断, 时间窗用分钟级区间索引判断"""
+        availability = SMCLabAvailabilityIndex.from_schedule(schedule, interner)
+        intervals = None
+        busy_sets = []
+        for meeting_period in meeting_periods:
+            day, rest = meeting_period[:2], meeting_period[2:]
+            window = re.fullmatch(r"(\d{1,2}:?\d{2})-(\d{1,2}:?\d{2})", rest)
+            if window is None:
+                busy_sets.append(availability.busy_members(day, rest))
+                continue
+            if intervals is None:
+                file_name = "schedule_by_slot.json" if week is None else "schedule_by_week.json"
+                slot_path = os.path.join(self._sem_data_path, self._year_semester, file_name)
+                intervals = SMCLabIntervalIndex.from_file(slot_path, self.sysu_schedule_path, interner, week=week)
+            busy_sets.append(intervals.busy_members(day, window.group(1), window.group(2)))
+        return busy_sets
+
     def _ilp(
         self,
         meeting_periods: list,
@@ -230,6 +258,7 @@ class SMCLabGroupMeetingScheduler:
         name_list: list,
         schedule: dict,
         already_grouped: list,
+        week: int = None,
     ):
         I = list(range(len(name_list)))  # 成员集合
         P = list(range(len(meeting_periods)))  # 时段集合
@@ -239,11 +268,12 @@ class SMCLabGroupMeetingScheduler:
         last_p = P[-1]
 
         # 人在某半天是否有课
+        interner = SMCLabMemberInterner.get(self._year_semester, self._sem_data_path)
+        busy_sets = self._busy_members(meeting_periods, schedule, interner, week)
         busy = {}
         for i, name in enumerate(name_list):
-            for p, meeting_period in enumerate(meeting_periods):
-                day, period = meeting_period[:2], meeting_period[2:]
-                busy[i, p] = name in schedule.get(day, {}).get(period, [])
+            for p, busy_set in enumerate(busy_sets):
+                busy[i, p] = name in busy_set
 
         prob = pulp.LpProblem("Unified_Group_Meeting", pulp.LpMinimize)
 
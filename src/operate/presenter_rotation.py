@@ -0,0 +1,283 @@
+import os
+import math
+import time
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pulp
+
+from ..config import Config
+from ..utils import get_semester_and_week, get_semester_start_date
+from ..data_manager.bitable_parser import SMCLabSeminarParser, SMCLabSeminarLeaveParser
+from ..data_manager.seminar_calendar import SMCLabSeminarCalendar
+from ..common import json_codec
+
+# 每少讲一次的惩罚(远大于间隔偏差), 保证在可行时每人的报告次数均衡
+SHORTFALL_PENALTY = 1000
+# 重新规划时保持原安排的奖励, 避免一次调换打乱其他人的安排
+STABILITY_BONUS = 2
+
+
+class SMCLabPresenterRotationPlanner:
+    """组会报告轮换规划器: 为本学期剩余的组会周次安排报告人"""
+
+    def __init__(self, config: Config = None) -> None:
+        """
+        初始化规划器
+
+        Args:
+            config: 配置对象, 若为None则使用默认配置
+        """
+        if config is None:
+            config = Config()
+
+        self.logger = logging.getLogger(config.logger_name)
+        self._sem_data_path = config.sem_data_path
+        self._year_semester, self._this_week = get_semester_and_week()
+        self.this_sem_path = os.path.join(self._sem_data_path, self._year_semester)
+        self.plan_path = os.path.join(self.this_sem_path, "presenter_rotation.json")
+
+        self.talks_per_week = config.rotation_talks_per_week
+        self.last_week = config.rotation_last_week
+        self.skip_weeks = set(config.rotation_skip_weeks)
+        self.seminar_parser = SMCLabSeminarParser(config)
+        self.leave_parser = SMCLabSeminarLeaveParser(config)
+        self.calendar = SMCLabSeminarCalendar.get(self._year_semester, self._sem_data_path)
+
+        # 上一次规划的输入和结果, 调换/重新规划时复用
+        self.members: List[str] = []
+        self.last_weeks: Dict[str, Optional[int]] = {}
+        self.unavailable: Dict[str, set] = {}
+        self.plan: Dict[int, List[str]] = {}
+
+    def reset_time(self):
+        """重置学期和周次信息"""
+        self._year_semester, self._this_week = get_semester_and_week()
+
+    def planning_weeks(self, start_week: int = None) -> List[int]:
+        """需要安排报告的周次(从 start_week 到学期最后一周, 跳过配置中的周次)"""
+        if start_week is None:
+            start_week = self._this_week + 1
+        return [w for w in range(start_week, self.last_week + 1) if w not in self.skip_weeks]
+
+    def build_member_list(self) -> List[str]:
+        """组会表格中在读的成员, 同时记录其表格中的上次报告时间"""
+        sem_start_date = get_semester_start_date(self._year_semester)
+        self.members, self.last_weeks = [], {}
+        for record in self.seminar_parser._get_info_from_raw_data():
+            if not record.name or record.name in self.last_weeks:
+                continue
+            if record.status and record.status not in ("在读", "临近毕业"):
+                continue
+            self.members.append(record.name)
+            last_week = None
+            if record.last_seminar_date:
+                last_date = datetime.strptime(str(record.last_seminar_date), "%Y%m%d")
+                # 上学期的报告得到0或负数周次
+                last_week = (last_date - sem_start_date).days // 7 + 1
+            self.last_weeks[record.name] = last_week
+        # 本学期已经发生的组会比表格更可靠
+        for week in range(1, self._this_week + 1):
+            for seminar in self.calendar.seminars_of_week(week):
+                if not seminar.get("happened", False):
+                    continue
+                for presentation in seminar.get("presentations", []):
+                    name = presentation.get("presenter", "")
+                    if name in self.last_weeks:
+                        self.last_weeks[name] = max(self.last_weeks[name] or week, week)
+        self.logger.info(f"组会轮换成员共 {len(self.members)} 人")
+        return self.members
+
+    def collect_unavailable(self, weeks: List[int], extra: Dict[str, List[int]] = None) -> Dict[str, set]:
+        """
+        汇总各成员不能报告的周次: 组会请假记录 + 手动指定
+
+        Args:
+            weeks: 规划的周次
+            extra: {姓名: [周次, ...]}, 如已知的出差、答辩时间
+        """
+        unavailable = {}
+        for week in weeks:
+            for name in self.leave_parser.get_leave_list(week):
+                unavailable.setdefault(name, set()).add(week)
+        for name, absent_weeks in (extra or {}).items():
+            unavailable.setdefault(name, set()).update(absent_weeks)
+        self.unavailable = unavailable
+        return unavailable
+
+    def _pinned_from_calendar(self, weeks: List[int]) -> Dict[str, int]:
+        """日历中已经排好的报告(近期预期已确定)"""
+        pinned = {}
+        for week in weeks:
+            seminar = self.calendar.seminar_of_week(week)
+            if not seminar:
+                continue
+            for presentation in seminar.get("presentations", []):
+                name = presentation.get("presenter", "")
+                if name in self.last_weeks:
+                    pinned[name] = week
+        return pinned
+
+    def plan_rotation(self,
+                      start_week: int = None,
+                      unavailable: Dict[str, List[int]] = None,
+                      pinned: Dict[str, int] = None,
+                      save: bool = True) -> Dict[int, List[str]]:
+        """
+        规划本学期剩余周次的报告轮换
+
+        Args:
+            start_week: 从哪一周开始规划, 默认下一周
+            unavailable: 额外的不可报告周次 {姓名: [周次, ...]}
+            pinned: 固定的报告安排 {姓名: 周次}, 默认读取日历中已排好的组会
+            save: 是否保存到 presenter_rotation.json
+
+        Returns:
+            dict: {周次: [报告人, ...]}
+        """
+        weeks = self.planning_weeks(start_week)
+        if not self.members:
+            self.build_member_list()
+        self.collect_unavailable(weeks, unavailable)
+        if pinned is None:
+            pinned = self._pinned_from_calendar(weeks)
+        return self._apply(self._solve(weeks, pinned), save)
+
+    def replan(self, pinned: Dict[str, int], start_week: int = None,
+               save: bool = True) -> Dict[int, List[str]]:
+        """
+        在上一次规划的基础上重新规划(复用成员和请假信息, 尽量保持其他人的安排)
+
+        Args:
+            pinned: 新固定的报告安排 {姓名: 周次}, 与日历中已排好的组会合并(冲突时以此为准)
+            start_week: 从哪一周开始重新规划, 默认下一周
+        """
+        weeks = self.planning_weeks(start_week)
+        if not self.members:
+            self.build_member_list()
+            self.collect_unavailable(weeks)
+        merged = self._pinned_from_calendar(weeks)
+        merged.update(pinned)
+        previous = {(name, week) for week, names in self.plan.items() for name in names}
+        return self._apply(self._solve(weeks, merged, previous), save)
+
+    def _apply(self, plan: Optional[Dict[int, List[str]]], save: bool) -> Dict[int, List[str]]:
+        """采用求解结果; 无可行解时保留上一次的规划, 不保存"""
+        if plan is None:
+            self.logger.warning("报告轮换没有找到最优解, 保留上一次的规划")
+            return self.plan
+        self.plan = plan
+        if save:
+            self.save_plan()
+        return self.plan
+
+    def swap(self, name_a: str, name_b: str, save: bool = True) -> Dict[int, List[str]]:
+        """
+        调换两人最近一次的报告周次, 再对其余安排做最小调整
+
+        Raises:
+            ValueError: 两人不都在当前规划中
+        """
+        week_of = {}
+        for week in sorted(self.plan):
+            for name in self.plan[week]:
+                week_of.setdefault(name, week)
+        if name_a not in week_of or name_b not in week_of:
+            raise ValueError(f"{name_a} 或 {name_b} 不在当前的报告安排中")
+        pinned = {name_a: week_of[name_b], name_b: week_of[name_a]}
+        self.logger.info(f"调换报告: {name_a} -> 第{pinned[name_a]}周, {name_b} -> 第{pinned[name_b]}周")
+        return self.replan(pinned, start_week=min(self.plan), save=save)
+
+    def _solve(self, weeks: List[int], pinned: Dict[str, int],
+               previous: set = None) -> Optional[Dict[int, List[str]]]:
+        """
+        指派模型: x[i][w] = 成员i在第w周报告
+
+        - 每周恰好 talks_per_week 人(可报告人数不足时取全部)
+        - 请假的周不安排, 固定的安排必须满足
+        - 每人报告次数不超过 ceil(总场次/人数), 少于 floor(总场次/人数) 时受到惩罚
+        - 同一人两次报告至少间隔约半个轮换周期
+        - 目标: 报告周次尽量接近 上次报告 + k×轮换周期
+
+        Returns:
+            dict: {周次: [报告人, ...]}, 求解状态不是Optimal时返回None
+        """
+        start = time.perf_counter()
+        members, T = self.members, self.talks_per_week
+        if not members or not weeks:
+            return {}
+        gap = max(len(members) / T, 1.0)
+        total = T * len(weeks)
+        upper = math.ceil(total / len(members))
+        lower = total // len(members)
+        spacing = max(1, int(gap // 2))
+        previous = previous or set()
+
+        available = {}
+        for name in members:
+            absent = self.unavailable.get(name, set())
+            available[name] = [w for w in weeks if w not in absent or pinned.get(name) == w]
+
+        def cost(name: str, week: int) -> float:
+            last = self.last_weeks.get(name)
+            if last is None:
+                # 从未报告过的人视为一个周期前报告过
+                last = weeks[0] - gap
+            # 距离最近的理想周次 last + k*gap (k>=1)
+            k = max(1, round((week - last) / gap))
+            value = abs(week - (last + k * gap))
+            # 越久没讲越优先
+            value -= min(week - last, 2 * gap) / gap
+            if (name, week) in previous:
+                value -= STABILITY_BONUS
+            return value
+
+        prob = pulp.LpProblem("Presenter_Rotation", pulp.LpMinimize)
+        x = {(name, w): pulp.LpVariable(f"x_{i}_{w}", 0, 1, cat="Binary")
+             for i, name in enumerate(members) for w in available[name]}
+        short = {name: pulp.LpVariable(f"short_{i}", 0) for i, name in enumerate(members)}
+
+        prob += (pulp.lpSum(cost(name, w) * var for (name, w), var in x.items())
+                 + SHORTFALL_PENALTY * pulp.lpSum(short.values()))
+
+        for w in weeks:
+            week_vars = [x[name, w] for name in members if (name, w) in x]
+            prob += pulp.lpSum(week_vars) == min(T, len(week_vars))
+        for name in members:
+            talks = pulp.lpSum(x[name, w] for w in available[name])
+            prob += talks <= upper
+            prob += talks + short[name] >= min(lower, len(available[name]))
+            if name in pinned:
+                continue
+            for k in range(len(weeks)):
+                window = [x[name, w] for w in weeks[k:] if w < weeks[k] + spacing and (name, w) in x]
+                if len(window) > 1:
+                    prob += pulp.lpSum(window) <= 1
+        for name, week in pinned.items():
+            if (name, week) in x:
+                prob += x[name, week] == 1
+            else:
+                self.logger.warning(f"固定安排 {name} -> 第{week}周 不在规划范围内(非轮换成员或周次不在规划中), 已忽略")
+
+        status = prob.solve(pulp.PULP_CBC_CMD(msg=False))
+        if pulp.LpStatus[status] != "Optimal":
+            self.logger.warning(f"报告轮换无可行解(状态:{pulp.LpStatus[status]})")
+            return None
+
+        plan = {w: [] for w in weeks}
+        for (name, w), var in x.items():
+            if pulp.value(var) is not None and pulp.value(var) > 0.5:
+                plan[w].append(name)
+        for w in weeks:
+            plan[w].sort(key=lambda name: cost(name, w))
+        self.logger.info(
+            f"报告轮换规划完成: {len(members)} 人, {len(weeks)} 周, 用时 {time.perf_counter() - start:.3f}s"
+        )
+        return plan
+
+    def save_plan(self):
+        """保存规划结果到 presenter_rotation.json"""
+        os.makedirs(self.this_sem_path, exist_ok=True)
+        json_codec.dump({str(w): names for w, names in self.plan.items()}, self.plan_path, pretty=True)
+        self.logger.info(f"报告轮换已保存到: {self.plan_path}")
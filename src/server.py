@@ -12,7 +12,8 @@ from .common.baseclient import SMCLabClient
 from .crawler.bitable_crawler import (
     SMCLabWeeklyReportCrawler, 
     SMCLabSeminarCrawler,
-    SMCLabScheduleCrawler
+    SMCLabScheduleCrawler,
+    SMCLabSeminarLeaveCrawler
 )
 from .crawler.address_book_crawler import (
     SMCLabAddressBookCrawler
@@ -20,11 +21,15 @@ from .crawler.address_book_crawler import (
 from .crawler.attendance_crawler import (
     SMCLabAttendanceCrawler
 )
+from .crawler.relay_crawler import (
+    SMCLabRelayCrawler
+)
 from .data_manager.schedule_parser import (
     SMCLabScheduleParser
 )
 from .data_manager.attendance_parser import (
-    SMCLabDailyAttendanceParser
+    SMCLabDailyAttendanceParser,
+    SMCLabSeminarAttendanceParser
 )
 from .data_manager.bitable_parser import (
     SMCLabInfoManager,
@@ -33,6 +38,7 @@ from .data_manager.bitable_parser import (
 from .message.sender import (
     SMCLabMessageSender
 )
+from .utils import get_semester_and_week
 
 class SMCLabServer:
     def __init__(self):
@@ -49,15 +55,20 @@ class SMCLabServer:
         self.weekly_report_crawler = SMCLabWeeklyReportCrawler() 
         self.group_meeting_crawler = SMCLabSeminarCrawler()
         self.schedule_crawler      = SMCLabScheduleCrawler()
+        self.seminar_leave_crawler = SMCLabSeminarLeaveCrawler()
         self.attendance_crawler    = SMCLabAttendanceCrawler()
+        self.relay_crawler         = SMCLabRelayCrawler()
 
         # 处理
         self.schedule_parser      = SMCLabScheduleParser()
         self.attendance_parser    = SMCLabDailyAttendanceParser()
+        self.seminar_attendance_parser = SMCLabSeminarAttendanceParser()
         self.weekly_report_parser = SMCLabWeeklyReportParser()
         
         # 发送
         self.sender = SMCLabMessageSender()
+        # 组会当天的接龙监听线程
+        self.relay_thread = None
 
         self.setup_schedules()
 
@@ -104,8 +115,17 @@ class SMCLabServer:
     def send_last_week_attendence(self, receivers: str | List[str] = ["梁涵"]):
         self.schedule_crawler.get_raw_records() # 下载最新课表数据
         self.schedule_parser.make_period_summary_json() # 处理最新的课表数据
+        self.schedule_parser.make_schedule_by_week_json()
         self.attendance_crawler.get_last_week_daily_records() # 下载上周的考勤数据
         self.attendance_parser.last_week_daily_attendance_to_excel() # 处理上周的考勤数据
+        self.attendance_crawler.get_last_week_presence_records() # 下载上周全部的打卡流水
+        self.attendance_parser.last_week_presence_heatmap() # 增量统计在场时间并画热力图
+        _, this_week = get_semester_and_week()
+        if this_week > 1: # 第1周没有"上周"
+            self.attendance_crawler.get_last_week_seminar_records() # 下载上周的组会打卡数据
+            self.seminar_leave_crawler.get_last_week_records() # 下载上周的组会请假记录
+            self.relay_crawler.sync_week_relay(this_week - 1) # 增量拉取群聊中的组会接龙
+            self.seminar_attendance_parser.get_attendance_for_weeks([this_week - 1]) # 非交互地统计上周组会考勤
         self.weekly_report_crawler.get_last_week_records() # 下载上周的周报数据
         self.weekly_report_parser.last_week_weekly_report_to_txt() # 处理上周的周报数据
 
@@ -124,9 +144,39 @@ class SMCLabServer:
         
         # 每月1号中午12点执行
         schedule.every().day.at("12:00").do(self.check_monthly_task)
+
+        # 组会当天开始前1小时启动接龙监听
+        watch_time = max(self.relay_crawler.seminar_start_time - 100, 0)
+        schedule.every().day.at(f"{watch_time // 100:02d}:{watch_time % 100:02d}").do(self.check_seminar_relay)
         
         logging.info("定时任务设置完成")
     
+    def check_seminar_relay(self):
+        """如果今天有组会, 在后台线程中监听群聊接龙"""
+        if not (self.relay_crawler.chat_id or self.relay_crawler.chat_name):
+            return
+        _, this_week = get_semester_and_week()
+        end_ms = self.relay_crawler.seminar_end_ms(this_week)
+        if end_ms is None or datetime.fromtimestamp(end_ms / 1000).date() != datetime.now().date():
+            return
+        if self.relay_thread and self.relay_thread.is_alive():
+            return
+        self.relay_thread = threading.Thread(target=self.watch_seminar_relay, args=(this_week, end_ms), daemon=True)
+        self.relay_thread.start()
+        logging.info("第%d周组会接龙监听已启动", this_week)
+
+    def watch_seminar_relay(self, week: int, end_ms: int):
+        """组会期间持续同步接龙, 组会一结束就统计考勤; 之后继续接收补充的接龙直到时间窗关闭, 再统计一次"""
+        try:
+            self.relay_crawler.watch_week_relay(week, until_ms=end_ms)
+            self.seminar_leave_crawler.get_raw_records_by_week(week)
+            self.seminar_attendance_parser.get_attendance_for_weeks([week])
+            self.relay_crawler.watch_week_relay(week)
+            self.seminar_leave_crawler.get_raw_records_by_week(week)
+            self.seminar_attendance_parser.get_attendance_for_weeks([week])
+        except Exception as e:
+            logging.error(f"组会接龙监听出错: {e}")
+
     def check_monthly_task(self):
         """检查是否是每月1号，如果是则执行每月任务"""
         today = datetime.now()
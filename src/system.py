@@ -1,11 +1,11 @@
 import os, sys, glob
 import logging
-import json
 import time
 from logging.handlers import RotatingFileHandler
 from typing import List
 
 from openpyxl.descriptors.base import NoneSet
+from .common import json_codec
 
 
 # from src.common.baseclient import SMCLabClient
@@ -22,6 +22,9 @@ from src.crawler.address_book_crawler import (
 from src.crawler.attendance_crawler import (
     SMCLabAttendanceCrawler
 )
+from src.crawler.relay_crawler import (
+    SMCLabRelayCrawler
+)
 
 from src.data_manager.address_book_parser import (
     SMCLabAddressBookParser
@@ -50,6 +53,9 @@ from src.message.sender import (
 from src.operate.group_meeting_scheduler import (
     SMCLabGroupMeetingScheduler
 )
+from src.operate.presenter_rotation import (
+    SMCLabPresenterRotationPlanner
+)
 from src.config import Config
 from src.utils import get_semester_and_week
 
@@ -74,6 +80,7 @@ class SMCLabDailyManager:
         self.seminar_crawler = SMCLabSeminarCrawler(config)
         self.seminar_leave_crawler = SMCLabSeminarLeaveCrawler(config)
         self.address_book_crawler = SMCLabAddressBookCrawler(config)
+        self.relay_crawler = SMCLabRelayCrawler(config)
         # 解析模块
         self.daily_attendance_parser = SMCLabDailyAttendanceParser(config)
         self.seminar_attendance_parser = SMCLabSeminarAttendanceParser(config)
@@ -85,6 +92,7 @@ class SMCLabDailyManager:
         # 管理模块
         self.seminar_manager = SMCLabSeminarManager(config)
         self.group_meeting_scheduler = SMCLabGroupMeetingScheduler(config)
+        self.presenter_rotation_planner = SMCLabPresenterRotationPlanner(config)
 
     def _set_logger(self):
         self.logger = logging.getLogger(name=self.config.logger_name)
@@ -150,6 +158,8 @@ class SMCLabDailyManager:
                                           user: str = "梁涵",
                                           use_relay: bool =True):
         self.attendance_crawler.get_this_week_seminar_records()
+        if use_relay:
+            self.relay_crawler.sync_week_relay(self._this_week)
         self.seminar_attendance_parser.get_this_week_attended_names(use_relay=use_relay)
         # 发送消息
         self.sender.send_this_week_seminar_attendance(user)
@@ -192,6 +202,7 @@ class SMCLabDailyManager:
         if update_schedule: # TODO: 不够智能，这里的条件应该判断是否存在文件，如果没有文件依然需要更新
             self.schedule_crawler.get_raw_records() 
             self.schedule_parser.make_period_summary_json()
+            self.schedule_parser.make_schedule_by_week_json()
             now = int(time.time())
             last_time_updated["last_schedule_crawle"] = now
 
@@ -199,8 +210,7 @@ class SMCLabDailyManager:
         if update_seminar_info:
             if not last_time_updated.get("last_seminar_crawle", None):
                 self.seminar_crawler.get_raw_records()
-            self.seminar_parser.save_info_to_excel()
-            self.seminar_manager.update_seminar_schedule()
+            self.seminar_manager.update_seminar_schedule(export_excel=True)
         
         # 读取 weekly_todo.json 并根据未完成事项执行
         last_week = self._this_week - 1
@@ -212,6 +222,8 @@ class SMCLabDailyManager:
             self.logger.info("执行: 下载日常出勤信息")
             self.attendance_crawler.get_last_week_daily_records()
             self.daily_attendance_parser.last_week_daily_attendance_to_excel()
+            self.attendance_crawler.get_last_week_presence_records()
+            self.daily_attendance_parser.last_week_presence_heatmap()
             weekly_todo_updated["下载日常出勤信息"] = True
         else:
             self.logger.info("跳过: 下载日常出勤信息（已完成）")
@@ -221,6 +233,8 @@ class SMCLabDailyManager:
             self.logger.info("执行: 下载组会出勤信息")
             self.attendance_crawler.get_last_week_seminar_records()
             self.seminar_leave_crawler.get_last_week_records()
+            if use_relay:
+                self.relay_crawler.sync_week_relay(last_week)
             self.seminar_attendance_parser.get_last_week_attended_names(use_relay, backdoor_delete)
             weekly_todo_updated["下载组会出勤信息"] = True
         else:
@@ -242,14 +256,27 @@ class SMCLabDailyManager:
             self._update_done_last_time(updates=last_time_updated)
         self.sender.send_last_week_summary(users=users)
 
+    def backfill_seminar_attendance(self,
+                                    weeks: List[int],
+                                    use_relay: bool = True):
+        """
+        非交互地补算多周的组会考勤: 下载各周打卡流水和请假记录(不删除其他周的), 同步接龙, 再一次性统计
+        """
+        weeks = sorted(w for w in set(weeks) if 1 <= w <= self._this_week)
+        self.attendance_crawler.get_seminar_records_for_weeks(weeks)
+        self.seminar_leave_crawler.get_records_for_weeks(weeks)
+        if use_relay:
+            for week in weeks:
+                self.relay_crawler.sync_week_relay(week)
+        return self.seminar_attendance_parser.get_attendance_for_weeks(weeks, use_relay=use_relay)
+
     def send_this_week_seminar_preview(self,
                                        users: str | List[str] = "梁涵",
                                        update_seminar_info: bool = True):
                                                # 更新组会信息
         if update_seminar_info:
             self.seminar_crawler.get_raw_records()
-            self.seminar_parser.save_info_to_excel()
-            self.seminar_manager.update_seminar_schedule()
+            self.seminar_manager.update_seminar_schedule(export_excel=True)
         self.sender.send_this_week_seminar_preview(users)
 
     def initial_spring_semester(self, 
@@ -260,14 +287,24 @@ class SMCLabDailyManager:
             self.get_address_book()
         if update_schedule:
             self.schedule_crawler.get_raw_records()
-        self.schedule_parser.make_period_summary_json()
-        self.schedule_parser.make_schedule_count_xlsx()
+        self.schedule_parser.export_all()
         schedule = self.group_meeting_scheduler.schedule_group_meeting(meeting_periods)
         for key in schedule.keys():
             print(key, ":")
             for group in schedule[key]:
                 print(group)
 
+    def plan_presenter_rotation(self,
+                                unavailable: dict = None,
+                                update_seminar_info: bool = True):
+        if update_seminar_info:
+            self.seminar_crawler.get_raw_records()
+            self.seminar_manager.update_seminar_schedule()
+        plan = self.presenter_rotation_planner.plan_rotation(unavailable=unavailable)
+        for week, names in plan.items():
+            print(f"第{week}周:", ", ".join(names))
+        return plan
+
     def test(self):
         self.schedule_parser.make_period_summary_json()
         return
@@ -290,8 +327,7 @@ class SMCLabDailyManager:
         if not os.path.exists(weekly_todo_path):
             return {}
         try:
-            with open(weekly_todo_path, 'r', encoding='utf-8') as f:
-                weekly_todo_data = json.load(f)
+            weekly_todo_data = json_codec.load(weekly_todo_path)
             week_key = f"week{week}"
             weekly_map = weekly_todo_data.get("weekly_todo", {})
             if week_key in weekly_map:
@@ -311,8 +347,7 @@ class SMCLabDailyManager:
                 "weekly_todo": {}}
         if os.path.exists(weekly_todo_path):
             try:
-                with open(weekly_todo_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = json_codec.load(weekly_todo_path)
             except Exception as e:
                 self.logger.warning(f"读取 weekly_todo.json 失败，将重新写入基础结构: {e}")
 
@@ -324,8 +359,7 @@ class SMCLabDailyManager:
         data["weekly_todo"] = weekly_map
 
         try:
-            with open(weekly_todo_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            json_codec.dump(data, weekly_todo_path, pretty=True)
             self.logger.info(f"已更新 weekly_todo.json 的 {week_key}: {updates}")
         except Exception as e:
             self.logger.error(f"写入 weekly_todo.json 失败: {e}")
@@ -335,8 +369,7 @@ class SMCLabDailyManager:
         if not os.path.exists(weekly_todo_path):
             return {}
         try:
-            with open(weekly_todo_path, 'r', encoding='utf-8') as f:
-                weekly_todo_data = json.load(f)
+            weekly_todo_data = json_codec.load(weekly_todo_path)
             done_last_time = weekly_todo_data.get("done_last_time", {})
             return done_last_time
         except Exception as e:
@@ -351,8 +384,7 @@ class SMCLabDailyManager:
                 "weekly_todo": {}}
         if os.path.exists(weekly_todo_path):
             try:
-                with open(weekly_todo_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = json_codec.load(weekly_todo_path)
             except Exception as e:
                 self.logger.warning(f"读取 weekly_todo.json 失败，将重新写入基础结构: {e}")
 
@@ -362,8 +394,7 @@ class SMCLabDailyManager:
         data["done_last_time"] = done_last_time
 
         try:
-            with open(weekly_todo_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            json_codec.dump(data, weekly_todo_path, pretty=True)
             self.logger.info(f"已更新 weekly_todo.json 的 done_last_time: {updates}")
         except Exception as e:
             self.logger.error(f"写入 weekly_todo.json 失败: {e}")
@@ -1,12 +1,12 @@
-import time, os, json, logging
+import time, os, logging
 from datetime import datetime, timedelta
 from typing import Union
+from .common import json_codec
 
 def get_semester(current_time: str = None,
                  semester_info_path: str = "configs/semester_info.json"):
     # 1. 读取JSON文件
-    with open(semester_info_path, 'r', encoding='utf-8') as f:
-        semester_map = json.load(f)
+    semester_map = json_codec.load(semester_info_path)
     # 2. 将字符串日期转换为 datetime 对象
     semester_dates = []
     for sem, sem_info in semester_map.items():
@@ -56,8 +56,7 @@ def get_semester_and_week(current_time: str = None,
         current_time = datetime.strptime(current_time, "%Y%m%d")
 
     # 读取JSON文件
-    with open(semester_info_path, 'r', encoding='utf-8') as f:
-        semester_map = json.load(f)
+    semester_map = json_codec.load(semester_info_path)
 
     # 转换为 (学期, 起始日期) 列表，并按时间排序
     semester_dates = []
@@ -99,8 +98,7 @@ def get_semester_and_week(current_time: str = None,
 
 def get_semester_start_date(semester: str = None,
                             semester_info_path: str = "configs/semester_info.json"):
-    with open(semester_info_path, 'r', encoding='utf-8') as f:
-        semester_map = json.load(f)
+    semester_map = json_codec.load(semester_info_path)
     if semester is None:
         semester = get_semester()
     return datetime.strptime(semester_map[semester]["start_date"], "%Y%m%d")
@@ -0,0 +1,44 @@
+import numpy as np
+
+from src.data_manager.flow_classifier import (SMCLabFlowColumns, classify_flows, attendance_status,
+                                              STATUS_ON_TIME, STATUS_LATE, STATUS_LEFT_EARLY)
+
+WEEK = 5
+START = 1_700_000_000
+END = START + 90 * 60
+
+
+def make_flows(records):
+    """records: [(user_id, 打卡时间), ...], 全部是第 WEEK 周的正常打卡"""
+    users = sorted({user for user, _ in records})
+    return SMCLabFlowColumns(
+        users=users,
+        locations=["lab"],
+        user=np.array([users.index(user) for user, _ in records], dtype=np.int32),
+        check_time=np.array([t for _, t in records], dtype=np.int64),
+        type=np.zeros(len(records), dtype=np.int16),
+        location=np.zeros(len(records), dtype=np.int32),
+        week=np.full(len(records), WEEK, dtype=np.int16),
+    )
+
+
+def statuses(records):
+    flows = make_flows(records)
+    labels = classify_flows(flows, {WEEK: START}, {WEEK: END}, grace=600, early_leave=900)
+    return attendance_status(flows, labels, grace=600)[WEEK]
+
+
+def test_double_tap_on_arrival_is_on_time():
+    assert statuses([("a", START - 240), ("a", START - 230)]) == {"a": STATUS_ON_TIME}
+
+
+def test_double_tap_on_late_arrival_is_late():
+    assert statuses([("a", START + 1200), ("a", START + 1210)]) == {"a": STATUS_LATE}
+
+
+def test_mid_meeting_exit_punch_is_left_early():
+    assert statuses([("a", START - 60), ("a", START + 40 * 60)]) == {"a": STATUS_LEFT_EARLY}
+
+
+def test_punch_at_meeting_end_is_not_left_early():
+    assert statuses([("a", START - 60), ("a", END - 300)]) == {"a": STATUS_ON_TIME}
@@ -0,0 +1,34 @@
+import os
+
+from src.common import json_codec
+from src.data_manager.seminar_minhash import SMCLabTopicDedupIndex
+
+SEMESTER = "2025-2026-1"
+TITLE = "Diffusion models for robust image restoration"
+ABSTRACT = "We study score based diffusion priors for denoising and deblurring real photos"
+
+
+def make_index(tmp_path, seminars):
+    sem_path = tmp_path / SEMESTER
+    os.makedirs(sem_path)
+    json_codec.dump(seminars, str(sem_path / "seminar_information.json"))
+    index = SMCLabTopicDedupIndex(str(tmp_path))
+    index.update()
+    return index
+
+
+def talk(week, presenter, title, happened=True):
+    return {"week": week, "weekday": 2, "happened": happened,
+            "presentations": [{"presenter": presenter, "title": title, "abstract": ABSTRACT}]}
+
+
+def test_same_talk_in_another_week_is_excluded(tmp_path):
+    # 第3周已经讲过, 第5周的记录是同一个报告
+    index = make_index(tmp_path, [talk(3, "张三", TITLE), talk(5, "张三", TITLE, happened=False)])
+    assert index.similar(TITLE, ABSTRACT, exclude=(SEMESTER, 5), exclude_talk=("张三", TITLE)) == []
+
+
+def test_other_presenter_with_same_topic_is_flagged(tmp_path):
+    index = make_index(tmp_path, [talk(3, "李四", TITLE), talk(5, "张三", TITLE, happened=False)])
+    similar = index.similar(TITLE, ABSTRACT, exclude=(SEMESTER, 5), exclude_talk=("张三", TITLE))
+    assert [(item["week"], item["presenter"]) for item in similar] == [(3, "李四")]